@@ -1,2 +1,12 @@
+from odoo import api, SUPERUSER_ID
+
+from . import controllers
 from . import models
 from . import wizards
+
+
+def _post_init_hook(cr, registry):
+    """Initialize the folded budget totals and the approval queue counters"""
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['expense.budget']._rebuild_spent_ledger()
+    env['expense.approval.counter']._rebuild_counters()
@@ -1,6 +1,6 @@
 {
     'name': 'Advanced Expense Tracker',
-    'version': '1.0.0',
+    'version': '1.0.1',
     'category': 'Accounting/Finance',
     'summary': 'Comprehensive expense tracking and management system with advanced features',
     'description': """
@@ -63,6 +63,7 @@ and accounting integration.
         'base',
         'account',
         'mail',
+        'bus',
         'web',
         'portal',
         'base_setup',
@@ -85,6 +86,12 @@ and accounting integration.
         'data/expense_category_data.xml',
         # 'data/mail_template_data.xml',
         'data/action_rules.xml',
+        'data/expense_archive_data.xml',
+        'data/data_version_data.xml',
+        'data/instrumentation_data.xml',
+        'data/budget_ledger_data.xml',
+        'data/expense_anomaly_data.xml',
+        'data/approval_queue_data.xml',
 
 
 
@@ -95,6 +102,10 @@ and accounting integration.
         'views/budget_views.xml',
         'views/dashboard_views.xml',
         'views/menu_views.xml',
+        'views/expense_archive_views.xml',
+        'views/categorization_rule_views.xml',
+        'views/expense_anomaly_views.xml',
+        'views/instrumentation_views.xml',
         
 
 
@@ -122,13 +133,20 @@ and accounting integration.
             'expense_tracker_advanced/static/src/css/tree_views.css',
 
             # JS Files
-            'expense_tracker_advanced/static/src/js/dashboard.js',
+            'expense_tracker_advanced/static/src/js/dashboard_loader.js',
             'expense_tracker_advanced/static/src/js/expense_form.js',
             'expense_tracker_advanced/static/src/js/budget_progress.js',
-            'expense_tracker_advanced/static/src/js/chart_rendering.js',
+        ],
 
+        # Loaded on demand by the dashboard view (see dashboard_loader.js)
+        'expense_tracker_advanced.assets_dashboard': [
             # Libraries
-            'expense_tracker_advanced/static/src/lib/chartjs/Chart.min.js',
+            'web/static/lib/Chart/Chart.js',
+
+            # JS Files
+            'expense_tracker_advanced/static/src/js/chart_rendering.js',
+            'expense_tracker_advanced/static/src/js/recent_activity.js',
+            'expense_tracker_advanced/static/src/js/dashboard.js',
         ],
 
         'web.assets_frontend': [
@@ -144,6 +162,7 @@ and accounting integration.
 
    
 
+    'post_init_hook': '_post_init_hook',
     'installable': True,
     'application': True,
     'auto_install': False,
@@ -0,0 +1,201 @@
+from odoo import api, http, fields
+from odoo.http import request, content_disposition
+from odoo.modules.registry import Registry
+from odoo.tools import pycompat
+import io
+import json
+import os
+import tempfile
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+
+EXPORT_CHUNK_SIZE = 2000
+XLSX_MAX_ROWS = 1048575
+
+
+class ExpenseExportController(http.Controller):
+    """Exports streamed straight from a server-side cursor.
+
+    The request cursor is closed as soon as the controller returns, so the
+    response generator opens its own cursor and reads the rows through a
+    named (server-side) cursor, ``EXPORT_CHUNK_SIZE`` rows at a time. Record
+    rules are applied when building the query, exactly as for a search.
+    """
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _get_expense_query(self, env, domain):
+        Expense = env['expense.tracker']
+        subquery, params = Expense._search(domain).subselect()
+        states = dict(Expense._fields['state']._description_selection(env))
+        headers = [Expense._fields[name]._description_string(env) for name in (
+            'name', 'title', 'date', 'category_id', 'user_id', 'amount', 'currency_id', 'state')]
+        # translated names are stored as jsonb, one key per language
+        query = """
+            SELECT e.name, e.title, e.date, COALESCE(c.name->>%%s, c.name->>'en_US'),
+                   p.name, e.amount, cur.name, e.state
+              FROM expense_tracker e
+         LEFT JOIN expense_category c ON c.id = e.category_id
+         LEFT JOIN res_users u ON u.id = e.user_id
+         LEFT JOIN res_partner p ON p.id = u.partner_id
+         LEFT JOIN res_currency cur ON cur.id = e.currency_id
+             WHERE e.id IN (%s)
+          ORDER BY e.date DESC, e.id DESC
+        """ % subquery
+
+        def convert(row):
+            return row[:7] + (states.get(row[7], row[7]),)
+        return headers, query, [env.lang or 'en_US'] + list(params), convert
+
+    def _get_budget_utilization_query(self, env, domain):
+        Budget = env['expense.budget']
+        subquery, params = Budget._search(domain).subselect()
+        states = dict(Budget._fields['state']._description_selection(env))
+        headers = [Budget._fields[name]._description_string(env) for name in (
+            'name', 'category_id', 'date_from', 'date_to', 'amount', 'spent_amount',
+            'remaining_amount', 'utilization_percentage', 'state')]
+        query = """
+            WITH pending AS (
+                SELECT budget_id, SUM(amount) AS amount
+                  FROM expense_budget_ledger
+                 WHERE budget_id IN (%(budgets)s)
+              GROUP BY budget_id
+            )
+            SELECT b.name, COALESCE(c.name->>%%s, c.name->>'en_US'), b.date_from, b.date_to, b.amount,
+                   COALESCE(b.spent_folded, 0.0) + COALESCE(pending.amount, 0.0), b.state
+              FROM expense_budget b
+         LEFT JOIN expense_category c ON c.id = b.category_id
+         LEFT JOIN pending ON pending.budget_id = b.id
+             WHERE b.id IN (%(budgets)s)
+          ORDER BY b.date_from DESC, b.id DESC
+        """ % {'budgets': subquery}
+
+        def convert(row):
+            name, category, date_from, date_to, amount, spent, state = row
+            utilization = (spent / amount * 100) if amount > 0 else 0.0
+            return (name, category, date_from, date_to, amount, spent, amount - spent,
+                    round(utilization, 2), states.get(state, state))
+        return headers, query, list(params) + [env.lang or 'en_US'] + list(params), convert
+
+    # ------------------------------------------------------------------
+    # Streaming
+    # ------------------------------------------------------------------
+
+    def _iter_rows(self, query_builder, domain, dbname, uid, context):
+        """Yield the header, then chunks of converted rows, from a fresh cursor.
+
+        This runs while the response is sent, after the request is over: it
+        must not touch ``request``.
+        """
+        with Registry(dbname).cursor() as cr:
+            env = api.Environment(cr, uid, context)
+            headers, query, params, convert = query_builder(env, domain)
+            yield headers
+            named = cr._cnx.cursor('expense_tracker_export')
+            try:
+                named.itersize = EXPORT_CHUNK_SIZE
+                named.execute(query, params)
+                while True:
+                    rows = named.fetchmany(EXPORT_CHUNK_SIZE)
+                    if not rows:
+                        break
+                    yield [convert(row) for row in rows]
+            finally:
+                named.close()
+
+    def _stream_csv(self, rows):
+        buffer = io.BytesIO()
+        writer = pycompat.csv_writer(buffer, quoting=1)
+        for index, chunk in enumerate(rows):
+            if index == 0:
+                writer.writerow(chunk)
+            else:
+                writer.writerows([
+                    [value if value is not None else '' for value in row] for row in chunk
+                ])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    def _stream_xlsx(self, rows, sheet_name):
+        """Write the workbook in constant-memory mode to a temporary file, then stream it.
+
+        An XLSX file is a zip archive finalized on close, so it cannot be sent
+        while being written; rows are flushed to disk as they come instead of
+        being kept in memory. Sheets are split at the XLSX row limit.
+        """
+        handle, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(handle)
+        try:
+            workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'default_date_format': 'yyyy-mm-dd'})
+            headers = None
+            worksheet = None
+            row_index = XLSX_MAX_ROWS
+            for index, chunk in enumerate(rows):
+                if index == 0:
+                    headers = chunk
+                    continue
+                for row in chunk:
+                    if row_index >= XLSX_MAX_ROWS:
+                        worksheet = workbook.add_worksheet('%s %d' % (sheet_name, len(workbook.worksheets()) + 1))
+                        worksheet.write_row(0, 0, headers)
+                        row_index = 1
+                    worksheet.write_row(row_index, 0, row)
+                    row_index += 1
+            if worksheet is None:
+                workbook.add_worksheet(sheet_name).write_row(0, 0, headers or [])
+            workbook.close()
+
+            with open(path, 'rb') as xlsx_file:
+                while True:
+                    data = xlsx_file.read(1024 * 1024)
+                    if not data:
+                        break
+                    yield data
+        finally:
+            os.unlink(path)
+
+    def _make_export_response(self, query_builder, model, domain, file_format, filename):
+        if file_format not in ('csv', 'xlsx'):
+            raise request.not_found()
+        if file_format == 'xlsx' and not xlsxwriter:
+            raise request.not_found()
+        request.env[model].check_access_rights('read')
+        domain = json.loads(domain) if domain else []
+
+        rows = self._iter_rows(query_builder, domain, request.db, request.env.uid, dict(request.env.context))
+        if file_format == 'csv':
+            body = self._stream_csv(rows)
+            content_type = 'text/csv;charset=utf8'
+        else:
+            body = self._stream_xlsx(rows, filename)
+            content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        filename = '%s-%s.%s' % (filename, fields.Date.today(), file_format)
+        response = request.make_response(body, headers=[
+            ('Content-Type', content_type),
+            ('Content-Disposition', content_disposition(filename)),
+        ])
+        response.direct_passthrough = True
+        return response
+
+    # ------------------------------------------------------------------
+    # Routes
+    # ------------------------------------------------------------------
+
+    @http.route('/expense_tracker/export/expenses.<string:file_format>', type='http', auth='user')
+    def export_expenses(self, file_format, domain=None, **kwargs):
+        """Stream the expenses matching ``domain`` (JSON) as CSV or XLSX"""
+        return self._make_export_response(
+            self._get_expense_query, 'expense.tracker', domain, file_format, 'Expenses')
+
+    @http.route('/expense_tracker/export/budget_utilization.<string:file_format>', type='http', auth='user')
+    def export_budget_utilization(self, file_format, domain=None, **kwargs):
+        """Stream the utilization of the budgets matching ``domain`` (JSON) as CSV or XLSX"""
+        return self._make_export_response(
+            self._get_budget_utilization_query, 'expense.budget', domain, file_format, 'Budget Utilization')
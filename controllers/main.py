@@ -0,0 +1,30 @@
+from odoo import http
+from odoo.http import request
+from odoo.tools import str2bool
+
+
+class ExpenseReceiptController(http.Controller):
+
+    def _get_receipt_stream(self, expense_id, field_name):
+        expense = request.env['expense.tracker'].browse(expense_id).exists()
+        if not expense:
+            raise request.not_found()
+        expense.check_access_rights('read')
+        expense.check_access_rule('read')
+        return request.env['ir.binary']._get_stream_from(
+            expense, field_name, filename_field='receipt_filename')
+
+    @http.route('/expense_tracker/receipt/<int:expense_id>', type='http', auth='user')
+    def expense_receipt(self, expense_id, unique=None, download=None, **kwargs):
+        """Stream the receipt from the filestore with ETag/Cache-Control headers.
+
+        When the URL carries the receipt checksum as ``unique`` the response is
+        marked immutable, since a different receipt gets a different URL.
+        """
+        stream = self._get_receipt_stream(expense_id, 'receipt')
+        return stream.get_response(as_attachment=str2bool(download or '0'), immutable=bool(unique))
+
+    @http.route('/expense_tracker/receipt/<int:expense_id>/thumbnail', type='http', auth='user')
+    def expense_receipt_thumbnail(self, expense_id, unique=None, **kwargs):
+        stream = self._get_receipt_stream(expense_id, 'receipt_thumbnail')
+        return stream.get_response(immutable=bool(unique))
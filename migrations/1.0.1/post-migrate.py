@@ -0,0 +1,41 @@
+import logging
+
+from odoo import api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+
+def migrate(cr, version):
+    """Move the receipts of the ``expense_tracker.receipt`` column to ir.attachment.
+
+    The receipt is attachment-backed since 1.0.1: the ORM no longer reads the
+    column, which the update leaves in place with the receipts uploaded before.
+    """
+    cr.execute("""
+        SELECT 1
+          FROM information_schema.columns
+         WHERE table_name = 'expense_tracker' AND column_name = 'receipt'
+    """)
+    if not cr.rowcount:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    cr.execute("SELECT id FROM expense_tracker WHERE receipt IS NOT NULL ORDER BY id")
+    expense_ids = [row[0] for row in cr.fetchall()]
+    for index in range(0, len(expense_ids), BATCH_SIZE):
+        batch = expense_ids[index:index + BATCH_SIZE]
+        cr.execute("SELECT id, receipt FROM expense_tracker WHERE id IN %s", [tuple(batch)])
+        env['ir.attachment'].create([{
+            'name': 'receipt',
+            'res_model': 'expense.tracker',
+            'res_field': 'receipt',
+            'res_id': expense_id,
+            'datas': bytes(receipt),
+        } for expense_id, receipt in cr.fetchall()])
+        # checksum and thumbnail are computed from the attachment
+        env['expense.tracker'].browse(batch).modified(['receipt'])
+        env.flush_all()
+        env.invalidate_all()
+    cr.execute("ALTER TABLE expense_tracker DROP COLUMN receipt")
+    _logger.info("Moved %d expense receipts to the filestore", len(expense_ids))
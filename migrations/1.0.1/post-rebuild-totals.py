@@ -0,0 +1,12 @@
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    """Initialize the folded budget totals and the approval queue counters.
+
+    They used to be rebuilt on every module update; databases installed
+    before the post-init hook get them rebuilt once here.
+    """
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['expense.budget']._rebuild_spent_ledger()
+    env['expense.approval.counter']._rebuild_counters()
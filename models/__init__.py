@@ -1,5 +1,17 @@
+from . import ir_sequence
+from . import instrumentation
+from . import data_version
 from . import category
+from . import expense_validation
 from . import expense
 from . import budget
+from . import budget_statistics
+from . import budget_ledger
+from . import categorization_rule
+from . import approval_queue
+from . import expense_archive
+from . import expense_anomaly
 from . import expense_dashboard
+from . import dashboard_bus
+from . import expense_report
 from . import wizard
\ No newline at end of file
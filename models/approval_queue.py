@@ -0,0 +1,172 @@
+from odoo import models, fields, api, tools
+from collections import defaultdict
+
+
+class ExpenseApprovalCounter(models.Model):
+    _name = 'expense.approval.counter'
+    _description = 'Expense Approval Queue Counter'
+    _order = 'id'
+
+    approver_id = fields.Many2one('res.users', string='Approver', ondelete='cascade')
+    company_id = fields.Many2one('res.company', string='Company', ondelete='cascade')
+    delta = fields.Integer(string='Pending Delta', required=True)
+
+    def init(self):
+        tools.create_index(self._cr, 'expense_approval_counter_approver_company_index',
+                           self._table, ['approver_id', 'company_id'])
+
+    @api.model
+    def _add_deltas(self, deltas):
+        """Append ``deltas`` ({(approver id, company id): delta}) to the counters.
+
+        Like the budget ledger, the counters are only ever appended to, so
+        concurrent submissions to the same approver do not conflict.
+        """
+        vals_list = [
+            {'approver_id': approver_id, 'company_id': company_id, 'delta': delta}
+            for (approver_id, company_id), delta in deltas.items() if delta
+        ]
+        if vals_list:
+            self.create(vals_list)
+
+    @api.model
+    def get_pending_count(self, company_ids, approver_id=None):
+        """Number of submitted expenses of the companies waiting for ``approver_id``.
+
+        ``approver_id`` False counts the shared queue, None all the queues.
+        Expenses without company count for every company.
+        """
+        self.flush_model()
+        where, params = "(company_id IN %s OR company_id IS NULL)", [tuple(company_ids)]
+        if approver_id is not None:
+            where += " AND approver_id IS NOT DISTINCT FROM %s"
+            params.append(approver_id or None)
+        self.env.cr.execute("SELECT COALESCE(SUM(delta), 0) FROM expense_approval_counter WHERE " + where, params)
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _cron_fold_counters(self):
+        """Fold the committed deltas into one row per approver and company"""
+        self.flush_model()
+        self.env.cr.execute("""
+            WITH folded AS (
+                DELETE FROM expense_approval_counter RETURNING approver_id, company_id, delta
+            )
+            INSERT INTO expense_approval_counter (approver_id, company_id, delta,
+                                                  create_uid, write_uid, create_date, write_date)
+                 SELECT approver_id, company_id, SUM(delta),
+                        %(uid)s, %(uid)s, now() at time zone 'UTC', now() at time zone 'UTC'
+                   FROM folded
+               GROUP BY approver_id, company_id
+                 HAVING SUM(delta) != 0
+        """, {'uid': self.env.uid})
+        self.invalidate_model()
+
+    @api.model
+    def _rebuild_counters(self):
+        """Recount the submitted expenses; run on install, and from the repair server action"""
+        self.env.flush_all()
+        self.env.cr.execute("DELETE FROM expense_approval_counter")
+        self.env.cr.execute("""
+            INSERT INTO expense_approval_counter (approver_id, company_id, delta,
+                                                  create_uid, write_uid, create_date, write_date)
+                 SELECT approver_id, company_id, COUNT(*),
+                        %(uid)s, %(uid)s, now() at time zone 'UTC', now() at time zone 'UTC'
+                   FROM expense_tracker
+                  WHERE state = 'submitted'
+               GROUP BY approver_id, company_id
+        """, {'uid': self.env.uid})
+        self.invalidate_model()
+
+
+class Expense(models.Model):
+    _inherit = 'expense.tracker'
+
+    _APPROVAL_QUEUE_FIELDS = {'state', 'approver_id', 'company_id'}
+    _APPROVAL_QUEUE_READ_FIELDS = [
+        'name', 'title', 'date', 'amount', 'currency_id', 'category_id', 'user_id', 'submit_date',
+    ]
+
+    def _group_by_approver(self):
+        """Split the expenses by the approver of their category"""
+        approvers = self.mapped('category_id')._get_approvers()
+        groups = defaultdict(list)
+        for expense in self:
+            groups[approvers.get(expense.category_id.id, False)].append(expense.id)
+        return {approver_id: self.browse(ids) for approver_id, ids in groups.items()}
+
+    def _get_queue_entries(self):
+        return [
+            (expense.approver_id.id, expense.company_id.id)
+            for expense in self if expense.state == 'submitted'
+        ]
+
+    def _add_queue_deltas(self, before, after):
+        deltas = defaultdict(int)
+        for key in before:
+            deltas[key] -= 1
+        for key in after:
+            deltas[key] += 1
+        self.env['expense.approval.counter'].sudo()._add_deltas(deltas)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        expenses = super().create(vals_list)
+        self._add_queue_deltas([], expenses._get_queue_entries())
+        return expenses
+
+    def write(self, vals):
+        if not self._APPROVAL_QUEUE_FIELDS & vals.keys():
+            return super().write(vals)
+        before = self._get_queue_entries()
+        res = super().write(vals)
+        self._add_queue_deltas(before, self._get_queue_entries())
+        return res
+
+    def unlink(self):
+        self._add_queue_deltas(self._get_queue_entries(), [])
+        return super().unlink()
+
+    def _assign_approvers(self):
+        """Move the submitted expenses to the queue of their category's approver"""
+        for approver_id, expenses in self.filtered(lambda expense: expense.state == 'submitted') \
+                ._group_by_approver().items():
+            expenses.filtered(lambda expense: expense.approver_id.id != approver_id) \
+                .write({'approver_id': approver_id})
+
+    @api.model
+    def get_approval_queue(self, after=None, limit=40, shared=False):
+        """One page of the current user's approval queue, oldest submission first.
+
+        Pages are keyset-paginated on ``(submit_date, id)`` along the partial
+        index of submitted expenses; ``after`` is the cursor returned with the
+        previous page. With ``shared``, the page comes from the queue of the
+        expenses without approver, reviewed by the expense managers.
+
+        :return: dict with the page ``records``, the ``next`` cursor (``False``
+                 on the last page) and the ``count`` of the whole queue
+        """
+        approver_id = False if shared else self.env.uid
+        ids = self._search_keyset([('state', '=', 'submitted'), ('approver_id', '=', approver_id)],
+                                  ['submit_date', 'id'], after=after, limit=limit + 1)
+        records = self.browse(ids).read(self._APPROVAL_QUEUE_READ_FIELDS)
+        has_more = len(records) > limit
+        records = records[:limit]
+        return {
+            'records': records,
+            'next': has_more and [fields.Datetime.to_string(records[-1]['submit_date']), records[-1]['id']],
+            'count': self.env['expense.approval.counter'].sudo().get_pending_count(
+                self.env.companies.ids, approver_id),
+        }
+
+
+class ExpenseCategory(models.Model):
+    _inherit = 'expense.category'
+
+    def write(self, vals):
+        res = super().write(vals)
+        if {'approver_id', 'parent_id'} & vals.keys():
+            self.env['expense.tracker'].sudo().search([
+                ('state', '=', 'submitted'), ('category_id', 'child_of', self.ids),
+            ])._assign_approvers()
+        return res
@@ -1,15 +1,23 @@
-from odoo import models, fields, api,_
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import ValidationError
 from datetime import date , datetime, timedelta
 
+from .instrumentation import instrumented
+
 
 class ExpenseBudget(models.Model):
     _name = 'expense.budget'
     _description = 'Expense Budget'
     _inherit = ['mail.thread']
 
+    # Fields cached in the active-budget index used by get_available_budgets
+    _ACTIVE_INDEX_FIELDS = {'name', 'category_id', 'company_id', 'amount', 'date_from', 'date_to', 'state'}
+    _ACTIVE_INDEX_VERSION = 'expense.budget.active_index'
+
     name = fields.Char(string='Budget Name', required=True)
     category_id = fields.Many2one('expense.category', string='Category', required=True)
+    company_id = fields.Many2one('res.company', string='Company', index=True,
+                                 default=lambda self: self.env.company)
     amount = fields.Float(string='Budget Amount', required=True, tracking=True)
     period_type = fields.Selection([
         ('daily', 'Daily'),
@@ -35,6 +43,13 @@ class ExpenseBudget(models.Model):
     # Alert thresholds
     warning_threshold = fields.Float(string='Warning Threshold %', default=80.0)
     critical_threshold = fields.Float(string='Critical Threshold %', default=95.0)
+    enforcement_mode = fields.Selection([
+        ('none', 'None'),
+        ('warn', 'Warn'),
+        ('block', 'Block'),
+        ('approval', 'Require Manager Approval'),
+    ], string='Enforcement', default='none', required=True, tracking=True,
+        help="What happens when submitting or approving expenses would overrun the budget")
     state = fields.Selection([
         ('draft', 'Draft'),
         ('active', 'Active'),
@@ -42,12 +57,19 @@ class ExpenseBudget(models.Model):
     ], string='Status', default='draft', tracking=True)
 
     @api.depends('expense_ids.amount', 'expense_ids.state')
+    @instrumented
     def _compute_spent_amount(self):
+        stored = self.filtered('id')
+        rows = self.env['expense.budget.statistics']._get_budget_rows(stored)
+        spent = {row['id']: row['spent'] for row in rows}
         for budget in self:
-            approved_expenses = budget.expense_ids.filtered(
-                lambda x: x.state in ['approved', 'paid']
-            )
-            budget.spent_amount = sum(approved_expenses.mapped('amount'))
+            if budget in stored:
+                budget.spent_amount = spent.get(budget.id, 0.0)
+            else:
+                approved_expenses = budget.expense_ids.filtered(
+                    lambda x: x.state in ['approved', 'paid']
+                )
+                budget.spent_amount = sum(approved_expenses.mapped('amount'))
 
     @api.depends('amount', 'spent_amount')
     def _compute_remaining_amount(self):
@@ -73,6 +95,91 @@ class ExpenseBudget(models.Model):
                 if budget.date_from > budget.date_to:
                     raise ValidationError(_('End date cannot be before start date.'))
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env['expense.budget.statistics'].invalidate_statistics()
+        budgets = super().create(vals_list)
+        budgets._bump_active_index_version()
+        return budgets
+
+    def write(self, vals):
+        self.env['expense.budget.statistics'].invalidate_statistics()
+        if self._ACTIVE_INDEX_FIELDS & vals.keys():
+            self._bump_active_index_version([vals['company_id']] if 'company_id' in vals else [])
+        return super().write(vals)
+
+    def unlink(self):
+        self.env['expense.budget.statistics'].invalidate_statistics()
+        self._bump_active_index_version()
+        return super().unlink()
+
+    def _bump_active_index_version(self, company_ids=()):
+        """Invalidate the active-budget index of the budgets' companies (and ``company_ids``)"""
+        company_ids = set(company_ids) | {budget.company_id.id for budget in self}
+        if company_ids:
+            self.env['expense.data.version'].bump(self._ACTIVE_INDEX_VERSION, company_ids)
+
+    @api.model
+    def _get_active_budget_index(self, company_id):
+        """Map category ids to the active budgets usable by the company.
+
+        Kept in the worker's ormcache under the version of the company's
+        budgets, which moves whenever one is created, deleted or has one of
+        the indexed fields changed.
+        """
+        version = self.env['expense.data.version'].get_version(self._ACTIVE_INDEX_VERSION, company_id)
+        return self._build_active_budget_index(company_id, version)
+
+    @api.model
+    @tools.ormcache('company_id', 'version')
+    def _build_active_budget_index(self, company_id, version):
+        budgets = self.sudo().search_read([
+            ('state', '=', 'active'),
+            ('company_id', 'in', [company_id, False]),
+        ], ['name', 'category_id', 'amount', 'date_from', 'date_to'], order='date_from desc, id')
+        index = {}
+        for budget in budgets:
+            index.setdefault(budget['category_id'][0], []).append((
+                budget['id'], budget['name'], budget['amount'], budget['date_from'], budget['date_to'],
+            ))
+        return {category_id: tuple(entries) for category_id, entries in index.items()}
+
+    @api.model
+    def _find_active_budget(self, index, category_id, expense_date):
+        """Id of the budget of ``index`` covering ``expense_date`` for the category, or False"""
+        for budget_id, name, amount, date_from, date_to in index.get(category_id, ()):
+            if date_from <= expense_date <= date_to:
+                return budget_id
+        return False
+
+    @api.model
+    def get_available_budgets(self, category_id=None, expense_date=None, company_id=None):
+        """Return the active budgets covering ``expense_date``, keyed by category.
+
+        Budgets are looked up in the precomputed active-budget index; only their
+        spent amounts are read from the database, in a single query.
+        """
+        expense_date = fields.Date.to_date(expense_date) or fields.Date.context_today(self)
+        index = self._get_active_budget_index(company_id or self.env.company.id)
+        category_ids = [category_id] if category_id else list(index)
+        entries = {
+            cat_id: [entry for entry in index.get(cat_id, ()) if entry[3] <= expense_date <= entry[4]]
+            for cat_id in category_ids
+        }
+        budget_ids = [entry[0] for cat_entries in entries.values() for entry in cat_entries]
+        rows = self.env['expense.budget.statistics']._get_budget_rows(self.browse(budget_ids))
+        spent = {row['id']: row['spent'] for row in rows}
+        return {
+            cat_id: [{
+                'id': budget_id,
+                'name': name,
+                'amount': amount,
+                'spent_amount': spent.get(budget_id, 0.0),
+                'remaining_amount': amount - spent.get(budget_id, 0.0),
+            } for budget_id, name, amount, date_from, date_to in cat_entries]
+            for cat_id, cat_entries in entries.items()
+        }
+
     def action_view_expenses(self):
         self.ensure_one()
         return {
@@ -112,38 +219,38 @@ class ExpenseBudget(models.Model):
     def _check_budget_alerts(self):
         """Scheduled method to check and send budget alerts"""
         # This method will be called by the cron job
-        critical_budgets = self.search([
-            ('state', '=', 'active'),
-            ('utilization_percentage', '>=', 'critical_threshold')
+        stats = self.env['expense.budget.statistics'].get_statistics([('state', '=', 'active')])
+        critical_budgets = self.browse([
+            budget_id for budget_id, row in stats['budgets'].items()
+            if row['utilization'] >= row['critical_threshold']
         ])
 
         for budget in critical_budgets:
             # Send critical alerts
             pass
 
+    @instrumented
     def get_budget_report_data(self):
        
         self.ensure_one()
 
-       
+        stats = self.env['expense.budget.statistics'].get_statistics()
         data = {
-            'total_budgets': self.search_count([]),
-            'total_budget_amount': sum(self.search([]).mapped('amount')),
-            'total_spent': sum(self.search([]).mapped('spent_amount')),
-            'average_utilization': self.get_average_utilization(),
-            'within_budget_count': self.search_count([('utilization_percentage', '<=', 80)]),
-            'near_limit_count': self.search_count(
-                [('utilization_percentage', '>', 80), ('utilization_percentage', '<=', 95)]),
-            'over_budget_count': self.search_count([('utilization_percentage', '>', 95)]),
+            'total_budgets': stats['total_budgets'],
+            'total_budget_amount': stats['total_budget_amount'],
+            'total_spent': stats['total_spent'],
+            'average_utilization': stats['average_utilization'],
+            'within_budget_count': stats['within_budget_count'],
+            'near_limit_count': stats['near_limit_count'],
+            'over_budget_count': stats['over_budget_count'],
             'currency_id': self.env.user.company_id.currency_id.id,
             'company': self.env.user.company_id,
         }
 
         return data
 
+    @instrumented
     def get_utilization_report_data(self, date_from=None, date_to=None):
-       
-        self.ensure_one()
 
         if not date_from:
             date_from = date.today().replace(day=1)
@@ -151,14 +258,15 @@ class ExpenseBudget(models.Model):
             date_to = date.today()
 
        
-        categories = self.env['expense.category'].search([])
+        categories = self.env['expense.category'].search([('parent_id', '=', False)])
+        subtree_totals = categories.get_subtree_totals()
         category_breakdown = []
 
         for category in categories:
-            category_budgets = self.search([('category_id', '=', category.id)])
-            if category_budgets:
-                total_budget = sum(category_budgets.mapped('amount'))
-                total_spent = sum(category_budgets.mapped('spent_amount'))
+            totals = subtree_totals[category.id]
+            total_budget = totals['budget_amount']
+            if total_budget:
+                total_spent = totals['budget_spent_amount']
                 utilization = (total_spent / total_budget * 100) if total_budget > 0 else 0
 
                 category_breakdown.append({
@@ -169,15 +277,18 @@ class ExpenseBudget(models.Model):
                     'variance': total_budget - total_spent,
                 })
 
-       
-        over_budget_items = self.search([('utilization_percentage', '>', 100)])
+        stats = self.env['expense.budget.statistics'].get_statistics()
+        over_budget_rows = {
+            budget_id: row for budget_id, row in stats['budgets'].items() if row['utilization'] > 100
+        }
         over_budget_data = []
 
-        for item in over_budget_items:
+        for item in self.browse(list(over_budget_rows)):
+            row = over_budget_rows[item.id]
             over_budget_data.append({
                 'name': item.name,
-                'overspent_amount': item.spent_amount - item.amount,
-                'utilization': item.utilization_percentage,
+                'overspent_amount': row['spent'] - row['amount'],
+                'utilization': row['utilization'],
             })
 
         data = {
@@ -192,11 +303,19 @@ class ExpenseBudget(models.Model):
 
         return data
 
+    @api.model
+    def get_progress_data(self, budget_ids):
+        """Return amount, spent amount and utilization of many budgets in one call"""
+        budgets = self.search([('id', 'in', budget_ids)])
+        rows = self.env['expense.budget.statistics']._get_budget_rows(budgets)
+        return {
+            row['id']: {
+                'amount': row['amount'],
+                'spent_amount': row['spent'],
+                'utilization_percentage': (row['spent'] / row['amount'] * 100) if row['amount'] > 0 else 0.0,
+            } for row in rows
+        }
+
     def get_average_utilization(self):
-       
-        budgets = self.search([])
-        if not budgets:
-            return 0
 
-        total_utilization = sum(budgets.mapped('utilization_percentage'))
-        return total_utilization / len(budgets)
\ No newline at end of file
+        return self.env['expense.budget.statistics'].get_statistics()['average_utilization']
\ No newline at end of file
@@ -0,0 +1,200 @@
+from odoo import models, fields, api
+from collections import defaultdict
+
+
+class ExpenseBudgetLedger(models.Model):
+    _name = 'expense.budget.ledger'
+    _description = 'Expense Budget Spend Ledger'
+    _order = 'id'
+
+    budget_id = fields.Many2one('expense.budget', string='Budget', required=True, index=True,
+                                ondelete='cascade')
+    expense_id = fields.Many2one('expense.tracker', string='Expense', ondelete='set null')
+    amount = fields.Float(string='Spend Delta', required=True)
+
+
+class Expense(models.Model):
+    _inherit = 'expense.tracker'
+
+    _BUDGET_SPEND_FIELDS = {'amount', 'state', 'budget_id'}
+
+    def _get_budget_spend(self):
+        """What each expense adds to the spent amount of its budget"""
+        return {
+            expense.id: (expense.budget_id.id, expense.amount)
+            for expense in self
+            if expense.budget_id and expense.state in ('approved', 'paid')
+        }
+
+    @api.model
+    def _append_budget_ledger(self, before, after):
+        """Append the spend deltas between two ``_get_budget_spend`` snapshots.
+
+        Approvals only insert ledger rows and never update the budget row, so
+        concurrent approvals on the same budget do not conflict.
+        """
+        deltas = defaultdict(float)
+        for expense_id, (budget_id, amount) in before.items():
+            deltas[budget_id, expense_id] -= amount
+        for expense_id, (budget_id, amount) in after.items():
+            deltas[budget_id, expense_id] += amount
+        vals_list = [
+            {'budget_id': budget_id, 'expense_id': expense_id, 'amount': amount}
+            for (budget_id, expense_id), amount in deltas.items()
+            if amount
+        ]
+        if vals_list:
+            self.env['expense.budget.ledger'].sudo().create(vals_list)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        expenses = super().create(vals_list)
+        if not self.env.context.get('expense_archiving'):
+            self._append_budget_ledger({}, expenses._get_budget_spend())
+        return expenses
+
+    def write(self, vals):
+        if self.env.context.get('expense_archiving') or not self._BUDGET_SPEND_FIELDS & vals.keys():
+            return super().write(vals)
+        before = self._get_budget_spend()
+        res = super().write(vals)
+        self._append_budget_ledger(before, self._get_budget_spend())
+        return res
+
+    def unlink(self):
+        # archived expenses keep their spend, which stays in the budget totals
+        if not self.env.context.get('expense_archiving'):
+            self._append_budget_ledger(self._get_budget_spend(), {})
+        return super().unlink()
+
+
+class ExpenseBudget(models.Model):
+    _inherit = 'expense.budget'
+
+    spent_folded = fields.Float(string='Folded Spent Amount', readonly=True, copy=False,
+                                help="Spend folded from the ledger; the spent amount adds the "
+                                     "ledger rows not folded yet.")
+
+    @api.model
+    def _cron_fold_spent_ledger(self):
+        self._fold_spent_ledger()
+
+    @api.model
+    def _fold_spent_ledger(self, budget_ids=None):
+        """Fold the committed ledger rows (of ``budget_ids``) into the budget totals.
+
+        Rows are deleted and added to their budget in one statement, so every
+        snapshot sees each delta exactly once, either in the ledger or in the
+        total. Rows committed meanwhile are left for the next run.
+        """
+        self.env['expense.budget.ledger'].flush_model()
+        self.flush_model(['spent_folded'])
+        where = "WHERE budget_id IN %(ids)s" if budget_ids is not None else ""
+        self.env.cr.execute("""
+            WITH folded AS (
+                DELETE FROM expense_budget_ledger %s RETURNING budget_id, amount
+            ), totals AS (
+                SELECT budget_id, SUM(amount) AS amount FROM folded GROUP BY budget_id
+            )
+            UPDATE expense_budget b
+               SET spent_folded = COALESCE(b.spent_folded, 0.0) + totals.amount
+              FROM totals
+             WHERE b.id = totals.budget_id
+        """ % where, {'ids': tuple(budget_ids or [0])})
+        self.env['expense.budget.ledger'].invalidate_model()
+        self.invalidate_model(['spent_folded'])
+
+    @api.model
+    def _get_available_amounts(self, budget_ids, lock=False):
+        """Return {budget id: (enforcement mode, available amount)} of the enforced budgets.
+
+        Reads the folded totals of the budgets plus their ledger rows, in one
+        query whatever their number. With ``lock``, the budget rows stay locked
+        until the end of the transaction and their ledger rows are folded: the
+        budget rows are updated, so a concurrent approval on the same budgets
+        waits, then fails to serialize and is retried against the new totals.
+        Other changes of the spend (resets, amounts) only append to the ledger
+        and never wait for the lock.
+        """
+        if not budget_ids:
+            return {}
+        self.env['expense.budget.ledger'].flush_model()
+        self.flush_model(['amount', 'enforcement_mode', 'spent_folded'])
+        if lock:
+            self.env.cr.execute("""
+                SELECT id FROM expense_budget
+                 WHERE id IN %s AND enforcement_mode != 'none'
+              ORDER BY id
+                   FOR NO KEY UPDATE
+            """, [tuple(budget_ids)])
+            enforced_ids = [row[0] for row in self.env.cr.fetchall()]
+            if not enforced_ids:
+                return {}
+            # every locked row is updated, even without ledger rows to fold
+            self.env.cr.execute("""
+                WITH folded AS (
+                    DELETE FROM expense_budget_ledger WHERE budget_id IN %(ids)s
+                      RETURNING budget_id, amount
+                ), totals AS (
+                    SELECT budget_id, SUM(amount) AS amount FROM folded GROUP BY budget_id
+                )
+                UPDATE expense_budget b
+                   SET spent_folded = COALESCE(b.spent_folded, 0.0) + COALESCE(totals.amount, 0.0)
+                  FROM expense_budget budget
+             LEFT JOIN totals ON totals.budget_id = budget.id
+                 WHERE b.id = budget.id AND budget.id IN %(ids)s
+             RETURNING b.id, b.enforcement_mode, b.amount - b.spent_folded
+            """, {'ids': tuple(enforced_ids)})
+            available = self.env.cr.fetchall()
+            self.env['expense.budget.ledger'].invalidate_model()
+            self.browse(enforced_ids).invalidate_recordset(['spent_folded'])
+        else:
+            self.env.cr.execute("""
+                SELECT b.id, b.enforcement_mode,
+                       b.amount - COALESCE(b.spent_folded, 0.0) - COALESCE(pending.amount, 0.0)
+                  FROM expense_budget b
+             LEFT JOIN (
+                        SELECT budget_id, SUM(amount) AS amount
+                          FROM expense_budget_ledger
+                         WHERE budget_id IN %(ids)s
+                      GROUP BY budget_id
+                  ) pending ON pending.budget_id = b.id
+                 WHERE b.id IN %(ids)s AND b.enforcement_mode != 'none'
+            """, {'ids': tuple(budget_ids)})
+            available = self.env.cr.fetchall()
+        return {budget_id: (mode, amount) for budget_id, mode, amount in available}
+
+    @api.model
+    def _rebuild_spent_ledger(self, budget_ids=None):
+        """Recompute the folded totals from the expenses and archive rollups.
+
+        Run on install, and from the repair server action.
+        """
+        self.env.flush_all()
+        if budget_ids is None:
+            self.env.cr.execute("SELECT id FROM expense_budget")
+            budget_ids = [row[0] for row in self.env.cr.fetchall()]
+        if not budget_ids:
+            return
+        params = {'ids': tuple(budget_ids)}
+        self.env.cr.execute("DELETE FROM expense_budget_ledger WHERE budget_id IN %(ids)s", params)
+        self.env.cr.execute("""
+            WITH spent AS (
+                SELECT budget_id, SUM(amount) AS amount
+                  FROM (
+                        SELECT budget_id, amount FROM expense_tracker
+                         WHERE budget_id IN %(ids)s AND state IN ('approved', 'paid')
+                     UNION ALL
+                        SELECT budget_id, amount FROM expense_archive_rollup
+                         WHERE budget_id IN %(ids)s AND state IN ('approved', 'paid')
+                  ) lines
+              GROUP BY budget_id
+            )
+            UPDATE expense_budget b
+               SET spent_folded = COALESCE(spent.amount, 0.0)
+              FROM expense_budget budget
+         LEFT JOIN spent ON spent.budget_id = budget.id
+             WHERE b.id = budget.id AND budget.id IN %(ids)s
+        """, params)
+        self.env['expense.budget.ledger'].invalidate_model()
+        self.invalidate_model(['spent_folded'])
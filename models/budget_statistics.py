@@ -0,0 +1,86 @@
+from odoo import models, api
+
+
+class ExpenseBudgetStatistics(models.AbstractModel):
+    _name = 'expense.budget.statistics'
+    _description = 'Expense Budget Statistics'
+
+    _CACHE_KEY = 'expense_budget_statistics'
+
+    @api.model
+    def _get_budget_rows(self, budgets):
+        """Fetch amount, thresholds and spent amount of the given budgets in one query"""
+        if not budgets:
+            return []
+        self.env['expense.budget.ledger'].flush_model()
+        budgets.flush_recordset(['amount', 'category_id', 'state', 'warning_threshold', 'critical_threshold',
+                                 'spent_folded'])
+        # Spent amounts are folded into the budget periodically; the ledger
+        # rows appended since then are added on read
+        self.env.cr.execute("""
+            WITH pending AS (
+                SELECT budget_id, SUM(amount) AS amount
+                  FROM expense_budget_ledger
+                 WHERE budget_id IN %(ids)s
+              GROUP BY budget_id
+            )
+            SELECT b.id, b.category_id, b.state, b.amount,
+                   b.warning_threshold, b.critical_threshold,
+                   COALESCE(b.spent_folded, 0.0) + COALESCE(pending.amount, 0.0) AS spent
+              FROM expense_budget b
+         LEFT JOIN pending ON pending.budget_id = b.id
+             WHERE b.id IN %(ids)s
+        """, {'ids': tuple(budgets.ids)})
+        return self.env.cr.dictfetchall()
+
+    @api.model
+    def get_statistics(self, domain=None, warning_threshold=80.0, critical_threshold=95.0):
+        """Return aggregated budget statistics for the budgets matching ``domain``.
+
+        All figures are computed from a single scan and cached on the cursor, so
+        every consumer within the same request shares the result.
+        """
+        domain = domain or []
+        key = (self.env.uid, tuple(self.env.companies.ids), repr(domain),
+               warning_threshold, critical_threshold)
+        cache = self.env.cr.cache.setdefault(self._CACHE_KEY, {})
+        if key not in cache:
+            budgets = self.env['expense.budget'].search(domain)
+            cache[key] = self._compute_statistics(
+                self._get_budget_rows(budgets), warning_threshold, critical_threshold)
+        return cache[key]
+
+    @api.model
+    def _compute_statistics(self, rows, warning_threshold, critical_threshold):
+        stats = {
+            'total_budgets': len(rows),
+            'total_budget_amount': 0.0,
+            'total_spent': 0.0,
+            'average_utilization': 0.0,
+            'within_budget_count': 0,
+            'near_limit_count': 0,
+            'over_budget_count': 0,
+            'budgets': {},
+        }
+        total_utilization = 0.0
+        for row in rows:
+            utilization = (row['spent'] / row['amount'] * 100) if row['amount'] > 0 else 0.0
+            total_utilization += utilization
+            stats['total_budget_amount'] += row['amount']
+            stats['total_spent'] += row['spent']
+            if utilization <= warning_threshold:
+                stats['within_budget_count'] += 1
+            elif utilization <= critical_threshold:
+                stats['near_limit_count'] += 1
+            else:
+                stats['over_budget_count'] += 1
+            stats['budgets'][row['id']] = dict(row, utilization=utilization)
+        if rows:
+            stats['average_utilization'] = total_utilization / len(rows)
+        return stats
+
+    @api.model
+    def invalidate_statistics(self):
+        """Drop the statistics cached for the current request"""
+        self.env.cr.cache.pop(self._CACHE_KEY, None)
+        self.env['expense.report.version'].bump_data_version()
@@ -0,0 +1,245 @@
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import ValidationError
+from collections import defaultdict
+import re
+
+
+class CategorizationMatcher:
+    """Rules compiled for matching many expenses.
+
+    Keyword rules are folded into one regex per field, whose hits are mapped
+    back to their rules; regex and amount-only rules are tried afterwards, in
+    sequence order, and only while they could still beat the best keyword
+    hit. Rules are ranked by their position in sequence order.
+
+    The keyword regex is a lookahead, so it reports a hit at every position
+    rather than consuming the text: a keyword inside a longer one ("shop" in
+    "coffee shop") is still seen. At a given position only the longest
+    keyword is reported, so each keyword also carries the ranks of the
+    shorter keywords it starts with.
+    """
+
+    def __init__(self, rules):
+        self.targets = []
+        self.amount_ranges = []
+        keywords = {}
+        self.regexes = []
+        self.catch_alls = []
+        for rank, rule in enumerate(rules):
+            self.targets.append((rule['category_id'], rule['budget_id']))
+            self.amount_ranges.append((rule['amount_min'] or None, rule['amount_max'] or None))
+            pattern = rule['pattern']
+            if not pattern:
+                self.catch_alls.append(rank)
+            elif rule['match_type'] == 'regex':
+                self.regexes.append((rank, rule['match_field'], re.compile(pattern, re.IGNORECASE)))
+            else:
+                keywords.setdefault(rule['match_field'], {}).setdefault(pattern.strip().lower(), []).append(rank)
+        self.keywords = {
+            field: (re.compile(r'(?=(?<!\w)(%s)(?!\w))' % '|'.join(
+                re.escape(keyword) for keyword in sorted(index, key=len, reverse=True)
+            ), re.IGNORECASE), self._expand_prefixes(index))
+            for field, index in keywords.items()
+        }
+
+    @staticmethod
+    def _expand_prefixes(index):
+        """Map each keyword to its ranks and those of the keywords it starts with as whole words"""
+        return {
+            keyword: sorted(
+                rank
+                for prefix, ranks in index.items()
+                if keyword.startswith(prefix) and (
+                    len(prefix) == len(keyword) or not re.match(r'\w', keyword[len(prefix)]))
+                for rank in ranks
+            )
+            for keyword in index
+        }
+
+    def _in_range(self, rank, amount):
+        amount_min, amount_max = self.amount_ranges[rank]
+        if amount_min is None and amount_max is None:
+            return True
+        if amount is None:
+            return False
+        return (amount_min is None or amount >= amount_min) and (amount_max is None or amount <= amount_max)
+
+    def match(self, values):
+        """Return ``(category_id, budget_id)`` of the first rule matching ``values``, or None.
+
+        ``values`` maps the matched fields (title, description, vendor) to
+        their text, and ``amount`` to the expense amount.
+        """
+        amount = values.get('amount')
+        best = None
+        for field, (regex, index) in self.keywords.items():
+            text = values.get(field)
+            if not text:
+                continue
+            for hit in regex.finditer(text):
+                for rank in index[hit.group(1).lower()]:
+                    if (best is None or rank < best) and self._in_range(rank, amount):
+                        best = rank
+                        break
+        for rank, field, regex in self.regexes:
+            if best is not None and rank >= best:
+                break
+            text = values.get(field)
+            if text and self._in_range(rank, amount) and regex.search(text):
+                best = rank
+                break
+        for rank in self.catch_alls:
+            if best is not None and rank >= best:
+                break
+            if self._in_range(rank, amount):
+                best = rank
+                break
+        return self.targets[best] if best is not None else None
+
+
+class ExpenseCategorizationRule(models.Model):
+    _name = 'expense.categorization.rule'
+    _description = 'Expense Categorization Rule'
+    _order = 'sequence, id'
+
+    _MATCHER_VERSION = 'expense.categorization.rule.matcher'
+
+    # Fields the compiled matcher is built from
+    _MATCHER_FIELDS = {
+        'sequence', 'active', 'company_id', 'match_field', 'match_type', 'pattern',
+        'amount_min', 'amount_max', 'category_id', 'budget_id',
+    }
+
+    name = fields.Char(string='Rule', required=True)
+    sequence = fields.Integer(string='Sequence', default=10)
+    active = fields.Boolean(string='Active', default=True)
+    company_id = fields.Many2one('res.company', string='Company', default=lambda self: self.env.company)
+    match_field = fields.Selection([
+        ('vendor', 'Vendor'),
+        ('title', 'Title'),
+        ('description', 'Description'),
+    ], string='Match On', default='title', required=True)
+    match_type = fields.Selection([
+        ('keyword', 'Keyword'),
+        ('regex', 'Regular Expression'),
+    ], string='Match Type', default='keyword', required=True)
+    pattern = fields.Char(string='Pattern',
+                          help="Keyword (whole words, case insensitive) or regular expression. "
+                               "Leave empty to match on the amount range only.")
+    amount_min = fields.Float(string='Minimum Amount', help="0 for no minimum")
+    amount_max = fields.Float(string='Maximum Amount', help="0 for no maximum")
+    category_id = fields.Many2one('expense.category', string='Category', required=True, ondelete='cascade')
+    budget_id = fields.Many2one('expense.budget', string='Budget', ondelete='set null',
+                                help="Budget assigned along with the category, if any")
+
+    @api.constrains('match_type', 'pattern')
+    def _check_pattern(self):
+        for rule in self:
+            if rule.match_type == 'regex' and rule.pattern:
+                try:
+                    re.compile(rule.pattern)
+                except re.error as e:
+                    raise ValidationError(_("Invalid regular expression in rule %s: %s") % (rule.name, e))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        rules = super().create(vals_list)
+        rules._bump_matcher_version()
+        return rules
+
+    def write(self, vals):
+        if self._MATCHER_FIELDS & vals.keys():
+            self._bump_matcher_version([vals['company_id']] if 'company_id' in vals else [])
+        return super().write(vals)
+
+    def unlink(self):
+        self._bump_matcher_version()
+        return super().unlink()
+
+    def _bump_matcher_version(self, company_ids=()):
+        """Invalidate the compiled matcher of the rules' companies (and ``company_ids``)"""
+        company_ids = set(company_ids) | {rule.company_id.id for rule in self}
+        if company_ids:
+            self.env['expense.data.version'].bump(self._MATCHER_VERSION, company_ids)
+
+    @api.model
+    def _get_matcher(self, company_id):
+        """Return the compiled rules of the company.
+
+        Kept in the worker's ormcache under the version of the company's
+        rules, and under that of its budgets, which rules point to.
+        """
+        DataVersion = self.env['expense.data.version']
+        version = (
+            DataVersion.get_version(self._MATCHER_VERSION, company_id),
+            DataVersion.get_version(self.env['expense.budget']._ACTIVE_INDEX_VERSION, company_id),
+        )
+        return self._build_matcher(company_id, version)
+
+    @api.model
+    @tools.ormcache('company_id', 'version')
+    def _build_matcher(self, company_id, version):
+        rules = self.sudo().search_read([
+            ('company_id', 'in', [company_id, False]),
+        ], ['match_field', 'match_type', 'pattern', 'amount_min', 'amount_max', 'category_id', 'budget_id'],
+            load=False)
+        return CategorizationMatcher(rules)
+
+    @api.model
+    def categorize(self, values_list, company_id=None):
+        """Return ``(category_id, budget_id)`` or None for each dict of ``values_list``"""
+        matcher = self._get_matcher(company_id or self.env.company.id)
+        return [matcher.match(values) for values in values_list]
+
+
+class Expense(models.Model):
+    _inherit = 'expense.tracker'
+
+    def _get_categorization_values(self):
+        return [{
+            'title': expense.title,
+            'description': expense.description,
+            'vendor': expense.partner_id.name,
+            'amount': expense.amount,
+        } for expense in self]
+
+    def action_recategorize(self):
+        """Apply the categorization rules, with one write per resulting category and budget"""
+        Rule = self.env['expense.categorization.rule']
+        Budget = self.env['expense.budget']
+        by_company = defaultdict(list)
+        for expense in self:
+            by_company[expense.company_id.id].append(expense.id)
+
+        to_write = defaultdict(list)
+        for company_id, expense_ids in by_company.items():
+            expenses = self.browse(expense_ids)
+            targets = Rule.categorize(expenses._get_categorization_values(), company_id)
+            budget_index = Budget._get_active_budget_index(company_id)
+            for expense, target in zip(expenses, targets):
+                if not target:
+                    continue
+                category_id, budget_id = target
+                if not budget_id:
+                    # the budget follows the category, as on import
+                    budget_id = expense.budget_id.id if category_id == expense.category_id.id else \
+                        Budget._find_active_budget(budget_index, category_id, expense.date)
+                if not budget_id:
+                    # the budget is required: leave the expense in a category it can be budgeted in
+                    continue
+                if (category_id, budget_id) != (expense.category_id.id, expense.budget_id.id):
+                    to_write[category_id, budget_id].append(expense.id)
+
+        for (category_id, budget_id), expense_ids in to_write.items():
+            self.browse(expense_ids).write({'category_id': category_id, 'budget_id': budget_id})
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Re-categorization'),
+                'message': _('%(count)d of %(total)d expenses re-categorized',
+                             count=sum(len(ids) for ids in to_write.values()), total=len(self)),
+                'type': 'success',
+                'sticky': False,
+            },
+        }
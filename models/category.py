@@ -1,17 +1,25 @@
-from odoo import models, fields, api
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import ValidationError
 
 
 class ExpenseCategory(models.Model):
     _name = 'expense.category'
     _description = 'Expense Category'
     _order = 'name'
+    _parent_name = 'parent_id'
+    _parent_store = True
 
     name = fields.Char(string='Name', required=True, translate=True)
     code = fields.Char(string='Code')
     description = fields.Text(string='Description')
-    parent_id = fields.Many2one('expense.category', string='Parent Category')
+    parent_id = fields.Many2one('expense.category', string='Parent Category', index=True)
+    parent_path = fields.Char(index=True, unaccent=False)
     child_ids = fields.One2many('expense.category', 'parent_id', string='Subcategories')
     color = fields.Integer(string='Color Index')
+    approver_id = fields.Many2one('res.users', string='Approver',
+                                  help="Reviews the submitted expenses of this category and of its subcategories "
+                                       "without an approver of their own. Without any, expenses go to the "
+                                       "shared queue of the expense managers.")
 
     # Budget settings
     has_budget = fields.Boolean(string='Has Budget Control')
@@ -20,6 +28,111 @@ class ExpenseCategory(models.Model):
     # Accounting integration
     account_id = fields.Many2one('account.account', string='Expense Account')
 
+    # Subtree rollups
+    subtree_spent_amount = fields.Float(string='Spent (incl. Subcategories)', compute='_compute_subtree_totals')
+    subtree_budget_amount = fields.Float(string='Budget (incl. Subcategories)', compute='_compute_subtree_totals')
+
     _sql_constraints = [
         ('name_unique', 'UNIQUE(name)', 'Category name must be unique.'),
-    ]
\ No newline at end of file
+    ]
+
+    def init(self):
+        # Pattern-ops index so subtree lookups by parent_path prefix are range scans
+        tools.create_index(self._cr, 'expense_category_parent_path_pattern_index',
+                           self._table, ['parent_path text_pattern_ops'])
+
+    @api.constrains('parent_id')
+    def _check_category_recursion(self):
+        if not self._check_recursion():
+            raise ValidationError(_('You cannot create recursive categories.'))
+
+    def _get_approvers(self):
+        """Map each category to the approver of its nearest ancestor having one (False if none)"""
+        paths = {category.id: [int(node) for node in category.parent_path.split('/')[:-1]]
+                 for category in self.filtered('parent_path')}
+        ancestors = self.browse({node for path in paths.values() for node in path})
+        approvers = {category.id: category.approver_id.id for category in ancestors}
+        return {
+            category_id: next((approvers[node] for node in reversed(path) if approvers[node]), False)
+            for category_id, path in paths.items()
+        }
+
+    def _compute_subtree_totals(self):
+        totals = self.filtered('id').get_subtree_totals()
+        for category in self:
+            category_totals = totals.get(category.id, {})
+            category.subtree_spent_amount = category_totals.get('spent_amount', 0.0)
+            category.subtree_budget_amount = category_totals.get('budget_amount', 0.0)
+
+    def get_subtree_totals(self):
+        """Return spend and budget totals of each category including its subcategories.
+
+        - ``spent_amount``: approved and paid expenses, archived ones included;
+        - ``budget_amount``: amount of the budgets;
+        - ``budget_spent_amount``: amount spent against those budgets.
+
+        Only the expenses and budgets the user can read in the current
+        companies are counted: the record rules are applied to each source
+        as for a search. The whole subtree of every category in ``self`` is
+        resolved through the indexed ``parent_path`` prefix, so the rollup
+        costs one query whatever the depth or size of the tree.
+        """
+        if not self:
+            return {}
+        company_ids = self.env.companies.ids
+        spent_domain = [('state', 'in', ('approved', 'paid')), ('company_id', 'in', company_ids)]
+        expenses = self.env['expense.tracker']._search(spent_domain).subselect(
+            '"expense_tracker"."category_id"', '"expense_tracker"."amount"')
+        archived = self.env['expense.archive.rollup']._search(spent_domain).subselect(
+            '"expense_archive_rollup"."category_id"', '"expense_archive_rollup"."amount"')
+        budgets = self.env['expense.budget']._search(
+            ['|', ('company_id', '=', False), ('company_id', 'in', company_ids)]).subselect()
+
+        self.flush_model(['parent_path'])
+        self.env['expense.tracker'].flush_model(['amount', 'state', 'category_id', 'company_id'])
+        self.env['expense.budget'].flush_model(['amount', 'category_id', 'company_id', 'spent_folded'])
+        self.env['expense.budget.ledger'].flush_model()
+        self.env['expense.archive.rollup'].flush_model()
+        self.env.cr.execute("""
+            WITH subtree AS (
+                SELECT root.id AS root_id, node.id AS category_id
+                  FROM expense_category root
+                  JOIN expense_category node ON node.parent_path ~>=~ root.parent_path
+                                              AND node.parent_path ~<~ root.parent_path || '~'
+                 WHERE root.id IN %s
+            ), spent AS (
+                SELECT s.root_id, SUM(e.amount) AS amount
+                  FROM subtree s
+                  JOIN ({expenses} UNION ALL {archived}) e(category_id, amount) ON e.category_id = s.category_id
+              GROUP BY s.root_id
+            ), visible_budget AS (
+                {budgets}
+            ), pending AS (
+                SELECT budget_id, SUM(amount) AS amount
+                  FROM expense_budget_ledger
+                 WHERE budget_id IN (SELECT id FROM visible_budget)
+              GROUP BY budget_id
+            ), budget AS (
+                SELECT s.root_id, SUM(b.amount) AS amount,
+                       SUM(COALESCE(b.spent_folded, 0.0) + COALESCE(pending.amount, 0.0)) AS spent
+                  FROM subtree s
+                  JOIN expense_budget b ON b.category_id = s.category_id
+             LEFT JOIN pending ON pending.budget_id = b.id
+                 WHERE b.id IN (SELECT id FROM visible_budget)
+              GROUP BY s.root_id
+            )
+            SELECT c.id, COALESCE(spent.amount, 0.0), COALESCE(budget.amount, 0.0), COALESCE(budget.spent, 0.0)
+              FROM expense_category c
+         LEFT JOIN spent ON spent.root_id = c.id
+         LEFT JOIN budget ON budget.root_id = c.id
+             WHERE c.id IN %s
+        """.format(expenses=expenses[0], archived=archived[0], budgets=budgets[0]),
+            [tuple(self.ids)] + expenses[1] + archived[1] + budgets[1] + [tuple(self.ids)])
+        return {
+            category_id: {
+                'spent_amount': spent_amount,
+                'budget_amount': budget_amount,
+                'budget_spent_amount': budget_spent_amount,
+            }
+            for category_id, spent_amount, budget_amount, budget_spent_amount in self.env.cr.fetchall()
+        }
@@ -0,0 +1,218 @@
+from odoo import models, fields, api
+from collections import defaultdict
+from dateutil.relativedelta import relativedelta
+
+from .instrumentation import instrumented
+
+
+DASHBOARD_CHANNEL = 'expense_tracker_dashboard'
+DASHBOARD_BUDGET_CHANNEL = 'expense_tracker_dashboard_budget'
+DASHBOARD_DELTA = 'expense_tracker/dashboard_delta'
+DELTAS_KEY = 'expense_tracker.dashboard_deltas'
+
+
+def _new_delta():
+    return {
+        'categoryChart': defaultdict(float),
+        'trendChart': defaultdict(float),
+        'totals': defaultdict(float),
+    }
+
+
+class IrWebsocket(models.AbstractModel):
+    _inherit = 'ir.websocket'
+
+    def _build_bus_channel_list(self, channels):
+        # Expense managers see every expense: they follow the deltas of their
+        # whole companies. Other users get the deltas of their own expenses and
+        # approval queue on their partner channel, and follow the budget totals
+        # of their companies, which are not restricted per user.
+        channels = super()._build_bus_channel_list(channels)
+        user = self.env.user
+        if user:
+            channel = DASHBOARD_CHANNEL if user.has_group('expense_tracker_advanced.group_expense_manager') \
+                else DASHBOARD_BUDGET_CHANNEL
+            channels = list(channels) + [(company, channel) for company in user.company_ids]
+        return channels
+
+
+class Expense(models.Model):
+    _inherit = 'expense.tracker'
+
+    _DASHBOARD_FIELDS = {
+        'amount', 'currency_id', 'state', 'date', 'category_id', 'company_id', 'user_id', 'approver_id',
+    }
+
+    @api.model
+    @instrumented
+    def get_chart_data(self, options=None):
+        """Initial series of the dashboard charts; later changes arrive as bus deltas"""
+        company_ids = tuple(self.env.companies.ids)
+        first_month = fields.Date.start_of(fields.Date.today(), 'month') - relativedelta(months=11)
+        self.flush_model(['amount', 'state', 'date', 'company_id'])
+        self.env['expense.archive.rollup'].flush_model()
+        self.env.cr.execute("""
+            SELECT month, SUM(amount)
+              FROM (
+                    SELECT to_char(date, 'YYYY-MM') AS month, amount
+                      FROM expense_tracker
+                     WHERE state IN ('approved', 'paid') AND date >= %(first_month)s
+                       AND company_id IN %(company_ids)s
+                 UNION ALL
+                    SELECT to_char(period, 'YYYY-MM'), amount
+                      FROM expense_archive_rollup
+                     WHERE state IN ('approved', 'paid') AND period >= %(first_month)s
+                       AND company_id IN %(company_ids)s
+              ) spend
+          GROUP BY month
+          ORDER BY month
+        """, {'first_month': first_month, 'company_ids': company_ids})
+        trend = self.env.cr.fetchall()
+
+        categories = self.env['expense.tracker.dashboard'].get_category_chart_data()
+        return {
+            'categoryChart': categories,
+            'trendChart': {
+                'ordered': True,
+                'keys': [month for month, amount in trend],
+                'labels': [month for month, amount in trend],
+                'values': [amount for month, amount in trend],
+            },
+        }
+
+    def _get_dashboard_contributions(self):
+        """What each expense adds to the dashboard series, as plain tuples"""
+        return [(
+            expense.company_id.id,
+            expense.user_id.id,
+            expense.approver_id.id,
+            int(expense.category_id.parent_path.split('/')[0]) if expense.category_id.parent_path
+            else expense.category_id.id,
+            expense.date and expense.date.strftime('%Y-%m'),
+            expense.date and fields.Date.start_of(expense.date, 'month'),
+            expense.amount,
+            expense.amount_company_currency,
+            expense.state,
+        ) for expense in self]
+
+    @api.model
+    def _get_dashboard_deltas(self):
+        data = self.env.cr.precommit.data
+        if DELTAS_KEY not in data:
+            data[DELTAS_KEY] = defaultdict(_new_delta)
+            self.env.cr.precommit.add(self._publish_dashboard_deltas)
+        return data[DELTAS_KEY]
+
+    @api.model
+    def _add_dashboard_deltas(self, contributions, sign):
+        if not contributions:
+            return
+        deltas = self._get_dashboard_deltas()
+        current_month = fields.Date.start_of(fields.Date.today(), 'month')
+        for company_id, user_id, approver_id, category_id, month, month_start, amount, company_amount, state \
+                in contributions:
+            # the company's dashboard and the expense owner's own dashboard
+            for delta in (deltas['company', company_id], deltas['user', user_id]):
+                delta['totals']['total_expenses'] += sign * company_amount
+                if month_start == current_month:
+                    delta['totals']['monthly_expenses'] += sign * company_amount
+                if state in ('approved', 'paid'):
+                    delta['categoryChart'][category_id] += sign * amount
+                    if month:
+                        delta['trendChart'][month] += sign * amount
+            if state == 'submitted':
+                deltas['company', company_id]['totals']['pending_approval'] += sign
+                if approver_id:
+                    deltas['user', approver_id]['totals']['pending_approval'] += sign
+
+    @api.model
+    def _get_delta_target(self, scope, res_id):
+        """Bus channel of the dashboards a delta of ``scope`` applies to, or None.
+
+        Company deltas go to the expense managers, budget deltas to the other
+        users of the company, and user deltas to the user unless they manage
+        expenses, as their dashboard is then computed from the whole company.
+        """
+        if not res_id:
+            return None
+        if scope == 'company':
+            return (self.env['res.company'].browse(res_id), DASHBOARD_CHANNEL)
+        if scope == 'budget':
+            return (self.env['res.company'].browse(res_id), DASHBOARD_BUDGET_CHANNEL)
+        user = self.env['res.users'].sudo().browse(res_id)
+        if not user or user.has_group('expense_tracker_advanced.group_expense_manager'):
+            return None
+        return user.partner_id
+
+    @api.model
+    def _publish_dashboard_deltas(self):
+        deltas = self.env.cr.precommit.data.pop(DELTAS_KEY, {})
+        notifications = []
+        for (scope, res_id), delta in deltas.items():
+            payload = {
+                series: {key: value for key, value in values.items() if value}
+                for series, values in delta.items()
+            }
+            if not any(payload.values()):
+                continue
+            target = self._get_delta_target(scope, res_id)
+            if target is None:
+                continue
+            category_ids = [key for key in payload['categoryChart']]
+            payload['labels'] = {
+                category.id: category.name
+                for category in self.env['expense.category'].sudo().browse(category_ids)
+            }
+            notifications.append([target, DASHBOARD_DELTA, payload])
+        if notifications:
+            self.env['bus.bus']._sendmany(notifications)
+            self.env.flush_all()
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        expenses = super().create(vals_list)
+        if not self.env.context.get('expense_archiving'):
+            self._add_dashboard_deltas(expenses._get_dashboard_contributions(), 1)
+        return expenses
+
+    def write(self, vals):
+        if self.env.context.get('expense_archiving') or not self._DASHBOARD_FIELDS & vals.keys():
+            return super().write(vals)
+        before = self._get_dashboard_contributions()
+        res = super().write(vals)
+        self._add_dashboard_deltas(before, -1)
+        self._add_dashboard_deltas(self._get_dashboard_contributions(), 1)
+        return res
+
+    def unlink(self):
+        if not self.env.context.get('expense_archiving'):
+            self._add_dashboard_deltas(self._get_dashboard_contributions(), -1)
+        return super().unlink()
+
+
+class ExpenseBudget(models.Model):
+    _inherit = 'expense.budget'
+
+    def _add_dashboard_deltas(self, sign):
+        deltas = self.env['expense.tracker']._get_dashboard_deltas()
+        for budget in self:
+            for scope in ('company', 'budget'):
+                deltas[scope, budget.company_id.id]['totals']['total_budget'] += sign * budget.amount
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        budgets = super().create(vals_list)
+        budgets._add_dashboard_deltas(1)
+        return budgets
+
+    def write(self, vals):
+        if not {'amount', 'company_id'} & vals.keys():
+            return super().write(vals)
+        self._add_dashboard_deltas(-1)
+        res = super().write(vals)
+        self._add_dashboard_deltas(1)
+        return res
+
+    def unlink(self):
+        self._add_dashboard_deltas(-1)
+        return super().unlink()
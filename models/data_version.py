@@ -0,0 +1,69 @@
+from odoo import models, fields, api, tools
+
+
+class ExpenseDataVersion(models.Model):
+    _name = 'expense.data.version'
+    _description = 'Expense Cached Data Version'
+    _order = 'id'
+
+    key = fields.Char(string='Cache Key', required=True)
+    company_id = fields.Many2one('res.company', string='Company', ondelete='cascade',
+                                 help="Empty for data shared by all companies")
+    weight = fields.Integer(string='Bumps', required=True, default=1)
+
+    def init(self):
+        tools.create_index(self._cr, 'expense_data_version_key_company_index',
+                           self._table, ['key', 'company_id'])
+
+    @api.model
+    def bump(self, key, company_ids=(False,)):
+        """Move the version of the data cached under ``key`` for the companies.
+
+        A bump is a row appended within the current transaction: it becomes
+        visible to the other workers with the data it stands for, and
+        concurrent bumps never update a shared row.
+        """
+        self.sudo().create([{'key': key, 'company_id': company_id} for company_id in set(company_ids)])
+
+    @api.model
+    def get_version(self, key, company_id=False):
+        """Return the version of the data cached under ``key`` for the company.
+
+        The version counts the committed bumps, which only grows whatever the
+        order they commit in, and ends with the last row id, which is never
+        reused after a rollback: a cache filled within a transaction that is
+        rolled back is never hit afterwards. Bumps without company count for
+        every company.
+        """
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT COALESCE(SUM(weight), 0), COALESCE(MAX(id), 0)
+              FROM expense_data_version
+             WHERE key = %s AND (company_id = %s OR company_id IS NULL)
+        """, [key, company_id or None])
+        return tuple(self.env.cr.fetchone())
+
+    @api.model
+    def _cron_fold_versions(self):
+        """Fold the committed bumps into one row per key and company"""
+        self.flush_model()
+        self.env.cr.execute("""
+            WITH folded AS (
+                DELETE FROM expense_data_version v
+                 USING (
+                        SELECT key, company_id
+                          FROM expense_data_version
+                      GROUP BY key, company_id
+                        HAVING COUNT(*) > 1
+                  ) many
+                 WHERE v.key = many.key AND v.company_id IS NOT DISTINCT FROM many.company_id
+             RETURNING v.key, v.company_id, v.weight
+            )
+            INSERT INTO expense_data_version (key, company_id, weight,
+                                              create_uid, write_uid, create_date, write_date)
+                 SELECT key, company_id, SUM(weight),
+                        %(uid)s, %(uid)s, now() at time zone 'UTC', now() at time zone 'UTC'
+                   FROM folded
+               GROUP BY key, company_id
+        """, {'uid': self.env.uid})
+        self.invalidate_model()
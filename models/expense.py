@@ -1,6 +1,10 @@
-from odoo import models, fields, api, _
-from odoo.exceptions import ValidationError
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import ValidationError, UserError
+from odoo.tools import float_compare
+from collections import defaultdict
 from datetime import datetime, date
+import base64
+from .instrumentation import instrumented
 
 
 class Expense(models.Model):
@@ -10,10 +14,9 @@ class Expense(models.Model):
     _order = 'date desc, id desc'
 
     name = fields.Char(string='Expense Reference', required=True, default=lambda self: _('New'))
-    dashboard_id = fields.Many2one('expense.tracker.dashboard', string='Dashboard')
     title = fields.Char(string='Title', required=True, tracking=True)
     amount = fields.Float(string='Amount', required=True, tracking=True)
-    category_id = fields.Many2one('expense.category', string='Category', required=True, tracking=True)
+    category_id = fields.Many2one('expense.category', string='Category', required=True, tracking=True, index=True)
     date = fields.Date(string='Date', default=fields.Date.today, required=True, tracking=True)
     currency_id = fields.Many2one('res.currency', string='Currency',
                                   default=lambda self: self.env.user.company_id.currency_id)
@@ -23,8 +26,14 @@ class Expense(models.Model):
 
     # Advanced fields
     description = fields.Text(string='Description')
-    receipt = fields.Binary(string='Receipt')
+    receipt = fields.Binary(string='Receipt', attachment=True)
     receipt_filename = fields.Char(string='Receipt Filename')
+    receipt_checksum = fields.Char(string='Receipt Checksum', compute='_compute_receipt_checksum',
+                                   store=True, index=True, copy=False)
+    receipt_thumbnail = fields.Image(string='Receipt Thumbnail', compute='_compute_receipt_thumbnail',
+                                     store=True, attachment=True, copy=False)
+    receipt_url = fields.Char(string='Receipt Link', compute='_compute_receipt_url')
+    receipt_thumbnail_url = fields.Char(string='Receipt Preview', compute='_compute_receipt_url')
     state = fields.Selection([
         ('draft', 'Draft'),
         ('submitted', 'Submitted'),
@@ -33,7 +42,11 @@ class Expense(models.Model):
         ('paid', 'Paid')
     ], string='Status', default='draft', tracking=True)
 
-    user_id = fields.Many2one('res.users', string='User', default=lambda self: self.env.user)
+    user_id = fields.Many2one('res.users', string='User', default=lambda self: self.env.user, index=True)
+    approver_id = fields.Many2one('res.users', string='Approver', readonly=True, copy=False, tracking=True,
+                                  help="Approver whose queue holds the expense once submitted; "
+                                       "empty for the shared queue of the expense managers")
+    submit_date = fields.Datetime(string='Submitted On', readonly=True, copy=False)
     company_id = fields.Many2one('res.company', string='Company',
                                  default=lambda self: self.env.user.company_id)
     partner_id = fields.Many2one('res.partner', string='Vendor')
@@ -55,6 +68,23 @@ class Expense(models.Model):
         ('amount_positive', 'CHECK(amount > 0)', 'Expense amount must be positive.'),
     ]
 
+    def init(self):
+        # Composite indexes matching the module's hot access paths: the default
+        # list order, the company-scoped lists, the budget One2many/spent sums and
+        # the state/date filters used by the search view and the dashboard.
+        for name, expressions in [
+            ('expense_tracker_date_id_index', ['date DESC', 'id DESC']),
+            ('expense_tracker_company_date_id_index', ['company_id', 'date DESC', 'id DESC']),
+            ('expense_tracker_user_date_id_index', ['user_id', 'date DESC', 'id DESC']),
+            ('expense_tracker_budget_state_index', ['budget_id', 'state']),
+            ('expense_tracker_state_date_index', ['state', 'date']),
+            ('expense_tracker_category_state_index', ['category_id', 'state']),
+        ]:
+            tools.create_index(self._cr, name, self._table, expressions)
+        # Approval queues, paged oldest first: only submitted expenses are indexed
+        tools.create_index(self._cr, 'expense_tracker_approval_queue_index', self._table,
+                           ['approver_id', 'submit_date', 'id'], where="state = 'submitted'")
+
     # Fields for dashboard
     total_expenses = fields.Float(compute='_compute_dashboard_fields', string='Total Expenses')
     monthly_expenses = fields.Float(compute='_compute_dashboard_fields', string='Monthly Expenses')
@@ -95,24 +125,108 @@ class Expense(models.Model):
             'budget_utilization': budget_utilization,
         }
 
+    @api.model
+    def _search_keyset(self, domain, keys, after=None, limit=None, descending=False):
+        """Ids of the page of ``domain`` ordered by the ``keys`` columns and
+        following the ``after`` cursor (the keys of the previous page's last row).
+
+        The cursor is compared as a row, ``(key1, key2) > (value1, value2)``,
+        which PostgreSQL resolves by seeking along an index on those columns;
+        the equivalent OR of conditions would be filtered row by row.
+        """
+        direction = 'desc' if descending else 'asc'
+        query = self._search(domain, limit=limit,
+                             order=', '.join('%s %s' % (key, direction) for key in keys))
+        if after:
+            query.add_where('(%s) %s (%s)' % (
+                ', '.join('"%s"."%s"' % (self._table, key) for key in keys),
+                '<' if descending else '>',
+                ', '.join(['%s'] * len(keys)),
+            ), list(after))
+        self.env.cr.execute(*query.select())
+        return [row[0] for row in self.env.cr.fetchall()]
+
     @api.model_create_multi
     def create(self, vals_list):
-        for vals in vals_list:
-            if vals.get('name', _('New')) == _('New'):
-                vals['name'] = self.env['ir.sequence'].next_by_code('expense.tracker') or _('New')
+        vals_list = self.env['expense.payload.validator'].check_payloads(vals_list)
+        to_number = [vals for vals in vals_list if vals.get('name', _('New')) == _('New')]
+        names = self.env['ir.sequence'].next_block_by_code('expense.tracker', len(to_number))
+        for vals, name in zip(to_number, names):
+            vals['name'] = name or _('New')
+        self.env['expense.budget.statistics'].invalidate_statistics()
         return super().create(vals_list)
 
+    def write(self, vals):
+        if {'amount', 'date', 'category_id'} & vals.keys():
+            vals = self.env['expense.payload.validator'].check_payloads([vals])[0]
+        self.env['expense.budget.statistics'].invalidate_statistics()
+        return super().write(vals)
+
+    def unlink(self):
+        self.env['expense.budget.statistics'].invalidate_statistics()
+        return super().unlink()
+
     @api.depends('amount', 'currency_id', 'company_id.currency_id')
+    @instrumented
     def _compute_company_currency(self):
         for record in self:
-            if record.currency_id and record.company_id.currency_id:
-                if record.currency_id == record.company_id.currency_id:
-                    record.amount_company_currency = record.amount
-                else:
-                    # In a real implementation, you would use the exchange rate
-                    record.amount_company_currency = record.amount
-            else:
-                record.amount_company_currency = record.amount
+            record.amount_company_currency = self._to_company_currency(
+                record.amount, record.currency_id, record.company_id)
+
+    @api.model
+    def _to_company_currency(self, amount, currency, company):
+        """Convert ``amount`` from ``currency`` to the currency of ``company``"""
+        if currency and company.currency_id and currency != company.currency_id:
+            # In a real implementation, you would use the exchange rate
+            return amount
+        return amount
+
+    def _get_receipt_attachments(self):
+        """Map expense ids to their receipt attachment, fetched in one search"""
+        attachments = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', 'receipt'),
+            ('res_id', 'in', self.filtered('id').ids),
+        ])
+        return {attachment.res_id: attachment for attachment in attachments}
+
+    @api.depends('receipt')
+    def _compute_receipt_checksum(self):
+        # The filestore is content-addressed by this checksum, so identical
+        # receipts attached to several expenses are stored on disk only once.
+        attachments = self._get_receipt_attachments()
+        for record in self:
+            attachment = attachments.get(record.id)
+            record.receipt_checksum = attachment.checksum if attachment else False
+
+    @api.depends('receipt')
+    def _compute_receipt_thumbnail(self):
+        attachments = self._get_receipt_attachments()
+        for record in self:
+            attachment = attachments.get(record.id)
+            thumbnail = False
+            if attachment and attachment.mimetype and attachment.mimetype.startswith('image/'):
+                try:
+                    thumbnail = base64.b64encode(tools.image_process(attachment.raw, size=(256, 256)))
+                except UserError:
+                    thumbnail = False
+            record.receipt_thumbnail = thumbnail
+
+    @api.depends('receipt_checksum', 'receipt_thumbnail')
+    def _compute_receipt_url(self):
+        for record in self:
+            expense = record._origin
+            record.receipt_url = expense.receipt_checksum and expense._get_receipt_url()
+            record.receipt_thumbnail_url = expense.receipt_thumbnail and expense._get_receipt_url(thumbnail=True)
+
+    def _get_receipt_url(self, thumbnail=False):
+        self.ensure_one()
+        url = '/expense_tracker/receipt/%s' % self.id
+        if thumbnail:
+            url += '/thumbnail'
+        if self.receipt_checksum:
+            url += '?unique=%s' % self.receipt_checksum
+        return url
 
     @api.depends('amount', 'budget_id.amount')
     def _compute_budget_percentage(self):
@@ -122,25 +236,96 @@ class Expense(models.Model):
             else:
                 record.budget_percentage = 0.0
 
+    def _check_budget_enforcement(self, approving=False):
+        """Check the spend of the expenses against their enforced budgets.
+
+        The whole batch is checked at once, against the available amounts of
+        its budgets read in a single query. When approving, those budgets stay
+        locked until the end of the transaction.
+
+        :return: {budget: overrun amount} of the budgets overrun but not blocked
+        """
+        spend = defaultdict(float)
+        for expense in self:
+            if expense.budget_id and expense.state not in ('approved', 'paid'):
+                spend[expense.budget_id.id] += expense.amount
+        available = self.env['expense.budget']._get_available_amounts(list(spend), lock=approving)
+        overruns = {
+            budget_id: (mode, spend[budget_id] - amount)
+            for budget_id, (mode, amount) in available.items()
+            if float_compare(spend[budget_id], amount, precision_digits=2) > 0
+        }
+        if not overruns:
+            return {}
+
+        Budget = self.env['expense.budget']
+        currency = self.env.company.currency_id
+        is_manager = self.env.user.has_group('expense_tracker_advanced.group_expense_manager')
+        blocked = []
+        for budget_id, (mode, overrun) in overruns.items():
+            if mode == 'block':
+                reason = _('%s over the available amount', tools.format_amount(self.env, overrun, currency))
+            elif mode == 'approval' and approving and not is_manager:
+                reason = _('%s over the available amount, requires the approval of an expense manager',
+                           tools.format_amount(self.env, overrun, currency))
+            else:
+                continue
+            blocked.append('%s: %s' % (Budget.browse(budget_id).display_name, reason))
+        if blocked:
+            raise UserError(_("These expenses would overrun their budget:\n%s") % '\n'.join(blocked))
+        return {Budget.browse(budget_id): overrun for budget_id, (mode, overrun) in overruns.items()}
+
+    def _get_budget_overrun_notification(self, overruns):
+        currency = self.env.company.currency_id
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Budget exceeded'),
+                'message': ', '.join(
+                    '%s (%s)' % (budget.display_name, tools.format_amount(self.env, overrun, currency))
+                    for budget, overrun in overruns.items()
+                ),
+                'type': 'warning',
+                'sticky': False,
+            },
+        }
+
     def action_submit(self):
-        self.write({'state': 'submitted'})
-        self.message_post(body=_('Expense submitted for approval'))
+        overruns = self._check_budget_enforcement()
+        submit_date = fields.Datetime.now()
+        for approver_id, expenses in self._group_by_approver().items():
+            expenses.write({'state': 'submitted', 'approver_id': approver_id, 'submit_date': submit_date})
+        self._message_log_batch(bodies=dict.fromkeys(self.ids, _('Expense submitted for approval')))
+        if overruns:
+            return self._get_budget_overrun_notification(overruns)
 
     def action_approve(self):
+        overruns = self._check_budget_enforcement(approving=True)
         self.write({'state': 'approved'})
-        self.message_post(body=_('Expense approved'))
+        currency = self.env.company.currency_id
+        bodies = dict.fromkeys(self.ids, _('Expense approved'))
+        for expense in self.filtered(lambda expense: expense.budget_id in overruns):
+            bodies[expense.id] = _(
+                'Expense approved over budget %(budget)s, exceeded by %(amount)s',
+                budget=expense.budget_id.display_name,
+                amount=tools.format_amount(self.env, overruns[expense.budget_id], currency),
+            )
+        self._message_log_batch(bodies=bodies)
+        if overruns:
+            return self._get_budget_overrun_notification(overruns)
 
     def action_reject(self):
         self.write({'state': 'rejected'})
-        self.message_post(body=_('Expense rejected'))
+        self._message_log_batch(bodies=dict.fromkeys(self.ids, _('Expense rejected')))
 
     def action_mark_paid(self):
         self.write({'state': 'paid'})
-        self.message_post(body=_('Expense marked as paid'))
+        self._message_log_batch(bodies=dict.fromkeys(self.ids, _('Expense marked as paid')))
 
     def action_reset_to_draft(self):
         self.write({'state': 'draft'})
-        self.message_post(body=_('Expense reset to draft'))
+        self._message_log_batch(bodies=dict.fromkeys(self.ids, _('Expense reset to draft')))
 
     def action_create_invoice(self):
         # Create a vendor bill from expense
@@ -171,6 +356,6 @@ class Expense(models.Model):
 
     @api.constrains('date')
     def _check_date(self):
-        for record in self:
-            if record.date > date.today():
-                raise ValidationError(_('Expense date cannot be in the future.'))
\ No newline at end of file
+        today = fields.Date.context_today(self)
+        if any(record.date and record.date > today for record in self):
+            raise ValidationError(_('Expense date cannot be in the future.'))
\ No newline at end of file
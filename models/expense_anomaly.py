@@ -0,0 +1,247 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+import logging
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_logger = logging.getLogger(__name__)
+
+SCAN_CHUNK_SIZE = 100000
+INSERT_CHUNK_SIZE = 10000
+
+
+def _rolling_stats(groups, values, window, include_current=False):
+    """Count, sum and sum of squares of the ``window`` values preceding each
+    position within its group (the position itself too with
+    ``include_current``). ``groups`` must be sorted, and ``values`` ordered
+    within each group.
+    """
+    size = len(values)
+    index = np.arange(size)
+    starts = np.r_[0, np.flatnonzero(groups[1:] != groups[:-1]) + 1]
+    group_start = np.repeat(starts, np.diff(np.r_[starts, size]))
+    end = index + 1 if include_current else index
+    begin = np.maximum(group_start, end - window)
+    sums = np.r_[0.0, np.cumsum(values)]
+    squares = np.r_[0.0, np.cumsum(values * values)]
+    return end - begin, sums[end] - sums[begin], squares[end] - squares[begin]
+
+
+def _rolling_zscores(groups, values, window, min_history, min_std):
+    """z-score of each value against the preceding ``window`` values of its group.
+
+    :return: tuple ``(zscores, means)``; positions with less than
+             ``min_history`` preceding values get a zero z-score
+    """
+    count, total, squares = _rolling_stats(groups, values, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+        std = np.sqrt(np.maximum(squares / count - mean * mean, 0.0))
+        zscores = (values - mean) / np.maximum(std, min_std)
+    zscores[count < min_history] = 0.0
+    return zscores, mean
+
+
+class ExpenseAnomaly(models.Model):
+    _name = 'expense.anomaly'
+    _description = 'Expense Anomaly'
+    _order = 'score desc, id desc'
+
+    # Rolling statistics: number of past expenses (or spending days) compared to
+    _WINDOW = 60
+    _MIN_HISTORY = 20
+    # Amounts are compared in log space; the floor avoids flagging small
+    # deviations from a history of near identical amounts
+    _MIN_LOG_STD = 0.25
+    _AMOUNT_ZSCORE = 5.0
+    _SPIKE_ZSCORE = 5.0
+    # Round amounts: multiples of _ROUND_UNIT, flagged when their share among
+    # the user's last _ROUND_WINDOW expenses is unlikely given the global share
+    _ROUND_UNIT = 100.0
+    _ROUND_WINDOW = 20
+    _ROUND_MIN_COUNT = 5
+    _ROUND_ZSCORE = 3.0
+
+    expense_id = fields.Many2one('expense.tracker', string='Expense', required=True, readonly=True,
+                                 index=True, ondelete='cascade')
+    anomaly_type = fields.Selection([
+        ('amount', 'Unusual Amount'),
+        ('spike', 'Daily Spend Spike'),
+        ('round', 'Round Amount Cluster'),
+    ], string='Anomaly', required=True, readonly=True)
+    score = fields.Float(string='Score', digits=(16, 2), readonly=True, group_operator='max')
+    detail = fields.Char(string='Detail', readonly=True)
+    state = fields.Selection([
+        ('new', 'To Review'),
+        ('reviewed', 'Reviewed'),
+        ('dismissed', 'Dismissed'),
+    ], string='Status', default='new', required=True)
+
+    # Copied from the expense when flagged, for filtering and grouping
+    user_id = fields.Many2one('res.users', string='User', readonly=True)
+    category_id = fields.Many2one('expense.category', string='Category', readonly=True)
+    date = fields.Date(string='Date', readonly=True)
+    amount = fields.Float(string='Amount', readonly=True)
+
+    _sql_constraints = [
+        ('expense_type_unique', 'UNIQUE(expense_id, anomaly_type)', 'An expense is flagged once per anomaly type.'),
+    ]
+
+    def action_mark_reviewed(self):
+        self.write({'state': 'reviewed'})
+
+    def action_dismiss(self):
+        self.write({'state': 'dismissed'})
+
+    @api.model
+    def _cron_detect_anomalies(self):
+        if np is None:
+            _logger.warning("numpy is not installed, expense anomaly detection is skipped")
+            return
+        self.detect_anomalies()
+
+    @api.model
+    def detect_anomalies(self):
+        """Scan the submitted, approved and paid expenses and flag the anomalies.
+
+        The columns are fetched in bulk through a server-side cursor, and the
+        statistics are computed in vectorized passes over them. Flags still to
+        review are replaced; reviewed and dismissed ones are kept.
+
+        :return: number of flags
+        """
+        if np is None:
+            raise UserError(_("Anomaly detection requires the numpy Python library."))
+        ids, users, categories, days, amounts = self._fetch_columns()
+        flags = []
+        if len(ids):
+            flags += self._detect_amount_anomalies(ids, users, categories, days, amounts)
+            flags += self._detect_spend_spikes(ids, users, days, amounts)
+            flags += self._detect_round_clusters(ids, users, days, amounts)
+        self._store_flags(flags)
+        return len(flags)
+
+    @api.model
+    def _fetch_columns(self):
+        """Return the ids, users, categories, days (since epoch) and amounts of
+        the expenses as arrays, ordered by user, category, date and id"""
+        self.env['expense.tracker'].flush_model(['user_id', 'category_id', 'date', 'amount', 'state'])
+        cursor = self.env.cr._cnx.cursor('expense_anomaly_scan')
+        chunks = []
+        try:
+            cursor.itersize = SCAN_CHUNK_SIZE
+            cursor.execute("""
+                SELECT id, COALESCE(user_id, 0), COALESCE(category_id, 0),
+                       date - DATE '1970-01-01', amount
+                  FROM expense_tracker
+                 WHERE state IN ('submitted', 'approved', 'paid') AND amount > 0 AND date IS NOT NULL
+              ORDER BY user_id, category_id, date, id
+            """)
+            while True:
+                rows = cursor.fetchmany(SCAN_CHUNK_SIZE)
+                if not rows:
+                    break
+                chunks.append(np.array(rows, dtype=np.float64))
+        finally:
+            cursor.close()
+        columns = np.concatenate(chunks) if chunks else np.empty((0, 5))
+        return (columns[:, 0].astype(np.int64), columns[:, 1].astype(np.int64),
+                columns[:, 2].astype(np.int64), columns[:, 3].astype(np.int64), columns[:, 4])
+
+    @api.model
+    def _detect_amount_anomalies(self, ids, users, categories, days, amounts):
+        """Amounts far from the user's usual amounts in the category, or from the
+        category's usual amounts when the user has too little history there"""
+        logs = np.log(amounts)
+        # rows come ordered by user, category, date and id
+        user_keys = users * (categories.max() + 1) + categories
+        user_z, user_mean = _rolling_zscores(
+            user_keys, logs, self._WINDOW, self._MIN_HISTORY, self._MIN_LOG_STD)
+
+        order = np.lexsort((ids, days, categories))
+        category_z = np.empty_like(logs)
+        category_mean = np.empty_like(logs)
+        category_z[order], category_mean[order] = _rolling_zscores(
+            categories[order], logs[order], self._WINDOW, self._MIN_HISTORY, self._MIN_LOG_STD)
+
+        use_user = user_z != 0.0
+        zscores = np.where(use_user, user_z, category_z)
+        typical = np.exp(np.where(use_user, user_mean, category_mean))
+        flagged = np.flatnonzero(np.abs(zscores) >= self._AMOUNT_ZSCORE)
+        return [(
+            int(ids[index]), 'amount', float(abs(zscores[index])),
+            _("%(amount).2f against a typical %(typical).2f",
+              amount=amounts[index], typical=typical[index]),
+        ) for index in flagged]
+
+    @api.model
+    def _detect_spend_spikes(self, ids, users, days, amounts):
+        """Days on which the total spend of a user jumps far above their usual daily spend"""
+        order = np.lexsort((days, users))
+        users, days, amounts, ids = users[order], days[order], amounts[order], ids[order]
+        new_day = np.r_[True, (users[1:] != users[:-1]) | (days[1:] != days[:-1])]
+        day_starts = np.flatnonzero(new_day)
+        day_totals = np.add.reduceat(amounts, day_starts)
+        day_users = users[day_starts]
+
+        logs = np.log(day_totals)
+        zscores, mean = _rolling_zscores(day_users, logs, self._WINDOW, self._MIN_HISTORY, self._MIN_LOG_STD)
+        day_of_expense = np.cumsum(new_day) - 1
+        flagged = np.flatnonzero(zscores[day_of_expense] >= self._SPIKE_ZSCORE)
+        return [(
+            int(ids[index]), 'spike', float(zscores[day_of_expense[index]]),
+            _("Daily spend %(total).2f against a typical %(typical).2f",
+              total=day_totals[day_of_expense[index]], typical=np.exp(mean[day_of_expense[index]])),
+        ) for index in flagged]
+
+    @api.model
+    def _detect_round_clusters(self, ids, users, days, amounts):
+        """Round amounts that pile up among the recent expenses of a user"""
+        order = np.lexsort((ids, days, users))
+        users, amounts, ids = users[order], amounts[order], ids[order]
+        is_round = (np.mod(amounts, self._ROUND_UNIT) == 0).astype(np.float64)
+        share = is_round.mean()
+        if share in (0.0, 1.0):
+            return []
+        count, rounds, squares = _rolling_stats(users, is_round, self._ROUND_WINDOW, include_current=True)
+        expected = count * share
+        zscores = (rounds - expected) / np.sqrt(expected * (1 - share))
+        flagged = np.flatnonzero(
+            (is_round == 1.0) & (count >= self._ROUND_WINDOW // 2) & (rounds >= self._ROUND_MIN_COUNT)
+            & (zscores >= self._ROUND_ZSCORE))
+        return [(
+            int(ids[index]), 'round', float(zscores[index]),
+            _("%(rounds)d round amounts in the last %(count)d expenses",
+              rounds=rounds[index], count=count[index]),
+        ) for index in flagged]
+
+    @api.model
+    def _store_flags(self, flags):
+        """Replace the flags to review by ``flags`` ((expense id, type, score, detail) tuples)"""
+        self.flush_model()
+        cr = self.env.cr
+        cr.execute("DELETE FROM expense_anomaly WHERE state = 'new'")
+        for start in range(0, len(flags), INSERT_CHUNK_SIZE):
+            chunk = flags[start:start + INSERT_CHUNK_SIZE]
+            cr.execute("""
+                INSERT INTO expense_anomaly (expense_id, anomaly_type, score, detail, state,
+                                             user_id, category_id, date, amount,
+                                             create_uid, write_uid, create_date, write_date)
+                SELECT flag.expense_id, flag.anomaly_type, flag.score, flag.detail, 'new',
+                       e.user_id, e.category_id, e.date, e.amount,
+                       %(uid)s, %(uid)s, now() at time zone 'UTC', now() at time zone 'UTC'
+                  FROM unnest(%(expense_ids)s::int[], %(types)s::varchar[], %(scores)s::float8[],
+                              %(details)s::varchar[]) AS flag(expense_id, anomaly_type, score, detail)
+                  JOIN expense_tracker e ON e.id = flag.expense_id
+                    ON CONFLICT (expense_id, anomaly_type) DO NOTHING
+            """, {
+                'uid': self.env.uid,
+                'expense_ids': [flag[0] for flag in chunk],
+                'types': [flag[1] for flag in chunk],
+                'scores': [flag[2] for flag in chunk],
+                'details': [flag[3] for flag in chunk],
+            })
+        self.invalidate_model()
@@ -0,0 +1,233 @@
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import UserError
+from dateutil.relativedelta import relativedelta
+
+
+# Attachment-backed fields (the receipt and its thumbnail) are not copied:
+# their attachments are moved along with the chatter by _move_related_records
+ARCHIVED_FIELDS = [
+    'name', 'title', 'amount', 'category_id', 'date', 'currency_id', 'description',
+    'receipt_filename', 'state', 'user_id', 'company_id', 'partner_id', 'payment_method',
+    'budget_id', 'account_move_id',
+]
+
+
+class ExpenseTrackerArchive(models.Model):
+    _name = 'expense.tracker.archive'
+    _description = 'Archived Expense'
+    _inherit = ['mail.thread']
+    _order = 'date desc, id desc'
+
+    original_id = fields.Integer(string='Original Expense ID', readonly=True, index=True)
+    archive_date = fields.Datetime(string='Archived On', readonly=True, default=fields.Datetime.now)
+
+    name = fields.Char(string='Expense Reference', readonly=True)
+    title = fields.Char(string='Title', readonly=True)
+    amount = fields.Float(string='Amount', readonly=True)
+    category_id = fields.Many2one('expense.category', string='Category', readonly=True, ondelete='restrict')
+    date = fields.Date(string='Date', readonly=True)
+    currency_id = fields.Many2one('res.currency', string='Currency', readonly=True)
+    description = fields.Text(string='Description', readonly=True)
+    receipt = fields.Binary(string='Receipt', attachment=True, readonly=True)
+    receipt_filename = fields.Char(string='Receipt Filename', readonly=True)
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('submitted', 'Submitted'),
+        ('approved', 'Approved'),
+        ('rejected', 'Rejected'),
+        ('paid', 'Paid')
+    ], string='Status', readonly=True)
+    user_id = fields.Many2one('res.users', string='User', readonly=True)
+    company_id = fields.Many2one('res.company', string='Company', readonly=True, index=True)
+    partner_id = fields.Many2one('res.partner', string='Vendor', readonly=True)
+    payment_method = fields.Selection([
+        ('cash', 'Cash'),
+        ('card', 'Credit Card'),
+        ('bank', 'Bank Transfer'),
+        ('digital', 'Digital Payment')
+    ], string='Payment Method', readonly=True)
+    budget_id = fields.Many2one('expense.budget', string='Budget', readonly=True, index=True, ondelete='set null')
+    account_move_id = fields.Many2one('account.move', string='Journal Entry', readonly=True)
+
+    def action_restore(self):
+        """Move the archived expenses back into the live expense table in one batch"""
+        if not self:
+            return True
+        vals_list = self.read(ARCHIVED_FIELDS, load=False)
+        for vals in vals_list:
+            vals.pop('id')
+        expenses = self.env['expense.tracker'].with_context(
+            expense_archiving=True, tracking_disable=True).create(vals_list)
+        self._move_related_records('expense.tracker', self.ids, expenses.ids)
+        # the receipts came back with the attachments, after the create
+        self.env.add_to_compute(expenses._fields['receipt_checksum'], expenses)
+        periods = self._get_periods()
+        self.unlink()
+        self.env['expense.archive.rollup']._refresh_periods(periods)
+        self.env['expense.budget.statistics'].invalidate_statistics()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Restored Expenses'),
+            'res_model': 'expense.tracker',
+            'view_mode': 'tree,form',
+            'domain': [('id', 'in', expenses.ids)],
+        }
+
+    def _get_periods(self):
+        return {fields.Date.start_of(record.date, 'month') for record in self if record.date}
+
+    @api.model
+    def _move_related_records(self, target_model, source_ids, target_ids):
+        """Re-point chatter messages and attachments from one model to the other"""
+        source_model = 'expense.tracker' if target_model == self._name else self._name
+        self.env.flush_all()
+        for table in ('mail_message', 'ir_attachment'):
+            model_column = 'model' if table == 'mail_message' else 'res_model'
+            self.env.cr.execute("""
+                UPDATE {table} t
+                   SET {model_column} = %s, res_id = m.target_id
+                  FROM unnest(%s::int[], %s::int[]) AS m(source_id, target_id)
+                 WHERE t.{model_column} = %s AND t.res_id = m.source_id
+            """.format(table=table, model_column=model_column),
+                [target_model, list(source_ids), list(target_ids), source_model])
+        self.env.invalidate_all()
+
+
+class ExpenseArchiveRollup(models.Model):
+    _name = 'expense.archive.rollup'
+    _description = 'Archived Expense Rollup'
+    _order = 'period desc'
+
+    period = fields.Date(string='Month', required=True, readonly=True, index=True)
+    budget_id = fields.Many2one('expense.budget', string='Budget', readonly=True, index=True, ondelete='cascade')
+    category_id = fields.Many2one('expense.category', string='Category', readonly=True, ondelete='cascade')
+    user_id = fields.Many2one('res.users', string='User', readonly=True)
+    company_id = fields.Many2one('res.company', string='Company', readonly=True)
+    currency_id = fields.Many2one('res.currency', string='Currency', readonly=True)
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('submitted', 'Submitted'),
+        ('approved', 'Approved'),
+        ('rejected', 'Rejected'),
+        ('paid', 'Paid')
+    ], string='Status', readonly=True)
+    amount = fields.Float(string='Amount', readonly=True)
+    expense_count = fields.Integer(string='Expense Count', readonly=True)
+
+    @api.model
+    def _refresh_periods(self, periods):
+        """Rebuild the rollups of the given months from the archive table"""
+        if not periods:
+            return
+        self.env.flush_all()
+        periods = tuple(periods)
+        self.env.cr.execute("DELETE FROM expense_archive_rollup WHERE period IN %s", [periods])
+        self.env.cr.execute("""
+            INSERT INTO expense_archive_rollup (period, budget_id, category_id, user_id, company_id, currency_id,
+                                                state, amount, expense_count,
+                                                create_uid, write_uid, create_date, write_date)
+                 SELECT date_trunc('month', date)::date, budget_id, category_id, user_id, company_id, currency_id,
+                        state, SUM(amount), COUNT(*),
+                        %(uid)s, %(uid)s, now() at time zone 'UTC', now() at time zone 'UTC'
+                   FROM expense_tracker_archive
+                  WHERE date_trunc('month', date)::date IN %(periods)s
+               GROUP BY 1, budget_id, category_id, user_id, company_id, currency_id, state
+        """, {'uid': self.env.uid, 'periods': periods})
+        self.invalidate_model()
+
+
+class ExpenseTrackerHistory(models.Model):
+    _name = 'expense.tracker.history'
+    _description = 'Expense History (incl. Archive)'
+    _auto = False
+    _order = 'date desc, id desc'
+
+    res_id = fields.Integer(string='Record ID', readonly=True)
+    is_archived = fields.Boolean(string='Archived', readonly=True)
+    name = fields.Char(string='Expense Reference', readonly=True)
+    title = fields.Char(string='Title', readonly=True)
+    amount = fields.Float(string='Amount', readonly=True)
+    category_id = fields.Many2one('expense.category', string='Category', readonly=True)
+    date = fields.Date(string='Date', readonly=True)
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('submitted', 'Submitted'),
+        ('approved', 'Approved'),
+        ('rejected', 'Rejected'),
+        ('paid', 'Paid')
+    ], string='Status', readonly=True)
+    user_id = fields.Many2one('res.users', string='User', readonly=True)
+    company_id = fields.Many2one('res.company', string='Company', readonly=True)
+    budget_id = fields.Many2one('expense.budget', string='Budget', readonly=True)
+    partner_id = fields.Many2one('res.partner', string='Vendor', readonly=True)
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        columns = 'name, title, amount, category_id, date, state, user_id, company_id, budget_id, partner_id'
+        self.env.cr.execute("""
+            CREATE OR REPLACE VIEW {table} AS (
+                SELECT id * 2 AS id, id AS res_id, FALSE AS is_archived, {columns}
+                  FROM expense_tracker
+             UNION ALL
+                SELECT id * 2 + 1 AS id, id AS res_id, TRUE AS is_archived, {columns}
+                  FROM expense_tracker_archive
+            )
+        """.format(table=self._table, columns=columns))
+
+
+class Expense(models.Model):
+    _inherit = 'expense.tracker'
+
+    def _archive_expenses(self):
+        """Move the expenses into the archive table, keeping their budget and dashboard rollups"""
+        if not self:
+            return self.env['expense.tracker.archive']
+        if self.filtered(lambda expense: expense.state in ('draft', 'submitted')):
+            raise UserError(_("Only approved, paid or rejected expenses can be archived."))
+        vals_list = self.read(ARCHIVED_FIELDS, load=False)
+        for vals in vals_list:
+            vals['original_id'] = vals.pop('id')
+        Archive = self.env['expense.tracker.archive']
+        archives = Archive.with_context(tracking_disable=True).create(vals_list)
+        Archive._move_related_records(Archive._name, self.ids, archives.ids)
+        periods = archives._get_periods()
+        self.with_context(expense_archiving=True).unlink()
+        self.env['expense.archive.rollup']._refresh_periods(periods)
+        return archives
+
+    @api.model
+    def _get_archivable_domain(self, company):
+        keep_years = int(self.env['ir.config_parameter'].sudo().get_param(
+            'expense_tracker_advanced.archive_keep_fiscal_years', 2))
+        fiscal_year_start = company.compute_fiscalyear_dates(fields.Date.today())['date_from']
+        cutoff = fiscal_year_start - relativedelta(years=keep_years)
+        return [
+            ('company_id', '=', company.id),
+            ('state', 'in', ['approved', 'paid', 'rejected']),
+            '|', ('budget_id.state', '=', 'closed'), ('date', '<', cutoff),
+        ]
+
+    @api.model
+    def _cron_archive_expenses(self, batch_size=5000):
+        """Archive expenses of closed budgets and old fiscal years, one batch per company per run"""
+        remaining = False
+        for company in self.env['res.company'].search([]):
+            expenses = self.search(self._get_archivable_domain(company), limit=batch_size, order='id')
+            expenses._archive_expenses()
+            remaining = remaining or len(expenses) == batch_size
+        if remaining:
+            self.env.ref('expense_tracker_advanced.ir_cron_archive_expenses')._trigger()
+
+
+class ExpenseBudget(models.Model):
+    _inherit = 'expense.budget'
+
+    def action_archive_expenses(self):
+        """Archive the finished expenses of closed budgets"""
+        if self.filtered(lambda budget: budget.state != 'closed'):
+            raise UserError(_("Only expenses of closed budgets can be archived."))
+        self.env['expense.tracker'].search([
+            ('budget_id', 'in', self.ids),
+            ('state', 'in', ['approved', 'paid', 'rejected']),
+        ])._archive_expenses()
+        return True
@@ -1,6 +1,8 @@
 from odoo import models, fields, api, _
 from datetime import date
 
+from .instrumentation import instrumented
+
 
 class ExpenseDashboard(models.Model):
     _name = "expense.tracker.dashboard"
@@ -22,42 +24,81 @@ class ExpenseDashboard(models.Model):
     company_currency_id = fields.Many2one("res.currency", string="Company Currency",
                                           default=lambda self:  self.env.user.company_id.currency_id)
 
-   
-    recent_expenses = fields.One2many("expense.tracker", "dashboard_id", string="Recent Expenses")
-
-   
+    _RECENT_ACTIVITY_FIELDS = ['name', 'title', 'date', 'amount', 'currency_id', 'category_id', 'user_id', 'state']
 
-    @api.depends('recent_expenses')
+    @instrumented
     def _compute_dashboard_data(self):
-       
-        for record in self:
-            expenses = self.env['expense.tracker'].search([])
-            total_expenses = sum(exp.amount_company_currency for exp in expenses)
-            record.total_expenses = total_expenses
-
-           
-            current_month = date.today().month
-            record.monthly_expenses = sum(
-                exp.amount_company_currency for exp in expenses if exp.date and exp.date.month == current_month
-            )
+        Expense = self.env['expense.tracker']
+        first_day_of_month = date.today().replace(day=1)
+        Rollup = self.env['expense.archive.rollup']
+        # amounts are summed per currency and company, then converted
+        groupby = ['currency_id', 'company_id']
+        totals = Expense.read_group([], ['amount:sum'], groupby, lazy=False) + \
+            Rollup.read_group([], ['amount:sum'], groupby, lazy=False)
+        monthly = Expense.read_group([('date', '>=', first_day_of_month)], ['amount:sum'], groupby, lazy=False) + \
+            Rollup.read_group([('period', '>=', first_day_of_month)], ['amount:sum'], groupby, lazy=False)
+        # Read from the maintained queue counters: the whole companies for
+        # expense managers, the user's own approval queue otherwise
+        Counter = self.env['expense.approval.counter'].sudo()
+        if self.env.user.has_group('expense_tracker_advanced.group_expense_manager'):
+            pending_approval = Counter.get_pending_count(self.env.companies.ids)
+        else:
+            pending_approval = Counter.get_pending_count(self.env.companies.ids, self.env.uid)
+        stats = self.env['expense.budget.statistics'].get_statistics()
 
-           
-            record.pending_approval = len(expenses.filtered(lambda e: e.state == 'submitted'))
-
-           
-            budgets = self.env['expense.budget'].search([])
-            total_budget = sum(b.amount for b in budgets)
-
-
-            total_budget_expenses = 0.0
-
-            for budget in budgets:
-                related_expenses = self.env['expense.tracker'].search([
-                    ('category_id', '=', budget.category_id.id),
-                    ('budget_id', '=', budget.id)
-                ])
-                total_budget_expenses += sum(related_expenses.mapped('amount_company_currency'))
+        for record in self:
+            total_expenses = self._sum_company_currency(totals)
+            total_budget = stats['total_budget_amount']
 
+            record.total_expenses = total_expenses
+            record.monthly_expenses = self._sum_company_currency(monthly)
+            record.pending_approval = pending_approval
             record.budget_utilization = (total_expenses / total_budget * 100) if total_budget else 0.0
             record.remaining_budget = total_budget - total_expenses
 
+    @api.model
+    def _sum_company_currency(self, groups):
+        """Sum amounts grouped by currency and company, converted to the company currency"""
+        Expense = self.env['expense.tracker']
+        return sum(
+            Expense._to_company_currency(
+                group['amount'] or 0.0,
+                self.env['res.currency'].browse(group['currency_id'] and group['currency_id'][0]),
+                self.env['res.company'].browse(group['company_id'] and group['company_id'][0]),
+            ) for group in groups
+        )
+
+    @api.model
+    @instrumented
+    def get_category_chart_data(self):
+        """Approved spend per top-level category, subcategories rolled up"""
+        categories = self.env['expense.category'].search([('parent_id', '=', False)])
+        totals = categories.get_subtree_totals()
+        return {
+            'keys': categories.ids,
+            'labels': categories.mapped('name'),
+            'values': [totals[category.id]['spent_amount'] for category in categories],
+        }
+
+    @api.model
+    @instrumented
+    def get_recent_activity(self, after=None, limit=40):
+        """One page of the recent activity feed, newest first.
+
+        Pages are keyset-paginated on ``(date, id)``, matching the expense
+        order and its index: ``after`` is the ``[date, id]`` cursor returned
+        with the previous page, so fetching a page never depends on how much
+        history lies before it.
+
+        :return: dict with the page ``records`` and the ``next`` cursor, which
+                 is ``False`` on the last page
+        """
+        Expense = self.env['expense.tracker']
+        ids = Expense._search_keyset([], ['date', 'id'], after, limit=limit + 1, descending=True)
+        records = Expense.browse(ids).read(self._RECENT_ACTIVITY_FIELDS)
+        has_more = len(records) > limit
+        records = records[:limit]
+        return {
+            'records': records,
+            'next': has_more and [fields.Date.to_string(records[-1]['date']), records[-1]['id']],
+        }
@@ -0,0 +1,327 @@
+from odoo import models, fields, api, modules, tools, _
+from odoo.tools.pdf import merge_pdf
+from concurrent.futures import ThreadPoolExecutor
+import base64
+import hashlib
+import json
+
+from .instrumentation import instrumented
+
+
+class ExpenseReportVersion(models.AbstractModel):
+    _name = 'expense.report.version'
+    _description = 'Expense Report Data Version'
+
+    _VERSION_KEY = 'expense.report.data'
+    _PENDING_BUMP = 'expense.report.version.pending_bump'
+
+    @api.model
+    def get_data_version(self):
+        """Stamp that moves whenever data shown by the expense reports changes.
+
+        None once the current transaction has changed such data: its version
+        is only known on commit, so its renders must bypass the cache.
+        """
+        if self.env.cr.precommit.data.get(self._PENDING_BUMP):
+            return None
+        return '%s-%s' % self.env['expense.data.version'].get_version(self._VERSION_KEY)
+
+    @api.model
+    def bump_data_version(self):
+        """Move the data version when the current transaction commits.
+
+        Called on every write of expenses and budgets: the version row is
+        appended once per transaction, not once per write.
+        """
+        data = self.env.cr.precommit.data
+        if not data.get(self._PENDING_BUMP):
+            data[self._PENDING_BUMP] = True
+            self.env.cr.precommit.add(self._flush_data_version_bump)
+
+    @api.model
+    def _flush_data_version_bump(self):
+        if self.env.cr.precommit.data.pop(self._PENDING_BUMP, False):
+            self.env['expense.data.version'].bump(self._VERSION_KEY)
+            self.env['expense.data.version'].flush_model()
+
+
+class ExpenseReportCache(models.Model):
+    _name = 'expense.report.cache'
+    _description = 'Cached Expense Report'
+    _order = 'id desc'
+
+    report_id = fields.Many2one('ir.actions.report', string='Report', required=True, ondelete='cascade')
+    user_id = fields.Many2one('res.users', string='Owner', required=True, index=True, ondelete='cascade',
+                              help="Renders depend on the record rules of the user they were made for, "
+                                   "so each user only ever reads their own")
+    version = fields.Char(string='Data Version', required=True)
+    key = fields.Char(string='Parameters Hash', required=True, index=True)
+    pdf = fields.Binary(string='PDF', attachment=True, required=True)
+
+    @api.autovacuum
+    def _gc_stale_reports(self):
+        version = self.env['expense.report.version'].get_data_version()
+        if version is None:
+            return
+        self.sudo().search([('version', '!=', version)]).unlink()
+
+
+class ExpenseCategory(models.Model):
+    _inherit = 'expense.category'
+
+    def write(self, vals):
+        if {'name', 'parent_id'} & vals.keys():
+            self.env['expense.report.version'].bump_data_version()
+        return super().write(vals)
+
+
+class IrActionsReport(models.Model):
+    _inherit = 'ir.actions.report'
+
+    # Reports whose PDF is cached per parameters and data version
+    _EXPENSE_CACHED_REPORTS = {
+        'expense_tracker_advanced.budget_summary_report',
+        'expense_tracker_advanced.budget_utilization_report',
+        'expense_tracker_advanced.report_expense_analysis',
+    }
+    # Reports that may be rendered as chunks of records merged afterwards
+    _EXPENSE_CHUNKED_REPORTS = {
+        'expense_tracker_advanced.budget_summary_report',
+    }
+
+    def _get_expense_report_cache_key(self, res_ids, data):
+        params = json.dumps([
+            self.report_name, sorted(res_ids or []), data or {},
+            self.env.companies.ids, self.env.lang,
+        ], sort_keys=True, default=str)
+        return hashlib.sha1(params.encode()).hexdigest()
+
+    def _render_qweb_pdf(self, report_ref, res_ids=None, data=None):
+        report = self._get_report(report_ref)
+        if report.report_name not in self._EXPENSE_CACHED_REPORTS or \
+                self.env.context.get('expense_report_no_cache'):
+            return super()._render_qweb_pdf(report_ref, res_ids=res_ids, data=data)
+
+        version = self.env['expense.report.version'].get_data_version()
+        if version is None:
+            return super(IrActionsReport, self.with_context(expense_report_no_cache=True))._render_qweb_pdf(
+                report_ref, res_ids=res_ids, data=data)
+        key = report._get_expense_report_cache_key(res_ids, data)
+        Cache = self.env['expense.report.cache'].sudo()
+        cache_domain = [('report_id', '=', report.id), ('user_id', '=', self.env.uid)]
+        cached = Cache.search(cache_domain + [('version', '=', version), ('key', '=', key)], limit=1)
+        if cached:
+            return base64.b64decode(cached.pdf), 'pdf'
+
+        chunk_size = int(self.env['ir.config_parameter'].sudo().get_param(
+            'expense_tracker_advanced.report_chunk_size', 500))
+        if report.report_name in self._EXPENSE_CHUNKED_REPORTS and res_ids and len(res_ids) > chunk_size:
+            pdf_content = report._render_expense_report_chunks(res_ids, data, chunk_size)
+        else:
+            pdf_content = super(IrActionsReport, self.with_context(expense_report_no_cache=True))._render_qweb_pdf(
+                report_ref, res_ids=res_ids, data=data)[0]
+
+        # Only the current version is worth keeping
+        Cache.search(cache_domain + [('version', '!=', version)]).unlink()
+        Cache.create({
+            'report_id': report.id,
+            'user_id': self.env.uid,
+            'version': version,
+            'key': key,
+            'pdf': base64.b64encode(pdf_content),
+        })
+        return pdf_content, 'pdf'
+
+    def _render_expense_report_chunks(self, res_ids, data, chunk_size):
+        """Render ``res_ids`` in chunks, in parallel, and merge the PDFs.
+
+        Report-wide figures are computed once and handed to every chunk, which
+        then only renders its own rows. Each worker uses its own cursor, so
+        chunks only see committed data.
+        """
+        self.ensure_one()
+        report_model = self.env['report.%s' % self.report_name]
+        summary = report_model._get_report_summary(res_ids, data)
+        chunks = [res_ids[index:index + chunk_size] for index in range(0, len(res_ids), chunk_size)]
+        chunk_data = [
+            dict(data or {}, summary=summary, show_summary=index == 0)
+            for index in range(len(chunks))
+        ]
+
+        if modules.module.current_test:
+            # test cursors cannot be shared between threads
+            Report = self.with_context(expense_report_no_cache=True)
+            pdfs = [Report._render_qweb_pdf(self.id, chunk, values)[0]
+                    for chunk, values in zip(chunks, chunk_data)]
+        else:
+            workers = int(self.env['ir.config_parameter'].sudo().get_param(
+                'expense_tracker_advanced.report_workers', 4))
+            with ThreadPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+                pdfs = list(executor.map(self._render_expense_report_chunk, chunks, chunk_data))
+        return merge_pdf(pdfs)
+
+    def _render_expense_report_chunk(self, res_ids, data):
+        with self.pool.cursor() as cr:
+            env = self.env(cr=cr, context=dict(self.env.context, expense_report_no_cache=True))
+            return env['ir.actions.report']._render_qweb_pdf(self.id, res_ids, data)[0]
+
+
+class BudgetSummaryReport(models.AbstractModel):
+    _name = 'report.expense_tracker_advanced.budget_summary_report'
+    _description = 'Budget Summary Report'
+
+    @api.model
+    def _get_budgets(self, docids):
+        Budget = self.env['expense.budget']
+        return Budget.browse(docids) if docids else Budget.search([])
+
+    @api.model
+    def _get_report_summary(self, docids, data=None):
+        rows = self.env['expense.budget.statistics']._get_budget_rows(self._get_budgets(docids))
+        stats = self.env['expense.budget.statistics']._compute_statistics(rows, 80.0, 95.0)
+        return {key: value for key, value in stats.items() if key != 'budgets'}
+
+    @api.model
+    @instrumented
+    def _get_report_values(self, docids, data=None):
+        data = dict(data or {})
+        budgets = self._get_budgets(docids)
+        Statistics = self.env['expense.budget.statistics']
+        rows = {row['id']: row for row in Statistics._get_budget_rows(budgets)}
+        if not data.get('summary'):
+            stats = Statistics._compute_statistics(list(rows.values()), 80.0, 95.0)
+            data['summary'] = {key: value for key, value in stats.items() if key != 'budgets'}
+
+        category_names = {
+            category['id']: category['name']
+            for category in budgets.mapped('category_id').read(['name'])
+        }
+        lines = []
+        for budget in budgets.read(['name', 'category_id']):
+            row = rows[budget['id']]
+            lines.append({
+                'name': budget['name'],
+                'category': category_names.get(row['category_id'], ''),
+                'amount': row['amount'],
+                'spent': row['spent'],
+                'utilization': (row['spent'] / row['amount'] * 100) if row['amount'] > 0 else 0.0,
+            })
+
+        data.update(data.pop('summary'))
+        data.setdefault('show_summary', True)
+        return {
+            'doc_ids': budgets.ids,
+            'doc_model': 'expense.budget',
+            'docs': budgets,
+            'lines': lines,
+            'data': data,
+            'currency': self.env.company.currency_id,
+            'generated_on': fields.Datetime.context_timestamp(self, fields.Datetime.now()),
+        }
+
+
+class BudgetUtilizationReport(models.AbstractModel):
+    _name = 'report.expense_tracker_advanced.budget_utilization_report'
+    _description = 'Budget Utilization Report'
+
+    @api.model
+    @instrumented
+    def _get_report_values(self, docids, data=None):
+        data = dict(data or {})
+        Budget = self.env['expense.budget']
+        report_data = Budget.get_utilization_report_data(data.get('date_from'), data.get('date_to'))
+        stats = self.env['expense.budget.statistics'].get_statistics()
+        report_data.update({
+            'within_budget_count': stats['within_budget_count'],
+            'near_limit_count': stats['near_limit_count'],
+            'over_budget_count': stats['over_budget_count'],
+        })
+        return {
+            'doc_ids': docids,
+            'doc_model': 'expense.budget',
+            'docs': Budget.browse(docids),
+            'data': report_data,
+            'currency': self.env.company.currency_id,
+        }
+
+
+class ExpenseAnalysisReport(models.AbstractModel):
+    _name = 'report.expense_tracker_advanced.report_expense_analysis'
+    _description = 'Expense Analysis Report'
+
+    @api.model
+    @instrumented
+    def _get_report_values(self, docids, data=None):
+        data = dict(data or {})
+        Expense = self.env['expense.tracker']
+        domain = [('id', 'in', docids)] if docids else []
+        if data.get('date_from'):
+            domain.append(('date', '>=', data['date_from']))
+        if data.get('date_to'):
+            domain.append(('date', '<=', data['date_to']))
+
+        # Totals, category breakdown and monthly trend in a single scan
+        query = Expense._search(domain)
+        from_clause, where_clause, where_params = query.get_sql()
+        self.env.cr.execute("""
+            SELECT GROUPING(expense_tracker.category_id) = 0 AS by_category,
+                   expense_tracker.category_id,
+                   date_trunc('month', expense_tracker.date)::date AS month,
+                   SUM(expense_tracker.amount), MAX(expense_tracker.amount), COUNT(*)
+              FROM %s
+             WHERE %s
+          GROUP BY GROUPING SETS ((expense_tracker.category_id),
+                                  (date_trunc('month', expense_tracker.date)), ())
+        """ % (from_clause, where_clause or 'TRUE'), where_params)
+
+        totals = {'total_amount': 0.0, 'max_amount': 0.0, 'expense_count': 0}
+        by_category = {}
+        by_month = {}
+        for is_category, category_id, month, amount, max_amount, count in self.env.cr.fetchall():
+            if is_category:
+                by_category[category_id] = (amount, count)
+            elif month:
+                by_month[month] = amount
+            else:
+                totals = {'total_amount': amount or 0.0, 'max_amount': max_amount or 0.0, 'expense_count': count}
+
+        category_names = dict(
+            (category['id'], category['name'])
+            for category in self.env['expense.category'].browse(list(by_category)).read(['name'])
+        )
+        total_amount = totals['total_amount']
+        category_breakdown = sorted((
+            {
+                'name': category_names.get(category_id, _('Undefined')),
+                'amount': amount,
+                'percentage': (amount / total_amount * 100) if total_amount else 0.0,
+                'count': count,
+            } for category_id, (amount, count) in by_category.items()
+        ), key=lambda line: -line['amount'])
+
+        monthly_trend = []
+        previous = None
+        for month in sorted(by_month):
+            amount = by_month[month]
+            monthly_trend.append({
+                'name': tools.format_date(self.env, month, date_format='MMMM y'),
+                'amount': amount,
+                'change': ((amount - previous) / previous * 100) if previous else 0.0,
+            })
+            previous = amount
+
+        data.update(totals, **{
+            'average_amount': (total_amount / totals['expense_count']) if totals['expense_count'] else 0.0,
+            'category_breakdown': category_breakdown,
+            'monthly_trend': monthly_trend,
+            'categories': ', '.join(line['name'] for line in category_breakdown),
+        })
+        return {
+            'doc_ids': docids,
+            'doc_model': 'expense.tracker',
+            'docs': Expense.browse(docids),
+            'data': data,
+            'company': self.env.company,
+            'currency': self.env.company.currency_id,
+            'generated_on': fields.Datetime.context_timestamp(self, fields.Datetime.now()),
+        }
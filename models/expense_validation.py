@@ -0,0 +1,93 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+from datetime import datetime, date
+
+
+class ExpensePayloadValidator(models.AbstractModel):
+    _name = 'expense.payload.validator'
+    _description = 'Expense Payload Validation'
+
+    @api.model
+    def validate_payloads(self, payloads, date_format=None, required=()):
+        """Parse, normalize and check a batch of expense payloads.
+
+        ``amount`` and ``date`` are parsed once (strings are accepted, dates use
+        ``date_format`` or ISO format), then the batch is checked as a whole:
+        positive amounts, no future dates, required keys present and referenced
+        categories existing. Only keys present in a payload are checked unless
+        they are listed in ``required``.
+
+        :return: tuple ``(values, errors)`` where ``values`` holds the normalized
+                 copy of every payload and ``errors`` maps payload indexes to
+                 their list of error messages
+        """
+        today = fields.Date.context_today(self)
+        values = []
+        errors = {}
+
+        for index, payload in enumerate(payloads):
+            vals = dict(payload)
+            row_errors = []
+
+            for key in required:
+                if vals.get(key) in (None, False, ''):
+                    row_errors.append(_("%s is required") % key.replace('_id', '').capitalize())
+
+            if vals.get('amount') not in (None, False, ''):
+                try:
+                    vals['amount'] = float(vals['amount'])
+                except (TypeError, ValueError):
+                    row_errors.append(_("Amount must be a valid number"))
+                else:
+                    if vals['amount'] <= 0:
+                        row_errors.append(_("Expense amount must be positive."))
+
+            if vals.get('date') not in (None, False, ''):
+                try:
+                    vals['date'] = self._parse_date(vals['date'], date_format)
+                except (TypeError, ValueError):
+                    row_errors.append(_("Date format is invalid. Expected: %s") % (date_format or '%Y-%m-%d'))
+                else:
+                    if vals['date'] > today:
+                        row_errors.append(_('Expense date cannot be in the future.'))
+
+            if 'category_id' in vals and not vals['category_id']:
+                row_errors.append(_("Category is required"))
+
+            values.append(vals)
+            if row_errors:
+                errors[index] = row_errors
+
+        category_ids = {
+            vals['category_id'] for vals in values if isinstance(vals.get('category_id'), int)
+        }
+        if category_ids:
+            existing = set(self.env['expense.category'].browse(category_ids).exists().ids)
+            for index, vals in enumerate(values):
+                if isinstance(vals.get('category_id'), int) and vals['category_id'] not in existing:
+                    errors.setdefault(index, []).append(_("Category does not exist"))
+
+        return values, errors
+
+    @api.model
+    def _parse_date(self, value, date_format=None):
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        if date_format:
+            return datetime.strptime(value.strip(), date_format).date()
+        return fields.Date.to_date(value.strip())
+
+    @api.model
+    def check_payloads(self, payloads, required=()):
+        """Validate payloads and raise a single ValidationError listing every failing row"""
+        values, errors = self.validate_payloads(payloads, required=required)
+        if errors:
+            if len(payloads) == 1:
+                raise ValidationError('\n'.join(errors[0]))
+            raise ValidationError('\n'.join(
+                _("Row %(row)d: %(errors)s", row=index + 1, errors=', '.join(messages))
+                for index, messages in sorted(errors.items())
+            ))
+        return values
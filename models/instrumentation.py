@@ -0,0 +1,288 @@
+from odoo import models, fields, api, modules, tools, SUPERUSER_ID, _
+from collections import defaultdict, deque
+from datetime import timedelta
+from functools import wraps
+import base64
+import cProfile
+import io
+import logging
+import marshal
+import pprint
+import pstats
+import sys
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+BUFFER_SIZE = 5000
+SLOW_SQL_LOG_SIZE = 1000
+SLOW_ARGUMENTS_SIZE = 10000
+
+# One ring buffer per database, per worker process
+_buffers = defaultdict(lambda: deque(maxlen=BUFFER_SIZE))
+_buffers_lock = threading.Lock()
+
+
+def _enable_profiler():
+    """Return an enabled cProfile profiler, or None when another profiler runs.
+
+    cProfile cannot nest: before Python 3.12 enabling it silently replaces
+    the active profiler, since 3.12 it raises ValueError.
+    """
+    if sys.getprofile() is not None:
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        return None
+    return profiler
+
+
+def instrumented(method):
+    """Record calls of ``method`` in the instrumentation ring buffer.
+
+    Each call logs its wall time, number and time of SQL queries and the size
+    of the record set. When both the log and the slow-operation capture are
+    disabled the only overhead is an ormcached settings lookup. Put it below
+    the ``api`` decorators.
+
+    While a slow-operation threshold is set, every call also runs under
+    cProfile with its SQL collected, so that any call slower than the
+    threshold, a one-off included, is stored as an ``expense.slow.operation``.
+    Calls made under another profiler, such as an instrumented call within
+    another one, are stored without profile.
+    """
+    name = method.__qualname__
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        enabled, slow_threshold = self.env['expense.instrumentation']._get_settings()
+        if not (enabled or slow_threshold):
+            return method(self, *args, **kwargs)
+
+        thread = threading.current_thread()
+        tracked = hasattr(thread, 'query_time')
+        if not tracked:
+            thread.query_count, thread.query_time = 0, 0.0
+        cr = self.env.cr
+        profiler = sql_log = None
+        if slow_threshold:
+            sql_log = []
+
+            def sql_hook(hook_cr, query, params, start, delay):
+                if len(sql_log) < SLOW_SQL_LOG_SIZE:
+                    sql_log.append((delay, query, params))
+            hooks = getattr(thread, 'query_hooks', None)
+            if hooks is None:
+                hooks = thread.query_hooks = []
+            hooks.append(sql_hook)
+
+        queries, query_time = cr.sql_log_count, thread.query_time
+        start = time.perf_counter()
+        try:
+            if slow_threshold:
+                profiler = _enable_profiler()
+            return method(self, *args, **kwargs)
+        finally:
+            duration = time.perf_counter() - start
+            if profiler:
+                profiler.disable()
+            if sql_log is not None:
+                hooks.remove(sql_hook)
+            entry = {
+                'timestamp': fields.Datetime.now(),
+                'name': name,
+                'model': self._name,
+                'record_count': len(self),
+                'duration': duration,
+                'query_count': cr.sql_log_count - queries,
+                'query_time': thread.query_time - query_time,
+                'uid': self.env.uid,
+            }
+            if not tracked:
+                del thread.query_count, thread.query_time
+            if enabled:
+                with _buffers_lock:
+                    _buffers[cr.dbname].append(entry)
+            if slow_threshold and duration >= slow_threshold:
+                self.env['expense.slow.operation']._capture(
+                    entry, slow_threshold, self, args, kwargs, profiler, sql_log)
+    return wrapper
+
+
+class ExpenseInstrumentation(models.AbstractModel):
+    _name = 'expense.instrumentation'
+    _description = 'Expense Instrumentation'
+
+    @api.model
+    @tools.ormcache()
+    def _get_settings(self):
+        """Return whether the call log is enabled and the slow-operation threshold (s)"""
+        ICP = self.env['ir.config_parameter'].sudo()
+        enabled = tools.str2bool(ICP.get_param('expense_tracker_advanced.instrumentation_enabled', 'False'))
+        try:
+            slow_threshold = float(ICP.get_param('expense_tracker_advanced.slow_operation_threshold', 0.0))
+        except ValueError:
+            slow_threshold = 0.0
+        return enabled, max(slow_threshold, 0.0)
+
+    @api.model
+    def get_entries(self):
+        """Snapshot of the calls recorded by this worker, oldest first"""
+        with _buffers_lock:
+            return list(_buffers[self.env.cr.dbname])
+
+    @api.model
+    def clear_entries(self):
+        with _buffers_lock:
+            _buffers[self.env.cr.dbname].clear()
+
+    @api.model
+    def set_enabled(self, enabled):
+        self.env['ir.config_parameter'].sudo().set_param(
+            'expense_tracker_advanced.instrumentation_enabled', enabled and 'True' or 'False')
+
+
+class ExpenseInstrumentationEntry(models.TransientModel):
+    _name = 'expense.instrumentation.entry'
+    _description = 'Expense Instrumentation Entry'
+    _order = 'timestamp desc, id desc'
+
+    timestamp = fields.Datetime(string='Time', readonly=True)
+    name = fields.Char(string='Method', readonly=True)
+    model = fields.Char(string='Model', readonly=True)
+    record_count = fields.Integer(string='Records', readonly=True, group_operator='sum')
+    duration = fields.Float(string='Wall Time (s)', digits=(16, 4), readonly=True, group_operator='sum')
+    query_count = fields.Integer(string='Queries', readonly=True, group_operator='sum')
+    query_time = fields.Float(string='Query Time (s)', digits=(16, 4), readonly=True, group_operator='sum')
+    user_id = fields.Many2one('res.users', string='User', readonly=True)
+
+    @api.model
+    def action_open(self):
+        """Load the current ring buffer into entries and open them.
+
+        The buffer lives in the memory of each worker, so the list shows the
+        calls served by the worker handling this request.
+        """
+        self.search([('create_uid', '=', self.env.uid)]).unlink()
+        self.create([{
+            'timestamp': entry['timestamp'],
+            'name': entry['name'],
+            'model': entry['model'],
+            'record_count': entry['record_count'],
+            'duration': entry['duration'],
+            'query_count': entry['query_count'],
+            'query_time': entry['query_time'],
+            'user_id': entry['uid'],
+        } for entry in self.env['expense.instrumentation'].get_entries()])
+        enabled = self.env['expense.instrumentation']._get_settings()[0]
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Performance Log (enabled)') if enabled else _('Performance Log (disabled)'),
+            'res_model': self._name,
+            'view_mode': 'tree,pivot',
+            'domain': [('create_uid', '=', self.env.uid)],
+            'context': {'search_default_group_by_name': 1},
+        }
+
+    def action_clear(self):
+        self.env['expense.instrumentation'].clear_entries()
+        return self.action_open()
+
+    def action_enable(self):
+        self.env['expense.instrumentation'].set_enabled(True)
+        return self.action_open()
+
+    def action_disable(self):
+        self.env['expense.instrumentation'].set_enabled(False)
+        return self.action_open()
+
+
+class ExpenseSlowOperation(models.Model):
+    _name = 'expense.slow.operation'
+    _description = 'Expense Slow Operation'
+    _order = 'create_date desc, id desc'
+
+    name = fields.Char(string='Method', readonly=True, required=True)
+    model = fields.Char(string='Model', readonly=True)
+    user_id = fields.Many2one('res.users', string='User', readonly=True)
+    duration = fields.Float(string='Wall Time (s)', digits=(16, 4), readonly=True)
+    threshold = fields.Float(string='Threshold (s)', digits=(16, 4), readonly=True)
+    record_count = fields.Integer(string='Records', readonly=True)
+    query_count = fields.Integer(string='Queries', readonly=True)
+    query_time = fields.Float(string='Query Time (s)', digits=(16, 4), readonly=True)
+    arguments = fields.Text(string='Arguments', readonly=True)
+    data_context = fields.Text(string='Data Size', readonly=True)
+    profile_stats = fields.Text(string='Profile', readonly=True)
+    sql_log = fields.Text(string='SQL', readonly=True)
+    profile_file = fields.Binary(string='Profile File', attachment=True, readonly=True)
+    profile_filename = fields.Char(string='Profile File Name', readonly=True)
+
+    # Tables whose size gives the context of a slow call
+    _DATA_CONTEXT_TABLES = (
+        'expense_tracker', 'expense_tracker_archive', 'expense_budget', 'expense_category',
+    )
+
+    @api.model
+    def _capture(self, entry, threshold, records, args, kwargs, profiler, sql_log):
+        """Store a slow call with its profile (if any) and SQL, on its own cursor.
+
+        The capture must survive the rollback of a failing call, and must never
+        make the instrumented call itself fail.
+        """
+        try:
+            vals = {
+                'name': entry['name'],
+                'model': entry['model'],
+                'user_id': entry['uid'],
+                'duration': entry['duration'],
+                'threshold': threshold,
+                'record_count': entry['record_count'],
+                'query_count': entry['query_count'],
+                'query_time': entry['query_time'],
+                'arguments': pprint.pformat({
+                    'ids': records.ids[:100],
+                    'args': args,
+                    'kwargs': kwargs,
+                    'context': dict(records.env.context),
+                })[:SLOW_ARGUMENTS_SIZE],
+                'sql_log': '\n\n'.join(
+                    '-- %.4fs\n%s;\n-- params: %r' % (delay, query, params) for delay, query, params in sql_log),
+            }
+            if profiler:
+                stream = io.StringIO()
+                pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(60)
+                profiler.create_stats()
+                vals.update({
+                    'profile_stats': stream.getvalue(),
+                    'profile_file': base64.b64encode(marshal.dumps(profiler.stats)),
+                    'profile_filename': '%s_%s.prof' % (
+                        entry['name'].replace('.', '_'), entry['timestamp'].strftime('%Y%m%d_%H%M%S')),
+                })
+
+            if modules.module.current_test:
+                # a new cursor would neither see nor roll back with the test's data
+                self._store_capture(self.env.cr, vals)
+            else:
+                with self.pool.cursor() as cr:
+                    self._store_capture(cr, vals)
+        except Exception:
+            _logger.exception("Could not store the slow operation capture of %s", entry['name'])
+
+    @api.model
+    def _store_capture(self, cr, vals):
+        env = api.Environment(cr, SUPERUSER_ID, {})
+        cr.execute("""
+            SELECT relname, reltuples::bigint FROM pg_class
+             WHERE relname IN %s AND relkind = 'r' ORDER BY relname
+        """, [self._DATA_CONTEXT_TABLES])
+        vals['data_context'] = '\n'.join('%s: ~%d rows' % row for row in cr.fetchall())
+        env[self._name].create(vals)
+
+    @api.autovacuum
+    def _gc_slow_operations(self):
+        days = int(self.env['ir.config_parameter'].sudo().get_param(
+            'expense_tracker_advanced.slow_operation_retention_days', 30))
+        self.search([('create_date', '<', fields.Datetime.now() - timedelta(days=days))]).unlink()
@@ -1,6 +1,8 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError, UserError
 
+from ..instrumentation import instrumented
+
 
 class BudgetAlertWizard(models.TransientModel):
     _name = 'budget.alert.wizard'
@@ -147,15 +149,13 @@ class BudgetAlertWizard(models.TransientModel):
 
         # Alternatively, you could use the mail.channel method for direct chat
         # This is a simplified version
-        for user in user_ids:
-            if user != self.env.user:
-                self.env['mail.message'].create({
-                    'model': 'res.users',
-                    'res_id': user.id,
-                    'body': message,
-                    'subject': 'Budget Alert',
-                    'partner_ids': [(4, user.partner_id.id)],
-                })
+        self.env['mail.message'].create([{
+            'model': 'res.users',
+            'res_id': user.id,
+            'body': message,
+            'subject': 'Budget Alert',
+            'partner_ids': [(4, user.partner_id.id)],
+        } for user in user_ids if user != self.env.user])
 
     def _create_recurring_alert(self):
         """Create a recurring alert schedule"""
@@ -212,6 +212,7 @@ class BudgetAlertWizard(models.TransientModel):
             }
         }
 
+    @instrumented
     def action_send_alert(self):
         """Send the budget alert to specified users"""
         self.ensure_one()
@@ -285,26 +286,30 @@ class BudgetAlertWizard(models.TransientModel):
         }
 
     @api.model
+    @instrumented
     def create_default_alerts(self):
         """Create default budget alerts for all active budgets nearing their limits"""
-        active_budgets = self.env['expense.budget'].search([
-            ('state', '=', 'active'),
-            ('utilization_percentage', '>=', 80)
+        stats = self.env['expense.budget.statistics'].get_statistics([('state', '=', 'active')])
+        utilizations = {
+            budget_id: row['utilization'] for budget_id, row in stats['budgets'].items()
+            if row['utilization'] >= 80
+        }
+        active_budgets = self.env['expense.budget'].browse(list(utilizations))
+
+        # Find budget manager or category responsible users
+        notify_users = self.env['res.users'].search([
+            ('groups_id', 'in', self.env.ref('expense_tracker_advanced.group_expense_manager').id)
         ])
 
         for budget in active_budgets:
-            alert_type = 'critical' if budget.utilization_percentage >= 95 else 'warning'
-
-            # Find budget manager or category responsible users
-            notify_users = self.env['res.users'].search([
-                ('groups_id', 'in', self.env.ref('expense_tracker_advanced.group_expense_manager').id)
-            ])
+            utilization = utilizations[budget.id]
+            alert_type = 'critical' if utilization >= 95 else 'warning'
 
             if notify_users:
                 self.create({
                     'budget_id': budget.id,
                     'alert_type': alert_type,
-                    'threshold_percentage': budget.utilization_percentage,
+                    'threshold_percentage': utilization,
                     'notify_users': [(6, 0, notify_users.ids)],
                     'notify_via_email': True,
                     'notify_via_chat': True,
@@ -3,7 +3,8 @@ from odoo.exceptions import ValidationError, UserError
 import csv
 import base64
 import io
-from datetime import datetime
+
+from ..instrumentation import instrumented
 
 
 class ExpenseImportWizard(models.TransientModel):
@@ -23,6 +24,7 @@ class ExpenseImportWizard(models.TransientModel):
     category_column = fields.Char(string='Category Column', default='category', required=True)
     date_column = fields.Char(string='Date Column', default='date', required=True)
     description_column = fields.Char(string='Description Column', default='description')
+    vendor_column = fields.Char(string='Vendor Column', default='vendor')
 
     # Options
     date_format = fields.Selection([
@@ -37,6 +39,10 @@ class ExpenseImportWizard(models.TransientModel):
         (';', 'Semicolon (;)'),
         ('\t', 'Tab')
     ], string='Delimiter', default=',', required=True)
+    use_categorization_rules = fields.Boolean(
+        string='Apply Categorization Rules', default=True,
+        help="Categorize the rows with the categorization rules; the category column is only "
+             "used for the rows no rule matches.")
 
     # Results
     import_result = fields.Text(string='Import Result', readonly=True)
@@ -71,37 +77,51 @@ class ExpenseImportWizard(models.TransientModel):
         except Exception as e:
             raise UserError(_("Error reading CSV file: %s") % str(e))
 
+    def _get_record_payload(self, record):
+        """Map a CSV record onto expense payload keys"""
+        payload = {
+            'title': (record.get(self.title_column) or '').strip(),
+            'amount': record.get(self.amount_column),
+            'category': (record.get(self.category_column) or '').strip(),
+            'date': record.get(self.date_column),
+        }
+        if self.description_column and record.get(self.description_column):
+            payload['description'] = record[self.description_column].strip()
+        if self.vendor_column and record.get(self.vendor_column):
+            payload['vendor'] = record[self.vendor_column].strip()
+        return payload
+
+    def _validate_records(self, records):
+        """Parse and validate all CSV records in one batch through the shared validator"""
+        payloads, errors = self.env['expense.payload.validator'].validate_payloads(
+            [self._get_record_payload(record) for record in records],
+            date_format=self.date_format,
+            required=('title', 'amount', 'date') if self.use_categorization_rules
+            else ('title', 'amount', 'category', 'date'),
+        )
+        if self.use_categorization_rules:
+            self._categorize_payloads(payloads)
+        return payloads, errors
+
+    def _categorize_payloads(self, payloads):
+        """Set the category and budget given by the categorization rules on the payloads"""
+        targets = self.env['expense.categorization.rule'].categorize(payloads)
+        for payload, target in zip(payloads, targets):
+            if target:
+                payload['category_id'], payload['budget_id'] = target
+
     def _validate_record(self, record):
         """Validate a single record from CSV"""
-        errors = []
-
-        # Check required fields
-        if not record.get(self.title_column):
-            errors.append(_("Title is required"))
-
-        if not record.get(self.amount_column):
-            errors.append(_("Amount is required"))
-        else:
-            try:
-                float(record[self.amount_column])
-            except ValueError:
-                errors.append(_("Amount must be a valid number"))
-
-        if not record.get(self.category_column):
-            errors.append(_("Category is required"))
-
-        if not record.get(self.date_column):
-            errors.append(_("Date is required"))
-        else:
-            try:
-                datetime.strptime(record[self.date_column], self.date_format)
-            except ValueError:
-                errors.append(_("Date format is invalid. Expected: %s") % self.date_format)
-
-        return errors
+        payloads, errors = self._validate_records([record])
+        return errors.get(0, [])
 
     def _get_or_create_category(self, category_name):
         """Get existing category or create a new one"""
+        cache = self.env.context.get('import_category_cache')
+        key = category_name.strip().lower()
+        if cache is not None and key in cache:
+            return cache[key]
+
         category = self.env['expense.category'].search([
             ('name', '=ilike', category_name.strip())
         ], limit=1)
@@ -112,71 +132,133 @@ class ExpenseImportWizard(models.TransientModel):
                 'code': category_name.strip()[:10].upper()
             })
 
+        if cache is not None:
+            cache[key] = category
         return category
 
-    def _create_expense_from_record(self, record):
-        """Create an expense record from CSV data"""
-        # Parse date
-        date_str = record[self.date_column]
-        date_obj = datetime.strptime(date_str, self.date_format).date()
-
-        # Get or create category
-        category = self._get_or_create_category(record[self.category_column])
+    def _get_payload_category(self, payload):
+        """Category found by the categorization rules, else named by the category column"""
+        if payload.get('category_id'):
+            return self.env['expense.category'].browse(payload['category_id'])
+        if not payload.get('category'):
+            raise UserError(_("No categorization rule matches and no category is given"))
+        return self._get_or_create_category(payload['category'])
+
+    def _get_payload_budget(self, payload, category):
+        """Budget given by the categorization rules, else the active budget of the category"""
+        if payload.get('budget_id'):
+            return payload['budget_id']
+        index = self.env.context.get('import_budget_index')
+        if index is None:
+            index = self.env['expense.budget']._get_active_budget_index(self.env.company.id)
+        return self.env['expense.budget']._find_active_budget(index, category.id, payload['date'])
+
+    def _prepare_expense_vals(self, payload):
+        """Build the expense values from a validated payload"""
+        category = self._get_payload_category(payload)
 
         # Create expense
         expense_vals = {
-            'title': record[self.title_column].strip(),
-            'amount': float(record[self.amount_column]),
+            'title': payload['title'],
+            'amount': payload['amount'],
             'category_id': category.id,
-            'date': date_obj,
+            'budget_id': self._get_payload_budget(payload, category),
+            'date': payload['date'],
             'state': 'draft',
             'user_id': self.env.user.id,
         }
 
         # Add description if available
-        if self.description_column and record.get(self.description_column):
-            expense_vals['description'] = record[self.description_column].strip()
+        if payload.get('description'):
+            expense_vals['description'] = payload['description']
+
+        return expense_vals
+
+    def _create_expense_from_record(self, record):
+        """Create an expense record from CSV data"""
+        payloads, errors = self._validate_records([record])
+        if errors:
+            raise ValidationError('\n'.join(errors[0]))
+        return self.env['expense.tracker'].create(self._prepare_expense_vals(payloads[0]))
+
+    def _create_expenses_from_records(self, records):
+        """Create expenses for ``(line_number, record, payload)`` rows in a single batch.
+
+        Returns the created expenses in input order and the failures. When the
+        batch is rejected, rows are retried one by one under savepoints so every
+        failure is reported against its own line.
+        """
+        failed = []
+        vals_list = []
+        prepared = []
+        for line_number, record, payload in records:
+            try:
+                vals_list.append(self._prepare_expense_vals(payload))
+                prepared.append((line_number, record, payload))
+            except Exception as e:
+                failed.append({'line_number': line_number, 'record': record, 'errors': [str(e)]})
 
-        return self.env['expense.tracker'].create(expense_vals)
+        Expense = self.env['expense.tracker']
+        try:
+            with self.env.cr.savepoint():
+                expenses = Expense.create(vals_list)
+            return list(zip(prepared, expenses)), failed
+        except Exception:
+            pass
+
+        created = []
+        for (line_number, record, payload), vals in zip(prepared, vals_list):
+            try:
+                with self.env.cr.savepoint():
+                    created.append(((line_number, record, payload), Expense.create(vals)))
+            except Exception as e:
+                failed.append({'line_number': line_number, 'record': record, 'errors': [str(e)]})
+        return created, failed
 
-    def _update_expense_from_record(self, record):
+    def _update_expense_from_record(self, record, payload=None):
         """Update existing expense record from CSV data"""
         # This would require a unique identifier in the CSV
         # For simplicity, we'll use title + date as identifier
-        title = record[self.title_column].strip()
-        date_str = record[self.date_column]
-        date_obj = datetime.strptime(date_str, self.date_format).date()
+        if payload is None:
+            payloads, errors = self._validate_records([record])
+            if errors:
+                raise ValidationError('\n'.join(errors[0]))
+            payload = payloads[0]
 
         expense = self.env['expense.tracker'].search([
-            ('title', '=', title),
-            ('date', '=', date_obj)
+            ('title', '=', payload['title']),
+            ('date', '=', payload['date'])
         ], limit=1)
 
         if expense:
-            category = self._get_or_create_category(record[self.category_column])
+            category = self._get_payload_category(payload)
 
             update_vals = {
-                'amount': float(record[self.amount_column]),
+                'amount': payload['amount'],
                 'category_id': category.id,
             }
+            if payload.get('budget_id'):
+                update_vals['budget_id'] = payload['budget_id']
 
-            if self.description_column and record.get(self.description_column):
-                update_vals['description'] = record[self.description_column].strip()
+            if payload.get('description'):
+                update_vals['description'] = payload['description']
 
             expense.write(update_vals)
             return expense
         else:
             return None
 
+    @instrumented
     def action_preview_import(self):
         """Preview the import data before actual import"""
         self.ensure_one()
 
-        records = self._parse_csv_file()
+        records = self._parse_csv_file()[:10]  # Show first 10 records
+        payloads, errors_by_index = self._validate_records(records)
         preview_data = []
 
-        for i, record in enumerate(records[:10]):  # Show first 10 records
-            errors = self._validate_record(record)
+        for i, record in enumerate(records):
+            errors = errors_by_index.get(i, [])
             preview_data.append({
                 'line_number': i + 2,  # +2 because of header and 1-based indexing
                 'title': record.get(self.title_column, ''),
@@ -200,22 +282,30 @@ class ExpenseImportWizard(models.TransientModel):
             }
         }
 
+    @instrumented
     def action_import(self):
         """Perform the actual import"""
         self.ensure_one()
+        if 'import_category_cache' not in self.env.context:
+            return self.with_context(
+                import_category_cache={},
+                import_budget_index=self.env['expense.budget']._get_active_budget_index(self.env.company.id),
+            ).action_import()
 
         records = self._parse_csv_file()
+        payloads, errors_by_index = self._validate_records(records)
         results = {
             'successful': [],
             'failed': []
         }
+        to_create = []
 
-        for i, record in enumerate(records):
+        for i, (record, payload) in enumerate(zip(records, payloads)):
             line_number = i + 2  # +2 because of header and 1-based indexing
 
             try:
                 # Validate record
-                errors = self._validate_record(record)
+                errors = errors_by_index.get(i)
                 if errors:
                     results['failed'].append({
                         'line_number': line_number,
@@ -226,14 +316,9 @@ class ExpenseImportWizard(models.TransientModel):
 
                 # Create or update expense
                 if self.import_type == 'create':
-                    expense = self._create_expense_from_record(record)
-                    results['successful'].append({
-                        'line_number': line_number,
-                        'expense': expense,
-                        'action': 'created'
-                    })
+                    to_create.append((line_number, record, payload))
                 else:
-                    expense = self._update_expense_from_record(record)
+                    expense = self._update_expense_from_record(record, payload)
                     if expense:
                         results['successful'].append({
                             'line_number': line_number,
@@ -254,6 +339,17 @@ class ExpenseImportWizard(models.TransientModel):
                     'errors': [str(e)]
                 })
 
+        if to_create:
+            created, failed = self._create_expenses_from_records(to_create)
+            results['failed'] += failed
+            results['successful'] += [{
+                'line_number': line_number,
+                'expense': expense,
+                'action': 'created'
+            } for (line_number, record, payload), expense in created]
+            results['successful'].sort(key=lambda result: result['line_number'])
+            results['failed'].sort(key=lambda result: result['line_number'])
+
         # Update results
         self.write({
             'total_records': len(records),
@@ -264,6 +360,7 @@ class ExpenseImportWizard(models.TransientModel):
 
         # Show result summary
         if results['failed']:
+            message_type = 'warning'
             message = _(
                 "Import completed with some errors.\n\n"
                 "Successful: %(success)d\n"
@@ -1,13 +1,24 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError, UserError
+from collections import defaultdict
+from markupsafe import Markup
+
+from ..instrumentation import instrumented
 
 
 class ExpenseInvoiceWizard(models.TransientModel):
     _name = 'expense.invoice.wizard'
     _description = 'Create Invoice from Expense Wizard'
 
-    expense_id = fields.Many2one('expense.tracker', string='Expense', required=True)
-    partner_id = fields.Many2one('res.partner', string='Vendor', required=True)
+    expense_id = fields.Many2one('expense.tracker', string='Expense',
+                                 help='Expense billed in single mode; required when no expenses are selected')
+    expense_ids = fields.Many2many('expense.tracker', string='Expenses',
+                                   help='Expenses billed together, one vendor bill per vendor and currency')
+    is_batch = fields.Boolean(string='Batch Mode', compute='_compute_batch_totals')
+    expense_count = fields.Integer(string='Expense Count', compute='_compute_batch_totals')
+    total_amount = fields.Float(string='Total Amount', compute='_compute_batch_totals')
+    partner_id = fields.Many2one('res.partner', string='Vendor',
+                                 help='Vendor used for expenses that have none set')
     product_id = fields.Many2one('product.product', string='Product', required=True)
     journal_id = fields.Many2one('account.journal', string='Journal',
                                  domain=[('type', '=', 'purchase')], required=True)
@@ -37,11 +48,26 @@ class ExpenseInvoiceWizard(models.TransientModel):
             else:
                 wizard.due_date = False
 
+    @api.depends('expense_ids', 'expense_id')
+    def _compute_batch_totals(self):
+        for wizard in self:
+            expenses = wizard.expense_ids or wizard.expense_id
+            wizard.is_batch = len(wizard.expense_ids) > 1
+            wizard.expense_count = len(expenses)
+            wizard.total_amount = sum(expenses.mapped('amount'))
+
     @api.model
     def default_get(self, fields_list):
         res = super().default_get(fields_list)
-        if self._context.get('default_expense_id'):
-            expense = self.env['expense.tracker'].browse(self._context['default_expense_id'])
+        expense_id = self._context.get('default_expense_id')
+        active_ids = self._context.get('active_ids') or []
+        if not expense_id and self._context.get('active_model') == 'expense.tracker':
+            if len(active_ids) > 1:
+                res['expense_ids'] = [(6, 0, active_ids)]
+            elif active_ids:
+                expense_id = res['expense_id'] = active_ids[0]
+        if expense_id:
+            expense = self.env['expense.tracker'].browse(expense_id)
             res.update({
                 'partner_id': expense.partner_id.id,
                 'reference': expense.name,
@@ -58,16 +84,34 @@ class ExpenseInvoiceWizard(models.TransientModel):
                     "Please set an expense account for the product %s."
                 ) % self.product_id.name)
 
-    def action_create_invoice(self):
-        """Create vendor bill from expense"""
-        self.ensure_one()
-
+    def _check_product_account(self):
         if not self.product_id.property_account_expense_id:
             raise UserError(_(
                 "The selected product doesn't have an expense account configured. "
                 "Please set an expense account for the product."
             ))
 
+    def _check_billable(self, expenses):
+        if not expenses:
+            raise UserError(_("Please select the expenses to bill."))
+        if expenses.filtered(lambda expense: expense.state != 'approved'):
+            raise UserError(_("Only approved expenses can be billed."))
+        if expenses.filtered('account_move_id'):
+            raise UserError(_("Some of the selected expenses are already linked to a vendor bill."))
+
+    @instrumented
+    def action_create_invoice(self):
+        """Create vendor bill from expense"""
+        self.ensure_one()
+
+        if self.expense_ids:
+            return self.action_create_invoices()
+
+        self._check_billable(self.expense_id)
+        self._check_product_account()
+        if not self.partner_id:
+            raise UserError(_("Please select a vendor."))
+
         # Create vendor bill
         invoice_vals = {
             'move_type': 'in_invoice',
@@ -100,7 +144,7 @@ class ExpenseInvoiceWizard(models.TransientModel):
 
         # Create payment if requested
         if self.create_payment and self.payment_journal_id:
-            self._create_payment(invoice)
+            self._create_payments(invoice)
 
         # Post message to expense record
         self.expense_id.message_post(
@@ -121,27 +165,115 @@ class ExpenseInvoiceWizard(models.TransientModel):
             'target': 'current',
         }
 
-    def _create_payment(self, invoice):
-        """Create payment for the invoice"""
-        payment_vals = {
+    def _get_invoice_group_key(self, expense):
+        """Expenses sharing a vendor, currency and journal end up on the same bill"""
+        partner = expense.partner_id or self.partner_id
+        currency = expense.currency_id or expense.company_id.currency_id
+        return partner, currency, self.journal_id
+
+    def _prepare_invoice_vals(self, partner, currency, journal, expenses):
+        account = self.product_id.property_account_expense_id
+        return {
+            'move_type': 'in_invoice',
+            'partner_id': partner.id,
+            'currency_id': currency.id,
+            'invoice_date': self.invoice_date,
+            'invoice_date_due': self.due_date,
+            'journal_id': journal.id,
+            'invoice_line_ids': [(0, 0, {
+                'product_id': self.product_id.id,
+                'name': '%s - %s' % (expense.name, expense.title),
+                'quantity': 1,
+                'price_unit': expense.amount,
+                'account_id': account.id,
+            }) for expense in expenses],
+            'ref': self.reference or ', '.join(expenses.mapped('name')),
+        }
+
+    @instrumented
+    def action_create_invoices(self):
+        """Create one vendor bill per vendor/currency/journal for all selected expenses"""
+        self.ensure_one()
+        expenses = self.expense_ids
+        self._check_billable(expenses)
+        self._check_product_account()
+
+        groups = defaultdict(lambda: self.env['expense.tracker'])
+        for expense in expenses:
+            groups[self._get_invoice_group_key(expense)] |= expense
+        if any(not partner for partner, currency, journal in groups):
+            raise UserError(_("Please select a vendor for the expenses that have none."))
+
+        keys = list(groups)
+        invoices = self.env['account.move'].create([
+            self._prepare_invoice_vals(partner, currency, journal, groups[partner, currency, journal])
+            for partner, currency, journal in keys
+        ])
+        invoices.filtered(lambda move: move.state == 'draft').action_post()
+
+        for invoice, key in zip(invoices, keys):
+            groups[key].write({
+                'account_move_id': invoice.id,
+                'state': 'paid',
+                'partner_id': invoice.partner_id.id,
+            })
+
+        if self.create_payment and self.payment_journal_id:
+            self._create_payments(invoices)
+
+        expenses._message_log_batch(bodies={
+            expense.id: Markup(_(
+                "Vendor bill created: <a href=# data-oe-model=account.move data-oe-id=%(invoice_id)d>%(invoice_name)s</a>"
+            )) % {
+                'invoice_id': expense.account_move_id.id,
+                'invoice_name': expense.account_move_id.name,
+            } for expense in expenses
+        })
+
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Vendor Bills'),
+            'res_model': 'account.move',
+            'view_mode': 'tree,form',
+            'domain': [('id', 'in', invoices.ids)],
+            'target': 'current',
+        }
+
+    def _create_payments(self, invoices):
+        """Create and post one payment per invoice, then reconcile them"""
+        payments = self.env['account.payment'].create([{
             'amount': abs(invoice.amount_total),
             'payment_type': 'outbound',
             'partner_type': 'supplier',
-            'partner_id': self.partner_id.id,
+            'partner_id': invoice.partner_id.id,
+            'currency_id': invoice.currency_id.id,
             'journal_id': self.payment_journal_id.id,
             'date': self.payment_date,
             'ref': _("Payment for %s") % invoice.name,
-        }
+        } for invoice in invoices])
+        payments.action_post()
 
-        payment = self.env['account.payment'].create(payment_vals)
-        payment.action_post()
+        self._reconcile_payments(invoices, payments)
+        return payments
+
+    @api.model
+    def _reconcile_payments(self, invoices, payments):
+        """Reconcile the payable lines of a whole batch of bills and payments.
 
-        # Reconcile payment with invoice
-        if invoice.state == 'posted':
-            (invoice + payment.move_id).line_ids.filtered(
-                lambda line: line.account_id == invoice.line_ids.account_id.filtered(
-                    lambda acc: acc.account_type in ('asset_receivable', 'liability_payable')
-                )
-            ).reconcile()
+        Open receivable/payable lines are bucketed by commercial partner, account
+        and currency in a single pass, then each bucket holding both debits and
+        credits is reconciled once.
+        """
+        moves = invoices.filtered(lambda move: move.state == 'posted') | payments.move_id
+        groups = defaultdict(list)
+        for line in moves.line_ids:
+            if line.reconciled or line.account_id.account_type not in ('asset_receivable', 'liability_payable'):
+                continue
+            key = (line.partner_id.commercial_partner_id.id, line.account_id.id, line.currency_id.id)
+            groups[key].append(line.id)
 
-        return payment
\ No newline at end of file
+        MoveLine = self.env['account.move.line']
+        for line_ids in groups.values():
+            lines = MoveLine.browse(line_ids)
+            if any(line.balance > 0 for line in lines) and any(line.balance < 0 for line in lines):
+                lines.reconcile()
@@ -3,9 +3,41 @@ odoo.define('expense_tracker_advanced.budget_progress', function (require) {
 
     var AbstractField = require('web.AbstractField');
     var field_registry = require('web.field_registry');
+    var rpc = require('web.rpc');
     var core = require('web.core');
     var _t = core._t;
 
+    /**
+     * Coalesces the budget ids requested by all widgets rendered within the
+     * same tick into a single get_progress_data call.
+     */
+    var BudgetProgressLoader = {
+        batch: null,
+
+        load: function (budgetId) {
+            var self = this;
+            if (!this.batch) {
+                var batch = this.batch = {ids: []};
+                batch.promise = new Promise(function (resolve) {
+                    setTimeout(resolve, 0);
+                }).then(function () {
+                    self.batch = null;
+                    return rpc.query({
+                        model: 'expense.budget',
+                        method: 'get_progress_data',
+                        args: [batch.ids],
+                    });
+                });
+            }
+            if (this.batch.ids.indexOf(budgetId) === -1) {
+                this.batch.ids.push(budgetId);
+            }
+            return this.batch.promise.then(function (data) {
+                return data[budgetId];
+            });
+        },
+    };
+
     // Budget Progress Field Widget
     var BudgetProgress = AbstractField.extend({
         className: 'o_field_budget_progress',
@@ -39,15 +71,11 @@ odoo.define('expense_tracker_advanced.budget_progress', function (require) {
             var budgetId = this.record.data.budget_id && this.record.data.budget_id[0];
 
             if (budgetId) {
-                return this._rpc({
-                    model: 'expense.budget',
-                    method: 'read',
-                    args: [[budgetId], ['amount', 'spent_amount', 'utilization_percentage']]
-                }).then(function (result) {
-                    if (result && result[0]) {
-                        self.budgetAmount = result[0].amount;
-                        self.spentAmount = result[0].spent_amount;
-                        self.utilization = result[0].utilization_percentage;
+                return BudgetProgressLoader.load(budgetId).then(function (result) {
+                    if (result) {
+                        self.budgetAmount = result.amount;
+                        self.spentAmount = result.spent_amount;
+                        self.utilization = result.utilization_percentage;
                     }
                     return result;
                 });
@@ -166,6 +194,7 @@ odoo.define('expense_tracker_advanced.budget_progress', function (require) {
     field_registry.add('budget_utilization', BudgetUtilization);
 
     return {
+        BudgetProgressLoader: BudgetProgressLoader,
         BudgetProgress: BudgetProgress,
         BudgetUtilization: BudgetUtilization,
     };
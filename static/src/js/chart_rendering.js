@@ -38,6 +38,31 @@ odoo.define('expense_tracker_advanced.chart_rendering', function (require) {
             }
         },
 
+        /**
+         * Add server-side deltas to the current series in place.
+         *
+         * @param {Object} values amount to add per series key
+         * @param {Object} [labels] label to use for keys not plotted yet
+         */
+        applyDelta: function (values, labels) {
+            var data = this.data;
+            data.keys = data.keys || data.labels.slice();
+            _.each(values, function (value, key) {
+                var index = _.findIndex(data.keys, function (existing) {
+                    return String(existing) === key;
+                });
+                if (index === -1) {
+                    // ordered series (months) keep their order, others append
+                    index = data.ordered ? _.sortedIndex(data.keys, key) : data.keys.length;
+                    data.keys.splice(index, 0, key);
+                    data.labels.splice(index, 0, (labels && labels[key]) || key);
+                    data.values.splice(index, 0, 0);
+                }
+                data.values[index] += value;
+            });
+            this.updateData(data);
+        },
+
         _processData: function (data) {
             return data;
         },
@@ -214,7 +239,7 @@ odoo.define('expense_tracker_advanced.chart_rendering', function (require) {
             var self = this;
 
             _.each(this.chartsConfig, function (config, chartId) {
-                var $container = self.$el.find('#' + chartId);
+                var $container = self.$el.find('#' + config.container);
                 if ($container.length) {
                     self.charts[chartId] = self._createChart(config.type, config);
                 }
@@ -250,6 +275,13 @@ odoo.define('expense_tracker_advanced.chart_rendering', function (require) {
             }
         },
 
+        applyDelta: function (chartId, values, labels) {
+            var chart = this.charts[chartId];
+            if (chart) {
+                chart.applyDelta(values, labels);
+            }
+        },
+
         refreshAll: function () {
             var self = this;
             return this._rpc({
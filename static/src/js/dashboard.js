@@ -2,35 +2,142 @@ odoo.define('expense_tracker_advanced.dashboard', function (require) {
     "use strict";
 
     var FormController = require('web.FormController');
-    var FormView = require('web.FormView');
     var FormRenderer = require('web.FormRenderer');
-    var core = require('web.core');
-    var _t = core._t;
+    var ChartRendering = require('expense_tracker_advanced.chart_rendering');
+    var DashboardLoader = require('expense_tracker_advanced.dashboard_loader');
+    var RecentActivityFeed = require('expense_tracker_advanced.recent_activity');
+
+    var DASHBOARD_DELTA = 'expense_tracker/dashboard_delta';
+    var KPI_FIELDS = ['total_expenses', 'monthly_expenses', 'pending_approval',
+                      'budget_utilization', 'remaining_budget'];
 
     var ExpenseDashboardRenderer = FormRenderer.extend({
-        start: function () {
+        custom_events: _.extend({}, FormRenderer.prototype.custom_events, {
+            feed_count: '_onFeedCount',
+        }),
+
+        /**
+         * Chart series are fetched once; re-renders reuse them and bus deltas
+         * keep them up to date.
+         */
+        _renderView: function () {
             var self = this;
             return this._super.apply(this, arguments).then(function () {
-                self._renderCharts();
-                return self;
+                return Promise.all([
+                    self._renderCharts(), self._renderRecentActivity(), self._renderApprovalQueue(),
+                ]);
             });
         },
 
+        /**
+         * Expenses waiting for the current user's approval, oldest submission
+         * first, paged along the approval queue index.
+         */
+        _renderApprovalQueue: function () {
+            if (this.approvalQueue) {
+                this.approvalQueue.destroy();
+            }
+            this.approvalQueue = new RecentActivityFeed(this, {
+                model: 'expense.tracker',
+                method: 'get_approval_queue',
+            });
+            return this.approvalQueue.appendTo(this.$('#approvalQueueContainer'));
+        },
+
+        _onFeedCount: function (ev) {
+            ev.stopPropagation();
+            this.$('.o_expense_approval_count').text(ev.data.count);
+        },
+
+        _renderRecentActivity: function () {
+            if (this.activityFeed) {
+                this.activityFeed.destroy();
+            }
+            this.activityFeed = new RecentActivityFeed(this);
+            return this.activityFeed.appendTo(this.$('#recentActivityContainer'));
+        },
+
+        _loadChartData: function () {
+            if (!this.chartData) {
+                this.chartData = this._rpc({
+                    model: 'expense.tracker',
+                    method: 'get_chart_data',
+                    args: [{}],
+                });
+            }
+            return this.chartData;
+        },
+
         _renderCharts: function () {
-            // Check if Chart.js is available
-            if (typeof Chart === 'undefined') {
-                console.warn('Chart.js is not loaded.');
-                return;
+            var self = this;
+            return this._loadChartData().then(function (data) {
+                if (self.chartManager) {
+                    self.chartManager.destroy();
+                }
+                self.chartManager = new ChartRendering.ChartManager(self, {
+                    categoryChart: {type: 'pie', container: 'categoryChartContainer', data: data.categoryChart},
+                    trendChart: {type: 'line', container: 'trendChartContainer', data: data.trendChart},
+                });
+                return self.chartManager.attachTo(self.$('.o_expense_dashboard'));
+            });
+        },
+
+        /**
+         * Apply an aggregated delta published by the server: chart series are
+         * updated in place, KPI cards are recomputed from the running totals.
+         */
+        applyDelta: function (delta) {
+            if (this.chartManager) {
+                this.chartManager.applyDelta('categoryChart', delta.categoryChart, delta.labels);
+                this.chartManager.applyDelta('trendChart', delta.trendChart);
             }
 
-            // Render Category Chart
-            var categoryCtx = document.getElementById('categoryChart');
-            if (categoryCtx) {
-                new Chart(categoryCtx, {
-                    type: 'pie',
-                    data: {
-                        labels: ['Office', 'Travel', 'Meals'],
-                        datasets: [{
-                            data: [300, 50, 100],
-                            backgroundColor: [
-                                'rgb
\ No newline at end of file
+            var totals = delta.totals || {};
+            var data = this.state.data;
+            var totalBudget = data.total_expenses + data.remaining_budget + (totals.total_budget || 0);
+            data.total_expenses += totals.total_expenses || 0;
+            data.monthly_expenses += totals.monthly_expenses || 0;
+            data.pending_approval += totals.pending_approval || 0;
+            data.remaining_budget = totalBudget - data.total_expenses;
+            data.budget_utilization = totalBudget ? data.total_expenses / totalBudget * 100 : 0;
+            return this.confirmChange(this.state, this.state.id, KPI_FIELDS);
+        },
+
+        destroy: function () {
+            if (this.chartManager) {
+                this.chartManager.destroy();
+            }
+            this._super.apply(this, arguments);
+        },
+    });
+
+    var ExpenseDashboardController = FormController.extend({
+        start: function () {
+            this._onBusNotification = this._onBusNotification.bind(this);
+            this.call('bus_service', 'addEventListener', 'notification', this._onBusNotification);
+            return this._super.apply(this, arguments);
+        },
+
+        destroy: function () {
+            this.call('bus_service', 'removeEventListener', 'notification', this._onBusNotification);
+            this._super.apply(this, arguments);
+        },
+
+        _onBusNotification: function (ev) {
+            var self = this;
+            _.each(ev.detail, function (notification) {
+                if (notification.type === DASHBOARD_DELTA) {
+                    self.renderer.applyDelta(notification.payload);
+                }
+            });
+        },
+    });
+
+    DashboardLoader.components.Controller = ExpenseDashboardController;
+    DashboardLoader.components.Renderer = ExpenseDashboardRenderer;
+
+    return {
+        ExpenseDashboardController: ExpenseDashboardController,
+        ExpenseDashboardRenderer: ExpenseDashboardRenderer,
+    };
+});
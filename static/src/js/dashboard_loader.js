@@ -0,0 +1,38 @@
+odoo.define('expense_tracker_advanced.dashboard_loader', function (require) {
+    "use strict";
+
+    var FormView = require('web.FormView');
+    var viewRegistry = require('web.view_registry');
+
+    var DASHBOARD_BUNDLE = 'expense_tracker_advanced.assets_dashboard';
+
+    /**
+     * Filled by the modules of the lazy dashboard bundle once it is loaded.
+     */
+    var components = {};
+
+    /**
+     * Only this stub lives in the backend bundle: Chart.js, the chart widgets
+     * and the dashboard controller/renderer are fetched with the view's
+     * assetLibs the first time a dashboard is opened.
+     */
+    var ExpenseDashboardView = FormView.extend({
+        assetLibs: [DASHBOARD_BUNDLE],
+
+        getRenderer: function () {
+            this.config = _.extend({}, this.config, {
+                Controller: components.Controller,
+                Renderer: components.Renderer,
+            });
+            return this._super.apply(this, arguments);
+        },
+    });
+
+    viewRegistry.add('expense_dashboard', ExpenseDashboardView);
+
+    return {
+        DASHBOARD_BUNDLE: DASHBOARD_BUNDLE,
+        ExpenseDashboardView: ExpenseDashboardView,
+        components: components,
+    };
+});
@@ -8,6 +8,11 @@ odoo.define('expense_tracker_advanced.expense_form', function (require) {
     var core = require('web.core');
     var _t = core._t;
 
+    // Budget suggestions cached per (category, date, company), shared by all forms
+    var BUDGET_CACHE_TTL = 60000;
+    var BUDGET_DEBOUNCE_DELAY = 300;
+    var budgetCache = {};
+
     // Expense Form Controller
     var ExpenseFormController = FormController.extend({
         custom_events: _.extend({}, FormController.prototype.custom_events, {
@@ -22,6 +27,11 @@ odoo.define('expense_tracker_advanced.expense_form', function (require) {
         init: function (parent, model, renderer, params) {
             this._super.apply(this, arguments);
             this.budgetData = {};
+            this.receiptPreviewUrl = null;
+            this._debouncedUpdateBudgetSuggestions = _.debounce(
+                this._updateBudgetSuggestions.bind(this), BUDGET_DEBOUNCE_DELAY);
+            this._debouncedCheckBudgetLimits = _.debounce(
+                this._checkBudgetLimits.bind(this), BUDGET_DEBOUNCE_DELAY);
         },
 
         /**
@@ -35,45 +45,97 @@ odoo.define('expense_tracker_advanced.expense_form', function (require) {
         },
 
         /**
-         * Load budget data for the current user/company
+         * Load budget data for the category of the current record
          */
         _loadBudgetData: function () {
+            var data = this.renderer.state.data;
+            var categoryId = data.category_id && data.category_id.res_id;
+            if (!categoryId) {
+                return Promise.resolve();
+            }
+            return this._fetchBudgets(categoryId);
+        },
+
+        /**
+         * Fetch the active budgets of a category, answered from the shared cache
+         * while it is fresh. Concurrent requests for the same key share one RPC.
+         */
+        _fetchBudgets: function (categoryId) {
             var self = this;
-            return this._rpc({
-                model: 'expense.budget',
-                method: 'get_available_budgets',
-                args: [this.renderer.state.context]
-            }).then(function (data) {
-                self.budgetData = data;
-                return data;
+            var data = this.renderer.state.data;
+            var expenseDate = data.date ? data.date.format('YYYY-MM-DD') : false;
+            var companyId = data.company_id && data.company_id.res_id;
+            var key = [categoryId, expenseDate, companyId].join('|');
+            var entry = budgetCache[key];
+
+            if (!entry || Date.now() - entry.time > BUDGET_CACHE_TTL) {
+                entry = budgetCache[key] = {
+                    time: Date.now(),
+                    promise: this._rpc({
+                        model: 'expense.budget',
+                        method: 'get_available_budgets',
+                        kwargs: {
+                            category_id: categoryId,
+                            expense_date: expenseDate,
+                            company_id: companyId,
+                        },
+                    }).then(function (result) {
+                        return result[categoryId] || [];
+                    }).guardedCatch(function () {
+                        delete budgetCache[key];
+                    }),
+                };
+            }
+            return entry.promise.then(function (budgets) {
+                self.budgetData[categoryId] = budgets;
+                return budgets;
             });
         },
 
         /**
          * Handle receipt upload event
+         *
+         * The preview points at an object URL instead of a base64 data-URL so the
+         * file is never read into memory in full.
          */
         _onReceiptUploaded: function (event) {
             var file = event.data.file;
             var $preview = this.$el.find('.receipt-preview-container');
 
+            if (this.receiptPreviewUrl) {
+                URL.revokeObjectURL(this.receiptPreviewUrl);
+                this.receiptPreviewUrl = null;
+            }
             if (file) {
-                var reader = new FileReader();
-                reader.onload = function (e) {
-                    $preview.html(
-                        '<img src="' + e.target.result + '" class="receipt-preview-image" alt="Receipt Preview"/>' +
-                        '<div class="mt-2">' + file.name + '</div>'
-                    );
-                };
-                reader.readAsDataURL(file);
+                var $content = $('<div class="mt-2"/>').text(file.name);
+                if (file.type && file.type.indexOf('image/') === 0) {
+                    this.receiptPreviewUrl = URL.createObjectURL(file);
+                    $content = $('<img class="receipt-preview-image" alt="Receipt Preview"/>')
+                        .attr('src', this.receiptPreviewUrl)
+                        .add($content);
+                }
+                $preview.empty().append($content);
             }
         },
 
+        /**
+         * @override
+         */
+        destroy: function () {
+            this._debouncedUpdateBudgetSuggestions.cancel();
+            this._debouncedCheckBudgetLimits.cancel();
+            if (this.receiptPreviewUrl) {
+                URL.revokeObjectURL(this.receiptPreviewUrl);
+            }
+            this._super.apply(this, arguments);
+        },
+
         /**
          * Handle category change event
          */
         _onCategoryChanged: function (event) {
-            var categoryId = event.data.categoryId;
-            this._updateBudgetSuggestions(categoryId);
+            var categoryId = parseInt(event.data.categoryId, 10) || false;
+            this._debouncedUpdateBudgetSuggestions(categoryId);
         },
 
         /**
@@ -81,27 +143,30 @@ odoo.define('expense_tracker_advanced.expense_form', function (require) {
          */
         _onAmountChanged: function (event) {
             var amount = event.data.amount;
-            this._checkBudgetLimits(amount);
+            this._debouncedCheckBudgetLimits(amount);
         },
 
         /**
          * Update budget suggestions based on selected category
          */
         _updateBudgetSuggestions: function (categoryId) {
-            var $budgetField = this.$el.find('.o_field_widget[name="budget_id"]');
-            var budgets = this.budgetData[categoryId] || [];
-
-            // Update budget field options
-            if (budgets.length === 1) {
-                // Auto-select if only one budget available
-                this.renderer.trigger('field_changed', {
-                    dataPointID: this.renderer.state.id,
-                    changes: { budget_id: budgets[0].id }
-                });
+            var self = this;
+            if (!categoryId) {
+                return Promise.resolve();
             }
-
-            // Show budget information
-            this._displayBudgetInfo(categoryId);
+            return this._fetchBudgets(categoryId).then(function (budgets) {
+                // Update budget field options
+                if (budgets.length === 1) {
+                    // Auto-select if only one budget available
+                    self.renderer.trigger('field_changed', {
+                        dataPointID: self.renderer.state.id,
+                        changes: { budget_id: budgets[0].id }
+                    });
+                }
+
+                // Show budget information
+                self._displayBudgetInfo(categoryId);
+            });
         },
 
         /**
@@ -154,10 +219,14 @@ odoo.define('expense_tracker_advanced.expense_form', function (require) {
          * Check budget limits and show warnings
          */
         _checkBudgetLimits: function (amount) {
-            var categoryId = this.renderer.state.data.category_id && this.renderer.state.data.category_id[0];
+            var category = this.renderer.state.data.category_id;
+            var categoryId = category && (category.res_id || category[0]);
             if (!categoryId) return;
 
-            var budgets = this.budgetData[categoryId] || [];
+            if (!this.budgetData[categoryId]) {
+                return this._fetchBudgets(categoryId).then(this._checkBudgetLimits.bind(this, amount));
+            }
+            var budgets = this.budgetData[categoryId];
             if (budgets.length === 0) return;
 
             var budget = budgets[0];
@@ -0,0 +1,120 @@
+odoo.define('expense_tracker_advanced.recent_activity', function (require) {
+    "use strict";
+
+    var core = require('web.core');
+    var Widget = require('web.Widget');
+    var field_utils = require('web.field_utils');
+    var QWeb = core.qweb;
+
+    /**
+     * Recent activity feed of the dashboard.
+     *
+     * Pages come from `get_recent_activity` with a (date, id) keyset cursor and
+     * only the rows in (or near) the viewport are in the DOM, so the feed stays
+     * cheap however far the user scrolls. The `model` and `method` options
+     * page any other keyset-paginated RPC with the same contract, such as the
+     * approval queue; when its pages carry the `count` of the whole list, it
+     * is reported with a `feed_count` event.
+     */
+    var RecentActivityFeed = Widget.extend({
+        template: 'RecentActivityFeed',
+        events: {
+            'scroll': '_onScroll',
+        },
+        pageSize: 40,
+        rowHeight: 72,
+        overscan: 5,
+
+        init: function (parent, options) {
+            this._super.apply(this, arguments);
+            options = options || {};
+            this.pageSize = options.pageSize || this.pageSize;
+            this.model = options.model || 'expense.tracker.dashboard';
+            this.method = options.method || 'get_recent_activity';
+            this.records = [];
+            this.next = null;
+            this.done = false;
+            this.loading = null;
+        },
+
+        willStart: function () {
+            return Promise.all([this._super.apply(this, arguments), this._fetchPage()]);
+        },
+
+        start: function () {
+            var self = this;
+            return this._super.apply(this, arguments).then(function () {
+                self.$content = self.$('.o_expense_activity_content');
+                self._render();
+            });
+        },
+
+        _fetchPage: function () {
+            var self = this;
+            if (this.loading || this.done) {
+                return this.loading || Promise.resolve();
+            }
+            this.loading = this._rpc({
+                model: this.model,
+                method: this.method,
+                kwargs: {after: this.next, limit: this.pageSize},
+            }).then(function (page) {
+                self.records = self.records.concat(page.records);
+                if (page.count !== undefined) {
+                    self.trigger_up('feed_count', {count: page.count});
+                }
+                self.next = page.next;
+                self.done = !page.next;
+                self.loading = null;
+                if (self.$content) {
+                    self._render();
+                }
+            }, function () {
+                self.loading = null;
+            });
+            return this.loading;
+        },
+
+        /**
+         * Render the rows intersecting the viewport, absolutely positioned
+         * inside a spacer sized for every loaded row.
+         */
+        _render: function () {
+            var scrollTop = this.el.scrollTop;
+            var height = this.el.clientHeight;
+            var first = Math.max(0, Math.floor(scrollTop / this.rowHeight) - this.overscan);
+            var last = Math.min(this.records.length,
+                Math.ceil((scrollTop + height) / this.rowHeight) + this.overscan);
+            var count = this.records.length;
+            if (first === this.renderedFirst && last === this.renderedLast && count === this.renderedCount) {
+                return;
+            }
+            this.renderedFirst = first;
+            this.renderedLast = last;
+            this.renderedCount = count;
+
+            this.$content.css('height', count * this.rowHeight);
+            this.$content.html(QWeb.render('RecentActivityFeedRows', {
+                widget: this,
+                rows: this.records.slice(first, last),
+                offset: first,
+            }));
+        },
+
+        _formatAmount: function (record) {
+            return field_utils.format.monetary(record.amount, null, {
+                currency_id: record.currency_id && record.currency_id[0],
+            });
+        },
+
+        _onScroll: function () {
+            var remaining = this.el.scrollHeight - this.el.scrollTop - this.el.clientHeight;
+            if (remaining < this.rowHeight * this.overscan) {
+                this._fetchPage();
+            }
+            this._render();
+        },
+    });
+
+    return RecentActivityFeed;
+});
@@ -1,16 +0,0 @@
-// This is a placeholder for Chart.js library
-// In production, you should include the actual Chart.js library
-// You can download it from: https://www.chartjs.org/
-// Or use CDN: https://cdn.jsdelivr.net/npm/chart.js
-
-console.log('Chart.js placeholder - include the actual library in production');
-
-// Minimal implementation for development
-window.Chart = window.Chart || function () {
-    console.warn('Chart.js not loaded - using placeholder');
-    return {
-        destroy: function () { },
-        update: function () { },
-        resize: function () { }
-    };
-};
\ No newline at end of file
@@ -0,0 +1,12 @@
+from . import test_query_plans
+from . import test_query_counts
+from . import test_benchmarks
+from . import test_instrumentation
+from . import test_budget_ledger
+from . import test_budget_enforcement
+from . import test_categorization
+from . import test_expense_anomaly
+from . import test_approval_queue
+from . import test_expense_archive
+from . import test_data_version
+from . import test_category_rollups
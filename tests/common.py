@@ -0,0 +1,83 @@
+from datetime import date, timedelta
+
+
+class ExpenseDataGenerator:
+    """Seed large volumes of synthetic expense data.
+
+    Categories and budgets are few and go through the ORM; expenses are
+    inserted with a single ``generate_series`` statement, which keeps seeding
+    a million rows within seconds.
+    """
+
+    STATES = ('draft', 'submitted', 'approved', 'rejected', 'paid')
+
+    def __init__(self, env):
+        self.env = env
+
+    def categories(self, roots=5, children=4, prefix='Bench'):
+        Category = self.env['expense.category']
+        parents = Category.create([{'name': '%s %d' % (prefix, index)} for index in range(roots)])
+        subcategories = Category.create([
+            {'name': '%s %d.%d' % (prefix, index, child), 'parent_id': parent.id}
+            for index, parent in enumerate(parents)
+            for child in range(children)
+        ])
+        return parents | subcategories
+
+    def budgets(self, categories, amount=100000.0, days=365):
+        return self.env['expense.budget'].create([{
+            'name': 'Budget %s' % category.name,
+            'category_id': category.id,
+            'amount': amount,
+            'date_from': date.today() - timedelta(days=days),
+            'date_to': date.today(),
+            'state': 'active',
+        } for category in categories])
+
+    def expenses(self, count, categories, budgets=None, states=STATES, days=730,
+                 partner=None, company=None, user=None):
+        """Insert ``count`` expenses spread over ``categories``, ``states`` and
+        the last ``days`` days; expenses are linked to the budget of their
+        category in ``budgets``, created for the categories that have none
+        (the budget is required).
+
+        :return: the ids of the inserted expenses
+        """
+        company = company or self.env.company
+        budget_by_category = {budget.category_id.id: budget.id for budget in budgets or []}
+        missing = categories.filtered(lambda category: category.id not in budget_by_category)
+        if missing:
+            budget_by_category.update({budget.category_id.id: budget.id for budget in self.budgets(missing)})
+        category_ids = categories.ids
+        self.env.flush_all()
+        self.env.cr.execute("""
+            INSERT INTO expense_tracker (name, title, amount, category_id, budget_id, date, state,
+                                         partner_id, user_id, company_id, currency_id,
+                                         create_uid, write_uid, create_date, write_date)
+            SELECT 'EXP/BENCH/' || n, 'Expense ' || n, 1 + n %% 500,
+                   (%(categories)s::int[])[1 + n %% %(category_count)s],
+                   (%(budgets)s::int[])[1 + n %% %(category_count)s],
+                   CURRENT_DATE - (n %% %(days)s), (%(states)s::varchar[])[1 + n %% %(state_count)s],
+                   %(partner)s, %(uid)s, %(company)s, %(currency)s, %(uid)s, %(uid)s, now(), now()
+              FROM generate_series(1, %(count)s) AS n
+         RETURNING id
+        """, {
+            'categories': category_ids,
+            'category_count': len(category_ids),
+            'budgets': [budget_by_category.get(category_id) for category_id in category_ids],
+            'days': days,
+            'states': list(states),
+            'state_count': len(states),
+            'partner': partner.id if partner else None,
+            'uid': (user or self.env.user).id,
+            'company': company.id,
+            'currency': company.currency_id.id,
+            'count': count,
+        })
+        ids = [row[0] for row in self.env.cr.fetchall()]
+        # the insert bypasses the spend ledger and the queue counters: rebuild them
+        self.env['expense.budget']._rebuild_spent_ledger(list(budget_by_category.values()))
+        self.env['expense.approval.counter']._rebuild_counters()
+        self.env.cr.execute("ANALYZE expense_tracker")
+        self.env.invalidate_all()
+        return ids
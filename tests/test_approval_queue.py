@@ -0,0 +1,102 @@
+from odoo.tests import TransactionCase, tagged
+
+from .common import ExpenseDataGenerator
+
+
+@tagged('post_install', '-at_install')
+class TestApprovalQueue(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Users = cls.env['res.users'].with_context(no_reset_password=True)
+        cls.approver = Users.create({
+            'name': 'Approver',
+            'login': 'queue_approver',
+            'groups_id': [(6, 0, cls.env.ref('expense_tracker_advanced.group_expense_user').ids)],
+        })
+        cls.other_approver = Users.create({'name': 'Other Approver', 'login': 'queue_other_approver'})
+        cls.parent = cls.env['expense.category'].create({'name': 'Queue', 'approver_id': cls.approver.id})
+        cls.child = cls.env['expense.category'].create({'name': 'Queue Child', 'parent_id': cls.parent.id})
+        cls.unassigned = cls.env['expense.category'].create({'name': 'Queue Unassigned'})
+        cls.budgets = {
+            budget.category_id: budget
+            for budget in ExpenseDataGenerator(cls.env).budgets(cls.parent | cls.child | cls.unassigned)
+        }
+        cls.Counter = cls.env['expense.approval.counter']
+        cls.company_ids = cls.env.companies.ids
+
+    def _create_expenses(self, category, count):
+        return self.env['expense.tracker'].create([{
+            'title': 'Queue %d' % index,
+            'amount': 10.0,
+            'category_id': category.id,
+            'budget_id': self.budgets[category].id,
+        } for index in range(count)])
+
+    def _count(self, approver_id=None):
+        return self.Counter.get_pending_count(self.company_ids, approver_id)
+
+    def test_assignment(self):
+        expenses = self._create_expenses(self.child, 2) | self._create_expenses(self.unassigned, 1)
+        expenses.action_submit()
+        self.assertEqual(expenses[:2].approver_id, self.approver, "Approver inherited from the parent category")
+        self.assertFalse(expenses[2].approver_id, "No approver: shared queue")
+        self.assertTrue(all(expenses.mapped('submit_date')))
+
+        self.child.approver_id = self.other_approver
+        self.assertEqual(expenses[:2].approver_id, self.other_approver)
+
+    def test_counters(self):
+        initial = self._count(self.approver.id)
+        expenses = self._create_expenses(self.parent, 5)
+        expenses.action_submit()
+        self.assertEqual(self._count(self.approver.id), initial + 5)
+
+        expenses[:2].action_approve()
+        expenses[2].unlink()
+        self.assertEqual(self._count(self.approver.id), initial + 2)
+
+        self.parent.approver_id = self.other_approver
+        self.assertEqual(self._count(self.approver.id), initial)
+        self.assertEqual(self._count(self.other_approver.id), 2)
+
+        total = self._count()
+        self.Counter._cron_fold_counters()
+        self.assertEqual(self._count(), total)
+        self.assertEqual(self._count(self.other_approver.id), 2)
+
+        self.Counter._rebuild_counters()
+        self.assertEqual(self._count(), total)
+
+    def test_counters_without_company(self):
+        initial = self._count(self.approver.id)
+        expenses = self._create_expenses(self.parent, 2)
+        expenses.write({'company_id': False})
+        expenses.action_submit()
+        self.assertEqual(self._count(self.approver.id), initial + 2, "Expenses without company count everywhere")
+
+    def test_queue_pages(self):
+        expenses = self._create_expenses(self.parent, 5)
+        expenses.action_submit()
+        Expense = self.env['expense.tracker'].with_user(self.approver)
+        seen = []
+        after = None
+        while True:
+            page = Expense.get_approval_queue(after=after, limit=2)
+            self.assertEqual(page['count'], 5)
+            seen += [record['id'] for record in page['records']]
+            after = page['next']
+            if not after:
+                break
+        self.assertEqual(seen, expenses.ids, "Oldest submission first, each expense once")
+
+    def test_approver_rule(self):
+        expenses = self._create_expenses(self.parent, 2)
+        expenses.action_submit()
+        Expense = self.env['expense.tracker'].with_user(self.approver)
+        self.assertEqual(Expense.search([('id', 'in', expenses.ids)]), expenses)
+
+        expenses[0].action_approve()
+        self.assertEqual(Expense.search([('id', 'in', expenses.ids)]), expenses[1],
+                         "Approvers only see the expenses waiting for them")
@@ -0,0 +1,160 @@
+import base64
+import json
+import logging
+import os
+import time
+from datetime import date, timedelta
+from contextlib import contextmanager
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+from odoo.tests import TransactionCase, tagged
+
+from .common import ExpenseDataGenerator
+
+_logger = logging.getLogger(__name__)
+
+# Run with --test-tags expense_benchmark; scale with EXPENSE_BENCHMARK_SIZE
+# (10000 to 1000000) and record new baselines with EXPENSE_BENCHMARK_UPDATE=1.
+# Query counts do not depend on the machine, wall times do: record the
+# baselines on the machine the benchmarks are compared on, and widen
+# EXPENSE_BENCHMARK_TIME_TOLERANCE on noisy ones. Benchmarks without a
+# recorded baseline are measured and logged, then reported as skipped.
+BENCHMARK_SIZE = int(os.environ.get('EXPENSE_BENCHMARK_SIZE', 10000))
+UPDATE_BASELINES = os.environ.get('EXPENSE_BENCHMARK_UPDATE') == '1'
+TIME_TOLERANCE = float(os.environ.get('EXPENSE_BENCHMARK_TIME_TOLERANCE', 1.5))
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), 'benchmark_baselines.json')
+
+
+def _load_baselines():
+    with open(BASELINES_PATH) as baselines_file:
+        return json.load(baselines_file)
+
+
+class ExpenseBenchmarkMixin:
+    """Time hot paths and compare query count and wall time to the baselines
+    recorded for the current ``EXPENSE_BENCHMARK_SIZE``."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.benchmark_results = {}
+        cls.baselines = _load_baselines().get(str(BENCHMARK_SIZE), {})
+
+    @classmethod
+    def tearDownClass(cls):
+        if UPDATE_BASELINES and cls.benchmark_results:
+            baselines = _load_baselines()
+            baselines.setdefault(str(BENCHMARK_SIZE), {}).update(cls.benchmark_results)
+            with open(BASELINES_PATH, 'w') as baselines_file:
+                json.dump(baselines, baselines_file, indent=4, sort_keys=True)
+                baselines_file.write('\n')
+        super().tearDownClass()
+
+    @contextmanager
+    def benchmark(self, name):
+        """Measure the queries and wall time of the block, caches cold"""
+        self.env.flush_all()
+        self.env.invalidate_all()
+        self.env['expense.budget.statistics'].invalidate_statistics()
+        self.env.registry.clear_caches()
+
+        queries = self.env.cr.sql_log_count
+        start = time.perf_counter()
+        yield
+        self.env.flush_all()
+        elapsed = time.perf_counter() - start
+        queries = self.env.cr.sql_log_count - queries
+
+        _logger.info("benchmark %s [%d expenses]: %d queries, %.3fs", name, BENCHMARK_SIZE, queries, elapsed)
+        self.benchmark_results[name] = {'queries': queries, 'time': round(elapsed, 4)}
+        if UPDATE_BASELINES:
+            return
+        baseline = self.baselines.get(name)
+        # a missing baseline must not pass silently
+        if not baseline:
+            self.skipTest("%s: no baseline recorded for %d expenses, run with EXPENSE_BENCHMARK_UPDATE=1"
+                          % (name, BENCHMARK_SIZE))
+        self.assertLessEqual(queries, baseline['queries'],
+                             "%s: query count regressed (baseline %d)" % (name, baseline['queries']))
+        self.assertLessEqual(elapsed, baseline['time'] * TIME_TOLERANCE,
+                             "%s: wall time regressed (baseline %.3fs)" % (name, baseline['time']))
+
+
+@tagged('expense_benchmark', '-standard', 'post_install', '-at_install')
+class TestExpenseBenchmarks(ExpenseBenchmarkMixin, TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        generator = ExpenseDataGenerator(cls.env)
+        cls.categories = generator.categories()
+        cls.budgets = generator.budgets(cls.categories)
+        generator.expenses(BENCHMARK_SIZE, cls.categories, cls.budgets)
+
+    def test_dashboard_data(self):
+        dashboard = self.env['expense.tracker.dashboard'].create({})
+        with self.benchmark('dashboard_data'):
+            dashboard.read(['total_expenses', 'monthly_expenses', 'pending_approval',
+                            'budget_utilization', 'remaining_budget'])
+
+    def test_budget_spent_amount(self):
+        with self.benchmark('budget_spent_amount'):
+            self.budgets.mapped('spent_amount')
+
+    def test_budget_report_data(self):
+        with self.benchmark('budget_report_data'):
+            self.budgets[0].get_budget_report_data()
+
+    def test_utilization_report_data(self):
+        with self.benchmark('utilization_report_data'):
+            self.budgets[0].get_utilization_report_data()
+
+    def test_import_wizard(self):
+        rows = min(BENCHMARK_SIZE, 5000)
+        lines = ['title,amount,category,date,description']
+        names = self.categories.mapped('name')
+        # dates within the seeded budgets, which end today
+        lines += ['Imported %d,%d.50,%s,%s,Line %d' % (
+            index, 1 + index % 300, names[index % len(names)], date.today() - timedelta(days=index % 28), index)
+            for index in range(rows)]
+        wizard = self.env['expense.import.wizard'].create({
+            'csv_file': base64.b64encode('\n'.join(lines).encode()),
+            'filename': 'benchmark.csv',
+        })
+        with self.benchmark('import_wizard'):
+            wizard.action_import()
+        self.assertEqual(wizard.successful_imports, rows)
+
+    def test_bulk_workflow(self):
+        expense_ids = ExpenseDataGenerator(self.env).expenses(
+            min(BENCHMARK_SIZE, 1000), self.categories, self.budgets, states=('draft',))
+        expenses = self.env['expense.tracker'].browse(expense_ids)
+        with self.benchmark('workflow_submit'):
+            expenses.action_submit()
+        with self.benchmark('workflow_approve'):
+            expenses.action_approve()
+        with self.benchmark('workflow_mark_paid'):
+            expenses.action_mark_paid()
+
+
+@tagged('expense_benchmark', '-standard', 'post_install', '-at_install')
+class TestExpenseInvoiceBenchmarks(ExpenseBenchmarkMixin, AccountTestInvoicingCommon):
+
+    @classmethod
+    def setUpClass(cls, chart_template_ref=None):
+        super().setUpClass(chart_template_ref=chart_template_ref)
+        generator = ExpenseDataGenerator(cls.env)
+        cls.categories = generator.categories(roots=2, children=2)
+        cls.expense_ids = generator.expenses(
+            min(BENCHMARK_SIZE, 500), cls.categories, states=('approved',), days=30,
+            partner=cls.partner_a, company=cls.company_data['company'])
+
+    def test_create_invoices(self):
+        wizard = self.env['expense.invoice.wizard'].create({
+            'expense_ids': [(6, 0, self.expense_ids)],
+            'partner_id': self.partner_a.id,
+            'product_id': self.product_a.id,
+            'journal_id': self.company_data['default_journal_purchase'].id,
+        })
+        with self.benchmark('create_invoices'):
+            wizard.action_create_invoice()
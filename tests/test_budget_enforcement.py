@@ -0,0 +1,75 @@
+from odoo.exceptions import UserError
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestBudgetEnforcement(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.category = cls.env['expense.category'].create({'name': 'Enforced'})
+        cls.budgets = cls.env['expense.budget'].create([{
+            'name': 'Enforced %d' % index,
+            'category_id': cls.category.id,
+            'amount': 250.0,
+            'date_from': '2020-01-01',
+            'date_to': '2020-12-31',
+            'state': 'active',
+        } for index in range(3)])
+        cls.expenses = cls.env['expense.tracker'].create([{
+            'title': 'Enforced %d' % index,
+            'amount': 100.0,
+            'category_id': cls.category.id,
+            'budget_id': budget.id,
+            'date': '2020-06-01',
+        } for budget in cls.budgets for index in range(3)])
+        cls.expenses.action_submit()
+        cls.manager_group = cls.env.ref('expense_tracker_advanced.group_expense_manager')
+
+    def test_no_enforcement(self):
+        self.assertFalse(self.expenses.action_approve())
+        self.assertEqual(set(self.expenses.mapped('state')), {'approved'})
+
+    def test_block(self):
+        self.budgets.enforcement_mode = 'block'
+        with self.assertRaises(UserError):
+            self.expenses.action_approve()
+
+        within = self.expenses.filtered(lambda expense: expense.title != 'Enforced 2')
+        within.action_approve()
+        with self.assertRaises(UserError):
+            self.expenses[2].action_approve()
+        self.assertEqual(self.expenses[2].state, 'submitted')
+
+    def test_warn(self):
+        self.budgets[0].enforcement_mode = 'warn'
+        action = self.expenses.action_approve()
+        self.assertEqual(action['tag'], 'display_notification')
+        self.assertEqual(set(self.expenses.mapped('state')), {'approved'})
+        self.assertEqual(self.budgets[0].spent_amount, 300.0)
+
+    def test_manager_approval(self):
+        self.budgets.enforcement_mode = 'approval'
+        self.env.user.groups_id -= self.manager_group
+        with self.assertRaises(UserError):
+            self.expenses.action_approve()
+
+        self.env.user.groups_id += self.manager_group
+        self.expenses.action_approve()
+        self.assertEqual(set(self.expenses.mapped('state')), {'approved'})
+
+    def test_enforced_spend_is_folded_under_lock(self):
+        Ledger = self.env['expense.budget.ledger']
+        self.budgets[0].enforcement_mode = 'block'
+        self.expenses[:2].action_approve()
+        self.assertEqual(self.budgets[0].spent_amount, 200.0)
+
+        self.expenses[0].action_reset_to_draft()
+        self.assertTrue(Ledger.search([('budget_id', '=', self.budgets[0].id), ('amount', '<', 0)]),
+                        "Resets only append to the ledger")
+        self.assertEqual(self.budgets[0].spent_amount, 100.0)
+
+        self.expenses[1:3].action_approve()
+        self.assertEqual(self.budgets[0].spent_folded, 100.0, "The approval check folded the ledger")
+        self.assertEqual(self.budgets[0].spent_amount, 200.0)
@@ -0,0 +1,72 @@
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestBudgetLedger(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.category = cls.env['expense.category'].create({'name': 'Ledger'})
+        cls.budget, cls.other_budget = cls.env['expense.budget'].create([{
+            'name': name,
+            'category_id': cls.category.id,
+            'amount': 1000.0,
+            'date_from': '2020-01-01',
+            'date_to': '2020-12-31',
+            'state': 'active',
+        } for name in ('Ledger Budget', 'Other Ledger Budget')])
+        cls.expenses = cls.env['expense.tracker'].create([{
+            'title': 'Ledger %d' % index,
+            'amount': 100.0,
+            'category_id': cls.category.id,
+            'budget_id': cls.budget.id,
+            'date': '2020-06-01',
+        } for index in range(3)])
+
+    def _ledger(self, budget):
+        return self.env['expense.budget.ledger'].search([('budget_id', '=', budget.id)])
+
+    def assertSpent(self, budget, amount):
+        budget.invalidate_recordset(['spent_amount'])
+        self.assertEqual(budget.spent_amount, amount)
+
+    def test_approvals_append_to_ledger(self):
+        self.assertFalse(self._ledger(self.budget))
+        self.expenses.action_submit()
+        self.expenses.action_approve()
+        self.assertEqual(sum(self._ledger(self.budget).mapped('amount')), 300.0)
+        self.assertSpent(self.budget, 300.0)
+
+        self.expenses[0].amount = 150.0
+        self.expenses[1].budget_id = self.other_budget
+        self.expenses[2].action_reject()
+        self.assertSpent(self.budget, 150.0)
+        self.assertSpent(self.other_budget, 100.0)
+
+        self.expenses[0].unlink()
+        self.assertSpent(self.budget, 0.0)
+
+    def test_fold(self):
+        self.expenses.action_approve()
+        self.env['expense.budget']._cron_fold_spent_ledger()
+        self.assertFalse(self._ledger(self.budget))
+        self.assertEqual(self.budget.spent_folded, 300.0)
+        self.assertSpent(self.budget, 300.0)
+
+        self.expenses[0].action_mark_paid()
+        self.expenses[1].action_reset_to_draft()
+        self.assertSpent(self.budget, 200.0)
+        self.env['expense.budget']._cron_fold_spent_ledger()
+        self.assertEqual(self.budget.spent_folded, 200.0)
+        self.assertSpent(self.budget, 200.0)
+
+    def test_archived_spend_is_kept(self):
+        self.expenses.action_approve()
+        self.expenses[:2]._archive_expenses()
+        self.assertSpent(self.budget, 300.0)
+
+        self.env['expense.budget']._rebuild_spent_ledger(self.budget.ids)
+        self.assertFalse(self._ledger(self.budget))
+        self.assertEqual(self.budget.spent_folded, 300.0)
+        self.assertSpent(self.budget, 300.0)
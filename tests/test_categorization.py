@@ -0,0 +1,123 @@
+import base64
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestExpenseCategorization(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Category = cls.env['expense.category']
+        cls.travel, cls.meals, cls.software, cls.large = Category.create([
+            {'name': name} for name in ('Rule Travel', 'Rule Meals', 'Rule Software', 'Rule Large')
+        ])
+        cls.travel_budget, cls.meals_budget, cls.software_budget = cls.env['expense.budget'].create([{
+            'name': 'Rule %s Budget' % category.name,
+            'category_id': category.id,
+            'amount': 10000.0,
+            'date_from': '2020-01-01',
+            'date_to': '2020-12-31',
+            'state': 'active',
+        } for category in (cls.travel, cls.meals, cls.software)])
+        cls.env['expense.categorization.rule'].create([{
+            'name': 'Airlines', 'sequence': 1, 'match_field': 'vendor', 'pattern': 'airways',
+            'category_id': cls.travel.id, 'budget_id': cls.travel_budget.id,
+        }, {
+            'name': 'Taxi', 'sequence': 2, 'pattern': 'taxi', 'category_id': cls.travel.id,
+        }, {
+            'name': 'Subscriptions', 'sequence': 3, 'match_type': 'regex', 'pattern': r'licen[cs]e|saas',
+            'category_id': cls.software.id,
+        }, {
+            'name': 'Lunch', 'sequence': 4, 'match_field': 'description', 'pattern': 'lunch',
+            'amount_max': 100.0, 'category_id': cls.meals.id,
+        }, {
+            'name': 'Large', 'sequence': 5, 'amount_min': 5000.0, 'category_id': cls.large.id,
+        }])
+        cls.Rule = cls.env['expense.categorization.rule']
+
+    def test_categorize(self):
+        results = self.Rule.categorize([
+            {'title': 'Flight', 'vendor': 'Blue Airways', 'amount': 400.0},
+            {'title': 'TAXI to airport', 'amount': 30.0},
+            {'title': 'Taxis', 'amount': 30.0},
+            {'title': 'Yearly license', 'description': 'team lunch', 'amount': 50.0},
+            {'title': 'Client', 'description': 'Lunch', 'amount': 50.0},
+            {'title': 'Client', 'description': 'Lunch', 'amount': 500.0},
+            {'title': 'Server', 'amount': 9000.0},
+        ])
+        self.assertEqual(results, [
+            (self.travel.id, self.travel_budget.id),
+            (self.travel.id, False),
+            None,
+            (self.software.id, False),
+            (self.meals.id, False),
+            None,
+            (self.large.id, False),
+        ])
+
+    def test_overlapping_keywords(self):
+        self.Rule.create([{
+            'name': 'Shop', 'sequence': 0, 'pattern': 'shop', 'amount_max': 100.0, 'category_id': self.meals.id,
+        }, {
+            'name': 'Coffee shop', 'sequence': 1, 'pattern': 'coffee shop', 'category_id': self.travel.id,
+        }, {
+            'name': 'Coffee', 'sequence': 0, 'match_field': 'description', 'pattern': 'coffee',
+            'category_id': self.software.id,
+        }, {
+            'name': 'Coffee beans', 'sequence': 1, 'match_field': 'description', 'pattern': 'coffee beans',
+            'category_id': self.travel.id,
+        }])
+        results = self.Rule.categorize([
+            {'title': 'Coffee shop receipt', 'amount': 20.0},
+            {'title': 'Coffee shop receipt', 'amount': 200.0},
+            {'title': 'Cash', 'description': 'Coffee beans', 'amount': 20.0},
+        ])
+        self.assertEqual(results, [
+            (self.meals.id, False),
+            (self.travel.id, False),
+            (self.software.id, False),
+        ], "A keyword within or at the start of a longer one still matches")
+
+    def test_matcher_cache(self):
+        matcher = self.Rule._get_matcher(self.env.company.id)
+        self.assertIs(self.Rule._get_matcher(self.env.company.id), matcher)
+        self.Rule.search([('name', '=', 'Taxi')]).pattern = 'cab'
+        self.assertEqual(self.Rule.categorize([{'title': 'Cab ride'}]), [(self.travel.id, False)])
+
+    def test_import(self):
+        csv_data = '\n'.join([
+            'title,amount,category,date,vendor',
+            'Flight,400,,2020-03-01,Blue Airways',
+            'Office chair,150,Rule Furniture,2020-03-02,',
+            'Unknown,20,,2020-03-03,',
+        ])
+        wizard = self.env['expense.import.wizard'].create({
+            'csv_file': base64.b64encode(csv_data.encode()),
+            'filename': 'expenses.csv',
+        })
+        wizard.action_import()
+        self.assertEqual((wizard.successful_imports, wizard.failed_imports), (1, 2))
+        flight = self.env['expense.tracker'].search([('title', '=', 'Flight')])
+        self.assertEqual(flight.category_id, self.travel)
+        self.assertEqual(flight.budget_id, self.travel_budget)
+
+    def test_recategorize(self):
+        expenses = self.env['expense.tracker'].create([{
+            'title': title,
+            'amount': amount,
+            'category_id': self.meals.id,
+            'budget_id': self.meals_budget.id,
+            'date': '2020-05-01',
+        } for title, amount in [
+            ('Taxi home', 40.0), ('SaaS renewal', 40.0), ('Dinner', 40.0), ('Server', 9000.0),
+        ]])
+        expenses.action_recategorize()
+        self.assertEqual([(expense.category_id, expense.budget_id) for expense in expenses], [
+            (self.travel, self.travel_budget),
+            (self.software, self.software_budget),
+            (self.meals, self.meals_budget),
+            # no active budget in the rule's category: left as is
+            (self.meals, self.meals_budget),
+        ])
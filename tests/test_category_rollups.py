@@ -0,0 +1,48 @@
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestCategoryRollups(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = cls.env['res.users'].with_context(no_reset_password=True).create({
+            'name': 'Rollup User',
+            'login': 'rollup_user',
+            'groups_id': [(6, 0, cls.env.ref('expense_tracker_advanced.group_expense_user').ids)],
+        })
+        cls.root = cls.env['expense.category'].create({'name': 'Rollup'})
+        cls.child = cls.env['expense.category'].create({'name': 'Rollup Child', 'parent_id': cls.root.id})
+        cls.budget = cls.env['expense.budget'].create({
+            'name': 'Rollup Budget',
+            'category_id': cls.child.id,
+            'amount': 1000.0,
+            'date_from': '2020-01-01',
+            'date_to': '2020-12-31',
+            'state': 'active',
+        })
+        expenses = cls.env['expense.tracker'].create([{
+            'title': 'Rollup %d' % amount,
+            'amount': amount,
+            'category_id': cls.child.id,
+            'budget_id': cls.budget.id,
+            'date': '2020-06-01',
+            'user_id': user.id,
+        } for amount, user in ((100.0, cls.env.user), (50.0, cls.user))])
+        expenses.action_submit()
+        expenses.action_approve()
+
+    def test_subtree_totals(self):
+        totals = self.root.get_subtree_totals()[self.root.id]
+        self.assertEqual(totals, {'spent_amount': 150.0, 'budget_amount': 1000.0, 'budget_spent_amount': 150.0})
+
+    def test_subtree_totals_follow_record_rules(self):
+        totals = self.root.with_user(self.user).get_subtree_totals()[self.root.id]
+        self.assertEqual(totals['spent_amount'], 50.0, "Only the user's own expenses are counted")
+        self.assertEqual(totals['budget_amount'], 1000.0)
+
+    def test_subtree_totals_follow_companies(self):
+        company = self.env['res.company'].create({'name': 'Rollup Company'})
+        totals = self.root.with_context(allowed_company_ids=company.ids).get_subtree_totals()[self.root.id]
+        self.assertEqual(totals['spent_amount'], 0.0)
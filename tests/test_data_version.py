@@ -0,0 +1,65 @@
+from unittest.mock import patch
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestDataVersion(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.category = cls.env['expense.category'].create({'name': 'Versioned'})
+        cls.Version = cls.env['expense.data.version']
+
+    def _available(self):
+        budgets = self.env['expense.budget'].get_available_budgets(self.category.id, '2020-06-01')
+        return [budget['id'] for budget in budgets[self.category.id]]
+
+    def test_active_index_follows_budgets(self):
+        Budget = self.env['expense.budget']
+        self.assertEqual(self._available(), [])
+        with patch.object(type(self.env.registry), 'clear_caches') as clear_caches:
+            budget = Budget.create({
+                'name': 'Versioned Budget',
+                'category_id': self.category.id,
+                'amount': 100.0,
+                'date_from': '2020-01-01',
+                'date_to': '2020-12-31',
+                'state': 'active',
+            })
+            self.assertEqual(self._available(), budget.ids)
+            budget.action_close()
+            self.assertEqual(self._available(), [])
+            budget.unlink()
+        clear_caches.assert_not_called()
+
+    def test_versions(self):
+        key = 'test.versioned'
+        company = self.env.company.id
+        initial = self.Version.get_version(key, company)
+        self.Version.bump(key, [company])
+        self.Version.bump(key, [False])
+        bumped = self.Version.get_version(key, company)
+        self.assertEqual(bumped[0], initial[0] + 2, "Shared bumps count for every company")
+        self.assertNotEqual(bumped, initial)
+
+        self.Version._cron_fold_versions()
+        folded = self.Version.get_version(key, company)
+        self.assertEqual(folded[0], bumped[0])
+        self.assertEqual(self.Version.search_count([('key', '=', key)]), 2)
+
+    def test_report_version_bumps_once_per_transaction(self):
+        ReportVersion = self.env['expense.report.version']
+        # settle the bumps left pending by the test setup
+        self.env.cr.precommit.run()
+        version = ReportVersion.get_data_version()
+        rows = self.Version.search_count([('key', '=', ReportVersion._VERSION_KEY)])
+        self.category.write({'name': 'Versioned Again'})
+        self.category.write({'name': 'Versioned Once More'})
+        self.assertIsNone(ReportVersion.get_data_version(), "Renders bypass the cache until commit")
+        self.assertEqual(self.Version.search_count([('key', '=', ReportVersion._VERSION_KEY)]), rows)
+
+        self.env.cr.precommit.run()
+        self.assertEqual(self.Version.search_count([('key', '=', ReportVersion._VERSION_KEY)]), rows + 1)
+        self.assertNotIn(ReportVersion.get_data_version(), (None, version))
@@ -0,0 +1,44 @@
+import unittest
+
+from odoo.tests import TransactionCase, tagged
+
+from ..models.expense_anomaly import np
+from .common import ExpenseDataGenerator
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+@tagged('post_install', '-at_install')
+class TestExpenseAnomaly(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        generator = ExpenseDataGenerator(cls.env)
+        categories = generator.categories(roots=1, children=0, prefix='Anomaly')
+        budgets = generator.budgets(categories)
+        generator.expenses(400, categories, budgets, states=('approved',), days=200)
+        cls.Expense = cls.env['expense.tracker']
+        cls.outlier = cls.Expense.create({
+            'title': 'Anomaly outlier',
+            'amount': 250000.0,
+            'category_id': categories.id,
+            'budget_id': budgets.id,
+            'date': cls.Expense.search([('category_id', '=', categories.id)], limit=1).date,
+            'state': 'approved',
+        })
+        cls.Anomaly = cls.env['expense.anomaly']
+
+    def test_detect(self):
+        self.Anomaly.detect_anomalies()
+        flags = self.Anomaly.search([('expense_id', '=', self.outlier.id)])
+        self.assertEqual(set(flags.mapped('anomaly_type')), {'amount', 'spike'})
+        self.assertEqual(flags[0].amount, 250000.0)
+        self.assertEqual(flags[0].user_id, self.outlier.user_id)
+
+    def test_reviewed_flags_are_kept(self):
+        self.Anomaly.detect_anomalies()
+        flags = self.Anomaly.search([('expense_id', '=', self.outlier.id)])
+        flags.action_dismiss()
+        self.Anomaly.detect_anomalies()
+        self.assertEqual(self.Anomaly.search([('expense_id', '=', self.outlier.id)]), flags)
+        self.assertEqual(set(flags.mapped('state')), {'dismissed'})
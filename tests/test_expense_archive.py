@@ -0,0 +1,69 @@
+import base64
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestExpenseArchive(TransactionCase):
+
+    RECEIPT = base64.b64encode(b'%PDF-1.4 archived receipt')
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.category = cls.env['expense.category'].create({'name': 'Archive'})
+        cls.budget = cls.env['expense.budget'].create({
+            'name': 'Archive Budget',
+            'category_id': cls.category.id,
+            'amount': 1000.0,
+            'date_from': '2020-01-01',
+            'date_to': '2020-12-31',
+            'state': 'active',
+        })
+        cls.expense = cls.env['expense.tracker'].create({
+            'title': 'Archived',
+            'amount': 100.0,
+            'category_id': cls.category.id,
+            'budget_id': cls.budget.id,
+            'date': '2020-06-01',
+            'receipt': cls.RECEIPT,
+            'receipt_filename': 'receipt.pdf',
+        })
+        cls.expense.action_submit()
+        cls.expense.action_approve()
+
+    def test_receipt_survives_archive_and_restore(self):
+        checksum = self.expense.receipt_checksum
+        self.assertTrue(checksum)
+
+        archive = self.expense._archive_expenses()
+        self.assertFalse(self.expense.exists())
+        self.assertEqual(archive.receipt, self.RECEIPT)
+        self.assertEqual(archive.receipt_filename, 'receipt.pdf')
+
+        action = archive.action_restore()
+        expense = self.env['expense.tracker'].search(action['domain'])
+        self.assertEqual(expense.receipt, self.RECEIPT)
+        self.assertEqual(expense.receipt_checksum, checksum)
+
+    def test_archive_visibility(self):
+        user = self.env['res.users'].with_context(no_reset_password=True).create({
+            'name': 'Archive User',
+            'login': 'archive_user',
+            'groups_id': [(6, 0, self.env.ref('expense_tracker_advanced.group_expense_user').ids)],
+        })
+        own = self.env['expense.tracker'].create({
+            'title': 'Archived of another user',
+            'amount': 50.0,
+            'category_id': self.category.id,
+            'budget_id': self.budget.id,
+            'date': '2020-06-02',
+            'user_id': user.id,
+        })
+        own.action_submit()
+        own.action_approve()
+        (self.expense | own)._archive_expenses()
+
+        for model in ('expense.tracker.archive', 'expense.archive.rollup', 'expense.tracker.history'):
+            records = self.env[model].with_user(user).search([('category_id', '=', self.category.id)])
+            self.assertEqual(records.mapped('user_id'), user, "%s rows of other users are hidden" % model)
@@ -0,0 +1,69 @@
+import cProfile
+
+from odoo.tests import TransactionCase, tagged
+
+from .common import ExpenseDataGenerator
+
+
+@tagged('post_install', '-at_install')
+class TestExpenseInstrumentation(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        generator = ExpenseDataGenerator(cls.env)
+        generator.expenses(20, generator.categories(roots=2, children=1, prefix='Instrumented'))
+        cls.Dashboard = cls.env['expense.tracker.dashboard']
+        cls.ICP = cls.env['ir.config_parameter'].sudo()
+
+    def setUp(self):
+        super().setUp()
+        self.env['expense.instrumentation'].clear_entries()
+
+    def test_disabled_records_nothing(self):
+        self.ICP.set_param('expense_tracker_advanced.instrumentation_enabled', 'False')
+        self.ICP.set_param('expense_tracker_advanced.slow_operation_threshold', '0')
+        self.Dashboard.get_category_chart_data()
+        self.assertFalse(self.env['expense.instrumentation'].get_entries())
+
+    def test_call_log(self):
+        self.env['expense.instrumentation'].set_enabled(True)
+        self.Dashboard.get_category_chart_data()
+        entries = self.env['expense.instrumentation'].get_entries()
+        self.assertEqual(len(entries), 1)
+        self.assertTrue(entries[0]['name'].endswith('get_category_chart_data'))
+        self.assertGreater(entries[0]['query_count'], 0)
+
+        action = self.env['expense.instrumentation.entry'].action_open()
+        self.assertEqual(self.env['expense.instrumentation.entry'].search_count(action['domain']), 1)
+
+    def test_slow_operation_capture(self):
+        self.ICP.set_param('expense_tracker_advanced.slow_operation_threshold', '0.000001')
+        SlowOperation = self.env['expense.slow.operation']
+        before = SlowOperation.search([])
+
+        # a single slow call is captured
+        self.Dashboard.get_category_chart_data()
+        capture = SlowOperation.search([]) - before
+        self.assertEqual(len(capture), 1)
+        self.assertTrue(capture.name.endswith('get_category_chart_data'))
+        self.assertIn('expense_category', capture.sql_log)
+        self.assertIn('get_category_chart_data', capture.profile_stats)
+        self.assertTrue(capture.profile_file)
+        self.assertEqual(capture.user_id, self.env.user)
+
+    def test_slow_operation_capture_under_profiler(self):
+        self.ICP.set_param('expense_tracker_advanced.slow_operation_threshold', '0.000001')
+        SlowOperation = self.env['expense.slow.operation']
+        before = SlowOperation.search([])
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            self.Dashboard.get_category_chart_data()
+        finally:
+            profiler.disable()
+        capture = SlowOperation.search([]) - before
+        self.assertEqual(len(capture), 1, "Captured without profile, and without failing")
+        self.assertIn('expense_category', capture.sql_log)
+        self.assertFalse(capture.profile_file)
@@ -0,0 +1,244 @@
+import base64
+from datetime import date, timedelta
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+from odoo.tests import TransactionCase, tagged
+
+from .common import ExpenseDataGenerator
+
+
+class ExpenseQueryCountMixin:
+    """Count the SQL queries of a call, caches cold"""
+
+    def _count_queries(self, func):
+        self.env.flush_all()
+        self.env.invalidate_all()
+        self.env['expense.budget.statistics'].invalidate_statistics()
+        self.env.registry.clear_caches()
+        queries = self.env.cr.sql_log_count
+        func()
+        self.env.flush_all()
+        return self.env.cr.sql_log_count - queries
+
+    def assertBatchQueryCount(self, func, max_queries, sizes=(5, 25)):
+        """``func(n)`` is called on ``n`` fresh records for each size"""
+        small, large = (self._count_queries(lambda size=size: func(size)) for size in sizes)
+        self.assertLessEqual(large, small, "query count grows with the batch: %d -> %d" % (small, large))
+        self.assertLessEqual(large, max_queries, "too many queries: %d > %d" % (large, max_queries))
+
+
+@tagged('post_install', '-at_install')
+class TestExpenseQueryCounts(ExpenseQueryCountMixin, TransactionCase):
+    """Guard the number of SQL queries of the public model methods.
+
+    Read paths (dashboards, reports, widget RPCs) are measured on a small
+    data set, then again after growing it tenfold; write paths on a small
+    batch of records, then on a five times larger one. Either way the count
+    must not move and stay under the given bound. Writes run without field
+    tracking, which mail performs record by record.
+    """
+
+    EXPENSES_PER_CATEGORY = 20
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.generator = ExpenseDataGenerator(cls.env)
+        cls._grow(2)
+
+    @classmethod
+    def _grow(cls, categories):
+        new_categories = cls.generator.categories(roots=categories, children=1, prefix='Guard %d' % categories)
+        budgets = cls.generator.budgets(new_categories)
+        cls.generator.expenses(len(new_categories) * cls.EXPENSES_PER_CATEGORY, new_categories, budgets)
+
+    def assertQueryCountConstant(self, func, max_queries):
+        small = self._count_queries(func)
+        self._grow(20)
+        large = self._count_queries(func)
+        self.assertLessEqual(large, small, "query count grows with the data: %d -> %d" % (small, large))
+        self.assertLessEqual(large, max_queries, "too many queries: %d > %d" % (large, max_queries))
+
+    def _new_expenses(self, count, state='draft'):
+        budget = self.env['expense.budget'].search([], limit=1)
+        expense_ids = self.generator.expenses(count, budget.category_id, budget, states=(state,), days=30)
+        return self.env['expense.tracker'].with_context(tracking_disable=True).browse(expense_ids)
+
+    # ------------------------------------------------------------------
+    # expense.tracker.dashboard
+    # ------------------------------------------------------------------
+
+    def test_dashboard_data(self):
+        Dashboard = self.env['expense.tracker.dashboard']
+        self.assertQueryCountConstant(lambda: Dashboard.create({}).read([
+            'total_expenses', 'monthly_expenses', 'pending_approval', 'budget_utilization', 'remaining_budget',
+        ]), 18)
+
+    def test_dashboard_category_chart(self):
+        self.assertQueryCountConstant(self.env['expense.tracker.dashboard'].get_category_chart_data, 8)
+
+    def test_dashboard_recent_activity(self):
+        self.assertQueryCountConstant(self.env['expense.tracker.dashboard'].get_recent_activity, 10)
+
+    # ------------------------------------------------------------------
+    # expense.tracker
+    # ------------------------------------------------------------------
+
+    def test_expense_chart_data(self):
+        self.assertQueryCountConstant(self.env['expense.tracker'].get_chart_data, 12)
+
+    def test_expense_dashboard_data(self):
+        self.assertQueryCountConstant(self.env['expense.tracker'].get_expense_data_for_dashboard, 5)
+
+    def test_expense_create(self):
+        budget = self.env['expense.budget'].search([], limit=1)
+        Expense = self.env['expense.tracker'].with_context(tracking_disable=True)
+        self.assertBatchQueryCount(lambda count: Expense.create([{
+            'title': 'Guard %d' % index,
+            'amount': 10.0 + index,
+            'category_id': budget.category_id.id,
+            'budget_id': budget.id,
+        } for index in range(count)]), 20)
+
+    def test_expense_write(self):
+        self.assertBatchQueryCount(lambda count: self._new_expenses(count).write({'amount': 42.0}), 12)
+
+    def test_expense_workflow(self):
+        def workflow(count):
+            expenses = self._new_expenses(count)
+            expenses.action_submit()
+            expenses.action_approve()
+            expenses.action_mark_paid()
+        self.assertBatchQueryCount(workflow, 60)
+
+    def test_expense_recategorize(self):
+        target = self.env['expense.budget'].search([], limit=2)[1]
+        self.env['expense.categorization.rule'].create({
+            'name': 'Guard', 'pattern': 'expense', 'category_id': target.category_id.id,
+        })
+        self.assertBatchQueryCount(lambda count: self._new_expenses(count).action_recategorize(), 25)
+
+    def test_expense_approval_queue(self):
+        # seeded submitted expenses have no approver: they are in the shared queue
+        Expense = self.env['expense.tracker']
+        self.assertQueryCountConstant(lambda: Expense.get_approval_queue(shared=True), 12)
+
+    # ------------------------------------------------------------------
+    # expense.budget
+    # ------------------------------------------------------------------
+
+    def test_budget_spent_amount(self):
+        Budget = self.env['expense.budget']
+        self.assertQueryCountConstant(lambda: Budget.search([]).mapped('utilization_percentage'), 6)
+
+    def test_budget_available_budgets(self):
+        self.assertQueryCountConstant(self.env['expense.budget'].get_available_budgets, 8)
+
+    def test_budget_progress_data(self):
+        Budget = self.env['expense.budget']
+        self.assertQueryCountConstant(lambda: Budget.get_progress_data(Budget.search([]).ids), 6)
+
+    def test_budget_report_data(self):
+        Budget = self.env['expense.budget']
+        self.assertQueryCountConstant(lambda: Budget.search([], limit=1).get_budget_report_data(), 8)
+
+    def test_budget_utilization_report_data(self):
+        Budget = self.env['expense.budget']
+        self.assertQueryCountConstant(lambda: Budget.search([], limit=1).get_utilization_report_data(), 12)
+
+    def test_budget_average_utilization(self):
+        Budget = self.env['expense.budget']
+        self.assertQueryCountConstant(lambda: Budget.search([], limit=1).get_average_utilization(), 6)
+
+    # ------------------------------------------------------------------
+    # Wizards
+    # ------------------------------------------------------------------
+
+    def _make_import_wizard(self, rows):
+        # categories with a budget covering the imported dates
+        categories = self.env['expense.budget'].search([('name', '=like', 'Budget Guard %')]).mapped(
+            'category_id.name')
+        lines = ['title,amount,category,date,description'] + [
+            'Guard %d,%d,%s,%s,' % (index, 1 + index, categories[index % len(categories)],
+                                    date.today() - timedelta(days=index % 28))
+            for index in range(rows)
+        ]
+        return self.env['expense.import.wizard'].create({
+            'csv_file': base64.b64encode('\n'.join(lines).encode()),
+            'filename': 'guard.csv',
+        })
+
+    def test_import_wizard_preview(self):
+        self.assertQueryCountConstant(lambda: self._make_import_wizard(200).action_preview_import(), 15)
+
+    def test_import_wizard_import(self):
+        def import_rows(count):
+            wizard = self._make_import_wizard(count).with_context(tracking_disable=True)
+            wizard.action_import()
+            self.assertEqual(wizard.successful_imports, count)
+        self.assertBatchQueryCount(import_rows, 40)
+
+    def test_invoice_wizard_default_get(self):
+        Wizard = self.env['expense.invoice.wizard']
+        self.assertQueryCountConstant(lambda: Wizard.with_context(
+            active_model='expense.tracker',
+            active_ids=self.env['expense.tracker'].search([], limit=500).ids,
+        ).default_get(['expense_ids', 'expense_id', 'partner_id']), 5)
+
+    def test_budget_alert_wizard_default_alerts(self):
+        # seeded budgets stay far below the alert thresholds: this guards the
+        # statistics pass selecting the budgets to alert on
+        self.assertQueryCountConstant(self.env['budget.alert.wizard'].create_default_alerts, 10)
+
+    def test_budget_alert_wizard_send_alert(self):
+        users = self.env['res.users'].with_context(no_reset_password=True).create([{
+            'name': 'Alert Guard %d' % index,
+            'login': 'alert_guard_%d' % index,
+            'notification_type': 'inbox',
+        } for index in range(25)])
+        budget = self.env['expense.budget'].search([], limit=1)
+        # the budget alert mail template is not loaded by the module: chat only
+        self.assertBatchQueryCount(lambda count: self.env['budget.alert.wizard'].create({
+            'budget_id': budget.id,
+            'threshold_percentage': 80.0,
+            'notify_users': [(6, 0, users[:count].ids)],
+            'notify_via_email': False,
+        }).action_send_alert(), 60)
+
+
+@tagged('post_install', '-at_install')
+class TestInvoiceWizardQueryCounts(ExpenseQueryCountMixin, AccountTestInvoicingCommon):
+    """Guard the number of SQL queries of the vendor bill wizard, single and batch"""
+
+    @classmethod
+    def setUpClass(cls, chart_template_ref=None):
+        super().setUpClass(chart_template_ref=chart_template_ref)
+        cls.generator = ExpenseDataGenerator(cls.env)
+        cls.categories = cls.generator.categories(roots=2, children=1, prefix='Invoice Guard')
+        cls.budgets = cls.generator.budgets(cls.categories)
+
+    def _make_wizard(self, count, **vals):
+        expense_ids = self.generator.expenses(
+            count, self.categories, self.budgets, states=('approved',), days=30,
+            partner=self.partner_a, company=self.company_data['company'])
+        vals.update({
+            'partner_id': self.partner_a.id,
+            'product_id': self.product_a.id,
+            'journal_id': self.company_data['default_journal_purchase'].id,
+        })
+        if count == 1:
+            vals['expense_id'] = expense_ids[0]
+        else:
+            vals['expense_ids'] = [(6, 0, expense_ids)]
+        return self.env['expense.invoice.wizard'].with_context(tracking_disable=True).create(vals)
+
+    def test_create_invoice(self):
+        queries = self._count_queries(lambda: self._make_wizard(1).action_create_invoice())
+        self.assertLessEqual(queries, 120, "too many queries: %d > 120" % queries)
+
+    def test_create_invoices(self):
+        self.assertBatchQueryCount(lambda count: self._make_wizard(
+            count,
+            create_payment=True,
+            payment_journal_id=self.company_data['default_journal_bank'].id,
+        ).action_create_invoices(), 200)
@@ -0,0 +1,80 @@
+import json
+from datetime import date, timedelta
+
+from odoo.tests import TransactionCase, tagged
+
+from .common import ExpenseDataGenerator
+
+
+@tagged('post_install', '-at_install')
+class TestExpenseQueryPlans(TransactionCase):
+    """Run the module's hot expense.tracker queries on a seeded table and
+    check each is served by the index meant for it, not by a sequential scan
+    or an unrelated index."""
+
+    EXPENSE_COUNT = 20000
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.category = cls.env['expense.category'].create({'name': 'Query Plan Category'})
+        cls.budget = cls.env['expense.budget'].create({
+            'name': 'Query Plan Budget',
+            'category_id': cls.category.id,
+            'amount': 1000000.0,
+            'date_from': date.today() - timedelta(days=365),
+            'date_to': date.today(),
+        })
+        ExpenseDataGenerator(cls.env).expenses(cls.EXPENSE_COUNT, cls.category, cls.budget)
+
+    def _get_plan_nodes(self, plan):
+        yield plan
+        for child in plan.get('Plans', []):
+            yield from self._get_plan_nodes(child)
+
+    def assertUsesIndex(self, domain, indexes, order=None, limit=None):
+        """Fail unless the plan of ``domain`` reads expense_tracker through one
+        of ``indexes`` and never with a sequential scan"""
+        query = self.env['expense.tracker']._search(domain, order=order, limit=limit)
+        query_str, params = query.select()
+        self.env.cr.execute("SET LOCAL enable_seqscan TO off")
+        self.env.cr.execute("EXPLAIN (FORMAT JSON) " + query_str, params)
+        plan = self.env.cr.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        self.env.cr.execute("SET LOCAL enable_seqscan TO on")
+        nodes = list(self._get_plan_nodes(plan[0]['Plan']))
+        self.assertNotIn('expense_tracker', {node.get('Relation Name') for node in nodes
+                                             if node['Node Type'] == 'Seq Scan'},
+                         "Sequential scan on expense_tracker for domain %s" % (domain,))
+        used = {node['Index Name'] for node in nodes if 'Index Name' in node}
+        self.assertTrue(used & set(indexes),
+                        "Domain %s uses %s instead of %s" % (domain, sorted(used), sorted(indexes)))
+
+    def test_default_list_order(self):
+        self.assertUsesIndex([], ['expense_tracker_date_id_index'], order='date desc, id desc', limit=80)
+
+    def test_company_list(self):
+        self.assertUsesIndex([('company_id', 'in', self.env.company.ids)],
+                             ['expense_tracker_company_date_id_index'])
+
+    def test_my_expenses(self):
+        self.assertUsesIndex([('user_id', '=', self.env.uid)],
+                             ['expense_tracker_user_date_id_index', 'expense_tracker__user_id_index'])
+
+    def test_current_month_filter(self):
+        today = date.today()
+        self.assertUsesIndex([('date', '>=', today.replace(day=1)), ('date', '<=', today)],
+                             ['expense_tracker_date_id_index'])
+
+    def test_pending_approval(self):
+        self.assertUsesIndex([('state', '=', 'submitted')], ['expense_tracker_state_date_index'])
+
+    def test_budget_expenses(self):
+        self.assertUsesIndex([('budget_id', '=', self.budget.id)], ['expense_tracker_budget_state_index'])
+        self.assertUsesIndex([('budget_id', 'in', self.budget.ids), ('state', 'in', ['approved', 'paid'])],
+                             ['expense_tracker_budget_state_index'])
+
+    def test_category_expenses(self):
+        self.assertUsesIndex([('category_id', 'child_of', self.category.ids)],
+                             ['expense_tracker_category_state_index', 'expense_tracker__category_id_index'])